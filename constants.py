@@ -9,6 +9,10 @@ class Positions:
     SB: str = "SB"
     BB: str = "BB"
     UTG: str = "UTG"
+    UTG1: str = "UTG+1"
+    UTG2: str = "UTG+2"
+    MP: str = "MP"
+    LJ: str = "LJ"
     HJ: str = "HJ"
     CO: str = "CO"
 
@@ -31,6 +35,15 @@ class Grammar:
     ALL_IN: str = "%all_in%"
     STACK: str = "%stack%"
 
+# Who answers the prompts (see llm.py).
+@dataclass (frozen=True)
+class Providers:
+    # Any server speaking the OpenAI chat completions API.
+    OPENAI: str = "openai"
+    ANTHROPIC: str = "anthropic"
+    # A local ollama server, through its OpenAI-compatible endpoint.
+    OLLAMA: str = "ollama"
+
 @dataclass (frozen=True)
 class Subjects:
     DEALER: str = "Dealer"
@@ -59,9 +72,11 @@ class Actions:
     SHOW: ClassVar[str] = 'show'
     FLIP: ClassVar[str] = 'flip'
     EXIT: ClassVar[str] = 'exit'
+    EQUITY: ClassVar[str] = 'equity'
 
     DOESNT_ADD_S: ClassVar[set] = set([DEALT])
     MONEY_INVOLVED: ClassVar[set] = set([POST, BET, RAISE, CALL])
+    CARDS_INVOLVED: ClassVar[set] = set([DEALT, FLIP, SHOW])
 
     PHRASES: ClassVar[Dict[str, str]] = {
         SHUFFLE: f'{Grammar.SUBJECT} shuffles with seed {Grammar.OBJECT}.',
@@ -82,5 +97,6 @@ class Actions:
         RETURN: f'${Grammar.OBJECT}, un-called, returns to {Grammar.SUBJECT}.',
         SHOW: f'{Grammar.SUBJECT} shows {Grammar.OBJECT}.',
         FLIP: f'{Grammar.SUBJECT} flips {Grammar.OBJECT}.',
-        EXIT: f'{Grammar.SUBJECT} exits the table.'
+        EXIT: f'{Grammar.SUBJECT} exits the table.',
+        EQUITY: f'{Grammar.SUBJECT} has {Grammar.OBJECT} equity.'
     }
@@ -1,23 +1,45 @@
+import copy
 import heapq
 import math
+import random
 import time
-import copy
 
-from dataclasses import dataclass
+import evaluator
 from game_structs import Player
 
 class Deck:
-    
+
     RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "T", "J", "Q", "K", "A"]
     SUITS = ["c", "d", 'h', "s"]
 
+    # A deck is a permutation of indices into Card.TABLE plus a cursor.
+    # Shuffling permutes the indices in place and dealing only moves the cursor,
+    # so no cards or lists are built per hand.
+    def __init__(self):
+        self.order = list(range(len(Card.TABLE)))
+        self.cursor = 0
+
+    def shuffle(self, rng: random.Random) -> 'Deck':
+        rng.shuffle(self.order)
+        self.cursor = 0
+        return self
+
+    def deal_one(self) -> int:
+        card = Card.TABLE[self.order[self.cursor]]
+        self.cursor += 1
+        return card
+
+    def deal(self, amount=1) -> tuple[int, ...]:
+        start = self.cursor
+        self.cursor += amount
+        return tuple(Card.TABLE[index] for index in self.order[start:self.cursor])
+
+    def remaining(self) -> int:
+        return len(self.order) - self.cursor
+
     @staticmethod
     def generate_deck():
-        deck = []
-        for rank in Deck.RANKS:
-            for suit in Deck.SUITS:
-                deck.append(Card.get(f"{rank}{suit}"))
-        return deck
+        return list(Card.TABLE)
 
     @staticmethod
     def pop(deck, amount=1):
@@ -32,80 +54,95 @@ class SameRank:
         self.rank = rank
         self.constituents = constituents
 
-@dataclass(frozen = True)
 class Card:
+    # Cards are plain ints, packed so rank and suit checks are single bit operations.
+    #
+    #   +--------+--------+--------+--------+
+    #   |xxxbbbbb|bbbbbbbb|cdhsrrrr|xxpppppp|
+    #   +--------+--------+--------+--------+
+    #
+    #   p = prime of the rank (2 = 2, 3 = 3, 4 = 5, ..., A = 41)
+    #   r = rank index (2 = 0, ..., A = 12)
+    #   cdhs = suit bit
+    #   b = rank bit
+    #
+    # Since the rank bit is the most significant part, plain int comparison orders cards by rank.
+    # Strings only come back at the boundaries (logs, prompts and save files).
+
+    PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+    SUIT_BITS = {"c": 8, "d": 4, "h": 2, "s": 1}
+    SUIT_NAMES = {8: "c", 4: "d", 2: "h", 1: "s"}
+
+    # Filled in below the class: all 52 cards, 2c 2d 2h 2s 3c ... As, and each one's index by name.
+    TABLE = ()
+    INDEX = {}
 
-    rank: str
-    suit: str
-    value: str
+    @staticmethod
+    def encode(rank: int, suit: int) -> int:
+        return (1 << (16 + rank)) | (suit << 12) | (rank << 8) | Card.PRIMES[rank]
 
-    def __str__(self):
-        return f"{self.rank}{self.suit}"
-    
-    __repr__ = __str__
+    @staticmethod
+    def get(card: str) -> int:
+        return Card.TABLE[Card.INDEX[card]]
 
-    def __eq__(self, other):
-        if not isinstance(other, Card):
-            return NotImplemented
-        return self.value == other.value
-    
-    def __lt__(self, other):
-        if not isinstance(other, Card):
-            return NotImplemented
-        return self.value < other.value
+    @staticmethod
+    def rank(card: int) -> int:
+        return (card >> 8) & 0xF
 
     @staticmethod
-    def get(card: str) -> 'Card':
-        rank = card[0]
-        suit = card[1]
-        value = Deck.RANKS.index(rank)
-        return Card(rank, suit, value)
+    def suit(card: int) -> int:
+        return (card >> 12) & 0xF
 
+    @staticmethod
+    def rank_bit(card: int) -> int:
+        return card >> 16
 
     @staticmethod
-    def min(cards):
-        min = math.inf
-        index_of_max = -1
+    def prime(card: int) -> int:
+        return card & 0x3F
+
+    @staticmethod
+    def to_str(card: int) -> str:
+        return f"{Deck.RANKS[Card.rank(card)]}{Card.SUIT_NAMES[Card.suit(card)]}"
 
-        for i, card in enumerate(cards):
-            if(card.value < min):
-                min = card.value
-                index_of_max = i
+    # Same shape the old dataclass serialized to, which the visualizer reads.
+    @staticmethod
+    def to_dict(card: int) -> dict:
+        rank = Card.rank(card)
+        return {"rank": Deck.RANKS[rank], "suit": Card.SUIT_NAMES[Card.suit(card)], "value": rank}
 
-        return cards[index_of_max]
+    @staticmethod
+    def from_dict(card: dict) -> int:
+        return Card.get(f"{card['rank']}{card['suit']}")
 
+    @staticmethod
+    def repr_list(cards) -> str:
+        return f"[{', '.join(Card.to_str(card) for card in cards)}]"
+
+    @staticmethod
+    def min(cards):
+        return min(cards)
 
     @staticmethod
     def min_rank(ranks, n=1):
         if(n == 1):
-            return min(ranks, key = lambda rank: Deck.RANKS.index(rank))
-        return heapq.nsmallest(n, ranks, key = lambda rank: Deck.RANKS.index(rank))
+            return min(ranks)
+        return heapq.nsmallest(n, ranks)
 
     @staticmethod
     def max_rank(ranks, n=1):
         if(n == 1):
-            return max(ranks, key = lambda rank: Deck.RANKS.index(rank))
-        return heapq.nlargest(n, ranks, key = lambda rank: Deck.RANKS.index(rank))
+            return max(ranks)
+        return heapq.nlargest(n, ranks)
 
     @staticmethod
     def max(cards):
-        max = -1
-        index_of_max = -1
-
-        for i, card in enumerate(cards):
-            if(card.value > max):
-                max = card.value
-                index_of_max = i
-
-        return cards[index_of_max]
+        return max(cards)
 
+    # Ranks are ints, so -1 means "no rank yet".
     @staticmethod
     def compare_rank(rank_a, rank_b):
-        if(rank_a == -1):
-            return False
-        elif(rank_b == -1):
-            return True
-        return Deck.RANKS.index(rank_a) > Deck.RANKS.index(rank_b)
+        return rank_a > rank_b
 
     @staticmethod
     def compare(card_a, card_b):
@@ -113,7 +150,11 @@ class Card:
             card_a = max(card_a)
             card_b = max(card_b)
 
-        return card_a.value > card_b.value
+        return Card.rank(card_a) > Card.rank(card_b)
+
+
+Card.TABLE = tuple(Card.encode(rank, Card.SUIT_BITS[suit]) for rank in range(13) for suit in Deck.SUITS)
+Card.INDEX = {f"{rank}{suit}": i for i, (rank, suit) in enumerate((rank, suit) for rank in Deck.RANKS for suit in Deck.SUITS)}
 
 
 class Hand:
@@ -125,7 +166,10 @@ class Hand:
                 'royal flush' \
             ]
 
-    def __init__(self, player, hand_id, cards, quads, threes, pairs, kickers):
+    # Rank bits of A2345, the wheel.
+    WHEEL = 0x100F
+
+    def __init__(self, player, hand_id, cards, quads, threes, pairs, kickers, strength=0):
         self.player = player
         self.hand_id = hand_id
         self.cards = cards
@@ -133,24 +177,24 @@ class Hand:
         self.threes = threes
         self.pairs = pairs
         self.kickers = kickers
+        # From evaluator.evaluate; higher always wins.
+        self.strength = strength
+        # (category, ranks of the five cards in order of significance). Orders hands exactly like strength:
+        # groups come before kickers, and straights run from their high card, so the wheel leads with its five.
+        self.key = (Hand.HANDS.index(hand_id) if hand_id else -1, *Hand.sequence_key(cards))
 
     def __str__(self):
-        return f"{self.player} {self.cards} {self.hand_id}\n"
-    
-    __repr__ = __str__
-
+        return f"{self.player} {Card.repr_list(self.cards)} {self.hand_id}\n"
 
-    @staticmethod
-    def max(cards):
-        return Hand.make_consecutive(cards)[-1]
+    __repr__ = __str__
 
     @staticmethod
     def sorted(ranks):
-        return sorted(ranks, key = lambda rank: Deck.RANKS.index(rank))
+        return sorted(ranks)
 
     @staticmethod
     def make_consecutive(cards, reversed=False):
-        return sorted(cards, key = lambda card: Deck.RANKS.index(card.rank), reverse=reversed)
+        return sorted(cards, reverse=reversed)
 
     # Accepts five and only five cards
     @staticmethod
@@ -161,45 +205,46 @@ class Hand:
         elif(len(cards) < 5):
             return False
 
-        joined = "".join(Deck.RANKS)
-        ordered = "".join(str(card.rank) for card in Hand.make_consecutive(cards))
-        return (ordered in joined) or (ordered == "2345A") # The wheel edge case
+        return Hand.get_straight_high(Hand.rank_mask(cards)) != -1
 
     @staticmethod
-    def get_highest_straight_index(cards):
-        if (len(cards) < 5):
-            return 0 if Hand.is_straight(cards) else -1
-
-        # Remove duplicates
-        uniqued = []
-        seen = set()
+    def rank_mask(cards):
+        mask = 0
         for card in cards:
-            if(card.rank not in seen):
-                uniqued.append(card)
-                seen.add(card.rank)
+            mask |= card >> 16
+        return mask
 
-        index_of_highest_straight = -1
-        for i in range(len(uniqued) - 4):
-            if(Hand.is_straight(uniqued[i:5+i])):
-                index_of_highest_straight = i
-        return index_of_highest_straight
+    # Rank of the highest card of the best straight in a 13-bit rank mask, or -1.
+    # The wheel is five-high, i.e. rank 3.
+    @staticmethod
+    def get_straight_high(mask):
+        for high in range(12, 3, -1):
+            window = 0x1F << (high - 4)
+            if(mask & window == window):
+                return high
+        if(mask & Hand.WHEEL == Hand.WHEEL):
+            return 3
+        return -1
+
+    # One card per rank, from the straight's high card down (5432A for the wheel).
+    @staticmethod
+    def straight_cards(cards, high):
+        by_rank = {}
+        for card in cards:
+            by_rank.setdefault(Card.rank(card), card)
+        ranks = [high - i for i in range(5)]
+        if(high == 3):
+            ranks[-1] = 12
+        return [by_rank[rank] for rank in ranks]
 
     @staticmethod
     def get_max_same_suit(cards):
-        suit_count = {}
         cards_of_that_suit = {}
 
         for card in cards:
-            suit = card.suit
-            if suit in suit_count:
-                suit_count[suit] += 1
-                cards_of_that_suit[suit] = cards_of_that_suit[suit] + [card]
-            else:
-                suit_count[suit] = 1
-                cards_of_that_suit[suit] = [card]
+            cards_of_that_suit.setdefault(Card.suit(card), []).append(card)
 
-        max_key = max(suit_count, key=suit_count.get)
-        return cards_of_that_suit[max_key]
+        return max(cards_of_that_suit.values(), key=len)
 
     @staticmethod
     def count(cards):
@@ -217,12 +262,12 @@ class Hand:
             return cards
 
         if len(cards) == 1:
-            return cards[0]
+            return cards[0] if n == 1 else list(cards)
 
         if(n == 1):
-            return max(cards, key = lambda card: Deck.RANKS.index(card.rank))
+            return max(cards)
 
-        return heapq.nlargest(n, cards, key = lambda card: Deck.RANKS.index(card.rank))
+        return heapq.nlargest(n, cards)
 
     @staticmethod
     def filter_by_highest(hands, getter):
@@ -232,139 +277,63 @@ class Hand:
                 highest_rank = getter(hand)
         return [hand for hand in hands if getter(hand) == highest_rank]
 
+    # The ranks of a card sequence as one comparable tuple.
+    @staticmethod
+    def sequence_key(cards):
+        return tuple(Card.rank(card) for card in cards)
+
+    # Every hand in hands whose key is highest. Nothing is copied; ties come back together.
+    @staticmethod
+    def filter_by_key(hands, key):
+        if(len(hands) < 2):
+            return list(hands)
+        keys = [key(hand) for hand in hands]
+        best = max(keys)
+        return [hand for hand, hand_key in zip(hands, keys) if hand_key == best]
+
     # For things like kickers, where
     # AKQ522
     # AKQ622
     # The first three highest cards are tied, and the kicker is down the line.
     @staticmethod
     def compare_sequence(hands, getter):
-        candidates = copy.deepcopy(hands)
+        return Hand.filter_by_key(hands, lambda h: Hand.sequence_key(getter(h)))
 
-        if(len(candidates) < 2):
-            return candidates
-        sequence_length = len(getter(candidates[0]))
+    @staticmethod
+    def compare_kickers(hands):
+        return Hand.filter_by_key(hands, lambda h: Hand.sequence_key(h.kickers))
 
-        # Sanity check
-        for hand in candidates:
-            if(len(getter(hand)) != sequence_length):
-                print("Warning. Same hands have sequences of different lengths.")
-                print(f"{getter(candidates[0])} vs {getter(hand)}")
-                exit()
-        
-        index = 0
-        while (len(candidates) > 1) and (index <= sequence_length - 1):
-            candidates = Hand.filter_by_highest(candidates, lambda h: getter(h)[index].rank)
-            index += 1
+    # Best hands by their precomputed keys, across any mix of categories.
+    @staticmethod
+    def compare(hands):
+        return Hand.filter_by_key(hands, lambda h: h.key)
 
-        return candidates
+    # Strength of the best hand in 5 to 7 cards; higher always wins.
+    @staticmethod
+    def evaluate(cards) -> int:
+        return evaluator.evaluate(cards)
 
+    # Showdown is a max over evaluator strengths; only the winners get fully classified.
+    @staticmethod
+    def find_winners(players: list[Player], community_cards: list[int]) -> list['Hand']:
+        strengths = [Hand.evaluate((*player.hole_cards, *community_cards)) for player in players]
+        best = max(strengths)
 
+        return [Hand.classify([*player.hole_cards, *community_cards], player) \
+            for player, strength in zip(players, strengths) if strength == best]
 
-    @staticmethod
-    def compare_kickers(hands):
-        if(len(hands) < 2):
-            return hands[0]
-        kicker_length = len(hands[0].kickers)
 
-        # Sanity check
-        for hand in hands:
-            if(len(hand.kickers) != kicker_length):
-                print("Warning. Same hands have kickers of different lengths.")
-                print(f"{hands[0].kickers} vs {hand.kickers}")
-                exit()
-        
-        candidates = copy.deepcopy(hands)
-        
-        while (len(candidates) > 1) and (kicker_length > 0):
-            candidates = Hand.filter_by_highest(candidates, lambda h: h.kickers[0].rank)
-        return candidates
-
-    @staticmethod
-    def find_winners(players: list[Player], community_cards: list[str]) -> list['Hand']:
-        hands = {}
-        
-        for player in players:
-            hole_cards = player.hole_cards
-            if(type(hole_cards) == tuple):
-                hole_cards = list(hole_cards)
-
-            hand = Hand.classify(hole_cards + community_cards, player)
-
-            hands.setdefault(hand.hand_id, []).append(hand)
-        
-        max_value_hand = max(hands.keys(), key = lambda hand: Hand.HANDS.index(hand))
-
-        winning_hands = hands[max_value_hand]
-        
-        # One winner
-        if(len(winning_hands) == 1):
-            return winning_hands
-    
-        # Tiebreakers
-
-        # Royal flush over royal flush is always a chop.
-        if(max_value_hand == 'royal flush'):
-            return winning_hands
-        # Hands where the highest card wins
-        elif max_value_hand == 'flush' or \
-             max_value_hand == 'high card':
-            tie_breaker_winners = Hand.compare_sequence(winning_hands, lambda h: h.cards)
-            return tie_breaker_winners
-        
-        # Hands with the wheel edge case (Highest low card wins, compare ace existing when 2 found)
-        elif max_value_hand == 'straight flush' or \
-             max_value_hand == 'straight':
-            lowest_card = {}
-            for hand in winning_hands:
-                lowest_card.setdefault(Card.min(hand.cards).rank, []).append(hand)
-            highest_low_card = Card.max_rank(list(lowest_card.keys()))
-
-            # Wheel edge case
-            if(highest_low_card == 2):
-                beats_wheels = []
-                for hand in lowest_card[2]:
-                    ranks = [card.rank for card in hand.cards]
-                    if 'A' in ranks:
-                        continue
-                    beats_wheels.append(hand)
-                if(len(beats_wheels) != 0):
-                    return beats_wheels
-            
-            return lowest_card[highest_low_card]
-        
-        elif max_value_hand == 'four of a kind':
-            # Compare the quad
-            highest_quads = Hand.filter_by_highest(winning_hands, lambda h: h.quads.rank)
-            # Compare the kicker
-            highest_kicker = Hand.compare_sequence(highest_quads, lambda h: h.kickers)
-            return highest_kicker
-        elif max_value_hand == 'full house':
-            # Compare the three-of-a-kind
-            highest_three = Hand.filter_by_highest(winning_hands, lambda h: h.threes.rank)
-            # Compare the pair
-            highest_pair = Hand.filter_by_highest(highest_three, lambda h: Card.max_rank(list(h.pairs.keys())))
-            return highest_pair    
-        elif max_value_hand == 'three of a kind':
-            # Compare the three
-            highest_three = Hand.filter_by_highest(winning_hands, lambda h: h.threes.rank)
-            # Compare the kickers
-            highest_kicker = Hand.compare_sequence(highest_three, lambda h: h.kickers)
-            return highest_kicker
-        elif max_value_hand == 'two pair':
-            # Compare the top pair:
-            highest_pair = Hand.filter_by_highest(winning_hands, lambda h: Card.max_rank(list(h.pairs.keys())))
-            # Compare the bottom pair:
-            highest_bottom_pair = Hand.filter_by_highest(highest_pair, lambda h: Card.min_rank(list(h.pairs.keys())))
-            # Compare the kicker:
-            highest_kicker = Hand.compare_sequence(highest_bottom_pair, lambda h: h.kickers)
-            return highest_kicker
-        elif max_value_hand == 'one pair':
-            # Compare the pair:
-            highest_pair = Hand.filter_by_highest(winning_hands, lambda h: h.pairs[0][0].rank)
-            # Compare the kickers:
-            highest_kicker = Hand.compare_sequence(highest_pair, lambda h: h.kickers)
-            return highest_kicker
+    # Every player's strength by player_id, so several pots can be resolved from one scoring.
+    @staticmethod
+    def score_players(players: list[Player], community_cards: list[int]) -> dict[int, int]:
+        return {player.player_id: Hand.evaluate((*player.hole_cards, *community_cards)) for player in players}
 
+    # Batched classification for offline analysis: an (N, 5..7) int array of cards in,
+    # (N,) strengths and (N,) indices into Hand.HANDS out. Same tables as find_winners,
+    # so equal strengths are exactly the chops find_winners would report.
+    @staticmethod
+    def evaluate_batch(cards):
+        return evaluator.evaluate_batch(cards)
 
     @staticmethod
     def flatten_pairs(pairs):
@@ -372,137 +341,107 @@ class Hand:
         flattened_cards = [card for pair in list_of_lists for card in pair]
         return flattened_cards
 
-    # It's gonna be sets of seven cards needing classification; 
+    # It's gonna be sets of seven cards needing classification;
     # the five community cards and the two hole cards.
     # Return the five effective cards (i.e. what constitutes the hand) as well as the hand name.
+    # Results can be cached by the sorted cards, so classifying the same cards again, as replays and
+    # analysis do, returns the stored hand instead of grouping them again.
     @staticmethod
     def classify(cards, player=None):
-        ordered = Hand.make_consecutive(cards)
-        suitless = [card.rank for card in ordered]
+        if evaluator.cache.maxsize <= 0:
+            return Hand.classify_uncached(cards, player)
+
+        key = tuple(sorted(cards))
+        hand = evaluator.cache.get(key)
+        if hand is None:
+            hand = Hand.classify_uncached(cards)
+            evaluator.cache.put(key, hand)
+        if player is None:
+            return hand
+        # Hands are read-only once built, so another player's copy shares the card lists.
+        hand = copy.copy(hand)
+        hand.player = player
+        return hand
+
+    # The evaluator decides the hand; the grouping below only picks out its five cards.
+    @staticmethod
+    def classify_uncached(cards, player=None):
+        strength = evaluator.evaluate(cards)
+        hand_id = Hand.HANDS[evaluator.category(strength)]
 
-        count = Hand.count(suitless)
+        # Highest rank first, so every grouping below comes out already ordered.
+        ordered = Hand.make_consecutive(cards, reversed=True)
 
-        quadded_ranks = [key for key, value in count.items() if value == 4] 
-        threed_ranks = [key for key, value in count.items() if value == 3]
-        paired_ranks = [key for key, value in count.items() if value == 2]
-        # Since "three pair" isn't a hand, only the top two pairs matter; 
-        # the third pair's rank could serve as a kicker, though.
-        """
-            BOARD: KKQT3
-            Person A:  Q T
-            Person B:  Q 3
-        """
-        paired_ranks = Card.max_rank(paired_ranks, 2)
+        by_rank = {}
+        for card in ordered:
+            by_rank.setdefault(Card.rank(card), []).append(card)
+
+        quadded_ranks = [rank for rank, group in by_rank.items() if len(group) == 4]
+        threed_ranks = [rank for rank, group in by_rank.items() if len(group) == 3]
+        paired_ranks = [rank for rank, group in by_rank.items() if len(group) == 2]
 
         quads = None
         threes = None
         pairs = None
-        max_pair_rank = -1
+        kickers = []
 
     # Quads: will always have 1
         if(len(quadded_ranks) == 1):
-            quads = SameRank('quads', 4, quadded_ranks[0], [])
+            quads = SameRank('quads', 4, quadded_ranks[0], by_rank[quadded_ranks[0]])
         elif(len(quadded_ranks) > 1):
-            print(f"WARNING. {quadded_ranks} detected an impossible number of quads in {ordered}.")
+            print(f"WARNING. {quadded_ranks} detected an impossible number of quads in {Card.repr_list(ordered)}.")
             exit()
     # Threes: will have 1 or 2
-        if(len(threed_ranks) == 1):
-            max_three = max(threed_ranks)
-            threes = SameRank('threes', 3, max_three, [])
-        elif(len(threed_ranks) == 2):
+        if(len(threed_ranks) > 0):
+            threes = SameRank('threes', 3, threed_ranks[0], by_rank[threed_ranks[0]])
+        if(len(threed_ranks) == 2):
             # Treat the lower one as a pair
-            paired_ranks.append(min(threed_ranks))
+            paired_ranks = Hand.make_consecutive(paired_ranks + [threed_ranks[1]], reversed=True)
         elif(len(threed_ranks) > 2):
-            print(f"WARNING. {threed_ranks} detected an impossible number of threes in {ordered}.")
+            print(f"WARNING. {threed_ranks} detected an impossible number of threes in {Card.repr_list(ordered)}.")
             exit()
     # Pairs: could have 1, 2, or 3
+        # Since "three pair" isn't a hand, only the top two pairs matter;
+        # the third pair's rank could serve as a kicker, though.
+        """
+            BOARD: KKQT3
+            Person A:  Q T
+            Person B:  Q 3
+        """
         if(len(paired_ranks) > 0):
             pairs = {}
-            # Prune to the highest 2
-            paired_ranks = Card.max_rank(paired_ranks, 2)
-            for pair in paired_ranks:
-                pairs[pair] = SameRank('pairs', 2, pair, [])
-
-            max_pair_rank = Card.max_rank(list(pairs.keys()))
+            for rank in paired_ranks[:2]:
+                pairs[rank] = SameRank('pairs', 2, rank, by_rank[rank][:2])
 
-        kicker_candidates = []
-        hand_id = ''
-        final_hand = []
-        kickers = []
+        def kicker_candidates(*used_ranks):
+            return [card for card in ordered if Card.rank(card) not in used_ranks]
 
-        for card in ordered:
-            if(quads is not None and card.rank == quads.rank):
-                quads.constituents.append(card)
-            elif (threes is not None and card.rank == threes.rank):
-                threes.constituents.append(card)
-            elif pairs is not None and card.rank in pairs:
-                pairs[card.rank].constituents.append(card)
-            else:
-                kicker_candidates.append(card)
-
-        # Detect flush
-        is_flush = False
         max_same_suit = Hand.get_max_same_suit(ordered)
-        if(len(max_same_suit) >= 5):
-            is_flush = True
-
-        # Detect any straight
-        pruned = ordered
-        straight_index = Hand.get_highest_straight_index(pruned)
-        has_straight = False
-        if(straight_index != -1):
-            pruned = cards[straight_index:straight_index + 5]
-            has_straight = True
-
-        # Classify
-        max_straight_flush_index = Hand.get_highest_straight_index(max_same_suit)
-
-        if(is_flush and max_straight_flush_index != -1):
-            if(''.join([card.rank for card in max_same_suit[max_straight_flush_index:]]) == 'TJQKA'):
-                hand_id = 'royal flush'
-            hand_id = 'straight flush'
-            final_hand = max_same_suit[max_straight_flush_index:max_straight_flush_index + 5]
-        elif quads is not None:
-            hand_id = 'four of a kind'
-            kickers.append(Hand.max([card for card in ordered if card.rank != quads.rank]))
+
+        if hand_id == 'royal flush' or hand_id == 'straight flush':
+            final_hand = Hand.straight_cards(max_same_suit, Hand.get_straight_high(Hand.rank_mask(max_same_suit)))
+        elif hand_id == 'four of a kind':
+            kickers = kicker_candidates(quads.rank)[:1]
             final_hand = quads.constituents + kickers
-        elif ((threes is not None) and (pairs is not None)):
-            hand_id = 'full house'
-            final_hand = threes.constituents + pairs[max_pair_rank].constituents
-        elif is_flush:
-            hand_id = 'flush'
-            max_same_suit = Hand.make_consecutive(max_same_suit)
-            start_index = max(len(max_same_suit) - 5, 0)
-            final_hand = max_same_suit[start_index:start_index + 5]
-        elif has_straight:
-            hand_id = 'straight'
-            final_hand = pruned
-        elif len(threed_ranks) == 1:
-            hand_id = 'three of a kind'
-            kickers = Hand.max(kicker_candidates, 2)
+        elif hand_id == 'full house':
+            top_pair = next(iter(pairs.values()))
+            pairs = {top_pair.rank: top_pair}
+            final_hand = threes.constituents + top_pair.constituents
+        elif hand_id == 'flush':
+            final_hand = max_same_suit[:5]
+        elif hand_id == 'straight':
+            final_hand = Hand.straight_cards(ordered, Hand.get_straight_high(Hand.rank_mask(ordered)))
+        elif hand_id == 'three of a kind':
+            kickers = kicker_candidates(threes.rank)[:2]
             final_hand = threes.constituents + kickers
-        elif len(paired_ranks) == 2:
-            hand_id = 'two pair'
-            kickers.append(Hand.max(kicker_candidates))
-            
-            flattened_cards = Hand.flatten_pairs(pairs)
-
-            final_hand = flattened_cards + kickers
-
-        elif len(paired_ranks) == 1:
-            hand_id = 'one pair'
-            kickers = Hand.max(kicker_candidates, 3)
-
-            values = [*list(pairs.values())]
-            pairs = [item.constituents for item in values]
-
-            flattened_cards = [card for pair in pairs for card in pair]
-            final_hand = flattened_cards + kickers
+        elif hand_id == 'two pair':
+            kickers = kicker_candidates(*pairs.keys())[:1]
+            final_hand = Hand.flatten_pairs(pairs) + kickers
+        elif hand_id == 'one pair':
+            kickers = kicker_candidates(*pairs.keys())[:3]
+            final_hand = Hand.flatten_pairs(pairs) + kickers
         else:
-            hand_id = 'high card'
-            kickers = Hand.max(kicker_candidates, 5)
+            kickers = ordered[:5]
             final_hand = kickers
 
-
-        return Hand(player, hand_id, final_hand, quads, threes, pairs, kickers)
-    
\ No newline at end of file
+        return Hand(player, hand_id, final_hand, quads, threes, pairs, kickers, strength)
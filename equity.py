@@ -0,0 +1,164 @@
+import itertools
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+import evaluator
+from deck import Deck, Hand, Card
+
+@dataclass(frozen=True)
+class Equity:
+    win: float
+    tie: float
+    lose: float
+    # Wins plus each tie's share of the pot, i.e. the fraction of the pot this hand is worth.
+    equity: float
+    samples: int
+
+_pools = {}
+
+def get_pool(processes: int) -> ProcessPoolExecutor:
+    # Pools are kept for the life of the process; spinning one up per decision would cost more than it saves.
+    if processes not in _pools:
+        # Loaded before the fork, so workers inherit the mapping instead of each building the tables.
+        if evaluator._tables is None:
+            evaluator.load_tables()
+        _pools[processes] = ProcessPoolExecutor(max_workers=processes)
+    return _pools[processes]
+
+# One independent seed per worker, so a (seed, processes) pair always reproduces the same result.
+def spawn_seeds(seed: int | None, count: int) -> list[int]:
+    children = np.random.SeedSequence(seed).spawn(count)
+    return [int.from_bytes(child.generate_state(4).tobytes(), 'little') for child in children]
+
+def sample_outcomes(hole_cards, community_cards, known_hands, unknown_opponents, samples, seed):
+    rng = random.Random(seed)
+
+    dead = set(hole_cards).union(community_cards).union(*[set(hand) for hand in known_hands])
+    deck = [card for card in Deck.generate_deck() if card not in dead]
+
+    board_needed = 5 - len(community_cards)
+    needed = board_needed + 2 * unknown_opponents
+
+    hole_cards = tuple(hole_cards)
+    community_cards = tuple(community_cards)
+    known_hands = [tuple(hand) for hand in known_hands]
+
+    wins = 0
+    ties = 0
+    share = 0.0
+    for _ in range(samples):
+        drawn = rng.sample(deck, needed)
+        board = community_cards + tuple(drawn[:board_needed])
+
+        hero = Hand.evaluate(hole_cards + board)
+        villains = [Hand.evaluate(hand + board) for hand in known_hands]
+        villains += [Hand.evaluate((drawn[i], drawn[i + 1]) + board) for i in range(board_needed, needed, 2)]
+        best_villain = max(villains)
+
+        if hero > best_villain:
+            wins += 1
+            share += 1
+        elif hero == best_villain:
+            ties += 1
+            share += 1 / (1 + villains.count(hero))
+
+    return wins, ties, share
+
+# Estimate how often hole_cards win, tie or lose by sampling runouts.
+# opponents is either a count of opponents with unknown cards, or a list of their known hole cards.
+# With processes > 1 the sample budget is split across a process pool, one seeded stream per worker.
+def estimate_equity(hole_cards, community_cards, opponents=1, samples=10000, seed=None, processes=1) -> Equity:
+    known_hands = [] if isinstance(opponents, int) else list(opponents)
+    unknown_opponents = opponents if isinstance(opponents, int) else 0
+
+    if len(known_hands) + unknown_opponents == 0:
+        return Equity(win=1, tie=0, lose=0, equity=1, samples=0)
+
+    processes = max(1, min(processes, samples))
+    seeds = spawn_seeds(seed, processes)
+    budgets = [samples // processes + (1 if i < samples % processes else 0) for i in range(processes)]
+    args = [(tuple(hole_cards), tuple(community_cards), known_hands, unknown_opponents, budget, worker_seed) \
+        for budget, worker_seed in zip(budgets, seeds)]
+
+    if processes == 1:
+        results = [sample_outcomes(*args[0])]
+    else:
+        futures = [get_pool(processes).submit(sample_outcomes, *worker_args) for worker_args in args]
+        results = [future.result() for future in futures]
+
+    wins = sum(result[0] for result in results)
+    ties = sum(result[1] for result in results)
+    share = sum(result[2] for result in results)
+
+    return Equity(
+        win=wins / samples,
+        tie=ties / samples,
+        lose=(samples - wins - ties) / samples,
+        equity=share / samples,
+        samples=samples
+    )
+
+# Runouts that only differ by swapping suits nobody holds are the same runout.
+# Each such suit is described by the ranks it contributes; sorting those descriptions
+# makes the key identical for every relabelling of the free suits.
+def canonical_runout(runout, free_suits, free_mask):
+    fixed = tuple(card for card in runout if not Card.suit(card) & free_mask)
+    signatures = sorted(tuple(Card.rank(card) for card in runout if Card.suit(card) == suit) for suit in free_suits)
+    return fixed, tuple(signatures)
+
+# Exact equity for each of hands over every remaining board, e.g. for all-in runouts.
+# Boards that are suit-isomorphic given the known cards are evaluated once and weighted.
+def enumerate_equity(hands, community_cards) -> list[Equity]:
+    hands = [tuple(hand) for hand in hands]
+    community_cards = tuple(community_cards)
+
+    known = set(community_cards).union(*[set(hand) for hand in hands])
+    deck = [card for card in Deck.generate_deck() if card not in known]
+
+    used_mask = 0
+    for card in known:
+        used_mask |= Card.suit(card)
+    free_suits = [suit for suit in Card.SUIT_NAMES if not used_mask & suit]
+    free_mask = 0xF & ~used_mask
+
+    runouts = {}
+    for runout in itertools.combinations(deck, 5 - len(community_cards)):
+        key = canonical_runout(runout, free_suits, free_mask) if len(free_suits) > 1 else runout
+        entry = runouts.get(key)
+        if entry is None:
+            runouts[key] = [1, runout]
+        else:
+            entry[0] += 1
+
+    weights = np.array([entry[0] for entry in runouts.values()], dtype=np.float64)
+    boards = np.array([community_cards + entry[1] for entry in runouts.values()], dtype=np.int64)
+    holes = np.array(hands, dtype=np.int64)
+
+    board_count = len(boards)
+    player_count = len(hands)
+    cards = np.concatenate([
+        np.broadcast_to(holes[None, :, :], (board_count, player_count, 2)),
+        np.broadcast_to(boards[:, None, :], (board_count, player_count, 5))
+    ], axis=2).reshape(-1, 7)
+
+    strengths, _ = Hand.evaluate_batch(cards)
+    strengths = strengths.reshape(board_count, player_count)
+
+    is_best = strengths == strengths.max(axis=1, keepdims=True)
+    tied = is_best.sum(axis=1)
+
+    total = weights.sum()
+    wins = (is_best & (tied == 1)[:, None]).T @ weights
+    ties = (is_best & (tied > 1)[:, None]).T @ weights
+    shares = (is_best / tied[:, None]).T @ weights
+
+    return [Equity(
+        win=float(wins[i] / total),
+        tie=float(ties[i] / total),
+        lose=float((total - wins[i] - ties[i]) / total),
+        equity=float(shares[i] / total),
+        samples=int(total)
+    ) for i in range(player_count)]
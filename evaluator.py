@@ -0,0 +1,380 @@
+import bisect
+import itertools
+from collections import OrderedDict
+import mmap
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from utils import write_atomic
+
+# Table-driven hand evaluator.
+#
+# Any set of 5 to 7 int-encoded cards (see deck.Card) maps to a single strength in 1..7462,
+# one per distinct five-card hand, where higher always wins. Showdown is then a max over ints.
+#
+# Two tables do all the work:
+#   - FLUSH, indexed by the 13-bit rank mask of the flush suit's cards.
+#     A seven-card flush can never also hold quads or a full house, so the flush suit decides.
+#   - Everything else, keyed by the product of the cards' rank primes (unique per rank multiset),
+#     stored as sorted keys with a parallel array of strengths and looked up by bisection.
+#
+# The tables are generated once, written to TABLES_PATH and memory-mapped on every later load.
+
+TABLES_PATH = Path(__file__).parent / 'tables' / 'evaluator.bin'
+MAGIC = b'MPEV'
+VERSION = 1
+HEADER = struct.Struct('<4sII4x')
+
+# Lowest strength of each category, in Hand.HANDS order.
+CATEGORY_FLOORS = [1, 1278, 4138, 4996, 5854, 5864, 7141, 7297, 7453, 7462]
+MAX_STRENGTH = 7462
+
+# Counts cards per suit in one int, a nibble per suit. Indexed by the card's suit bit.
+SUIT_COUNTERS = (0, 1, 1 << 4, 0, 1 << 8, 0, 0, 0, 1 << 12)
+# Adding 3 to every nibble sets its high bit exactly when that suit has 5 or more cards.
+FLUSH_CHECK = 0x3333
+FLUSH_FLAGS = 0x8888
+
+_tables = None
+
+class Tables:
+    def __init__(self, buffer, key_count):
+        self.buffer = buffer
+        self.key_count = key_count
+
+        view = memoryview(buffer)
+        keys_end = HEADER.size + 8 * key_count
+        flush_end = keys_end + 2 * 8192
+        self.keys = view[HEADER.size:keys_end].cast('Q')
+        self.flush = view[keys_end:flush_end].cast('H')
+        self.values = view[flush_end:flush_end + 2 * key_count].cast('H')
+
+        # The same memory as NumPy arrays, for evaluate_batch.
+        self.key_array = np.frombuffer(buffer, dtype='<u8', count=key_count, offset=HEADER.size)
+        self.flush_array = np.frombuffer(buffer, dtype='<u2', count=8192, offset=keys_end)
+        self.value_array = np.frombuffer(buffer, dtype='<u2', count=key_count, offset=flush_end)
+
+def category(strength: int) -> int:
+    return bisect.bisect_right(CATEGORY_FLOORS, strength) - 1
+
+def evaluate(cards) -> int:
+    tables = _tables if _tables is not None else load_tables()
+
+    product = 1
+    suit_counts = 0
+    for card in cards:
+        product *= card & 0xFF
+        suit_counts += SUIT_COUNTERS[(card >> 12) & 0xF]
+
+    flushed = (suit_counts + FLUSH_CHECK) & FLUSH_FLAGS
+    if flushed:
+        suit = 1 << ((flushed.bit_length() - 4) // 4)
+        mask = 0
+        for card in cards:
+            if (card >> 12) & suit:
+                mask |= card >> 16
+        return tables.flush[mask]
+
+    return tables.values[bisect.bisect_left(tables.keys, product)]
+
+# Bounded LRU keyed by the sorted cards, with counters for tuning maxsize.
+class EvaluationCache:
+    def __init__(self, maxsize: int = 1 << 14):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def resize(self, maxsize: int):
+        self.maxsize = maxsize
+        while len(self.entries) > max(maxsize, 0):
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+# In front of Hand.classify, which does the expensive grouping on top of evaluate. Off until resized:
+# random deals almost never repeat, so the bookkeeping on every miss costs more than the rare hit saves.
+# It pays where the same cards come back, as in replays and analysis (see benchmark_classify).
+cache = EvaluationCache(maxsize=0)
+
+# One player's cards as they come in over the streets: built once on the flop,
+# then every turn or river card updates the running counts in O(1) instead of
+# re-evaluating all the cards from scratch. The first hole_count cards are the player's own.
+class HandState:
+    __slots__ = ('cards', 'product', 'suit_counts', 'suit_masks', 'rank_mask', 'board_rank_mask', 'hole_suit_flags')
+
+    def __init__(self, cards=(), hole_count=2):
+        self.cards = []
+        self.product = 1
+        # Nibble per suit, as in evaluate.
+        self.suit_counts = 0
+        # Rank mask per suit, indexed by suit bit.
+        self.suit_masks = [0] * 9
+        self.rank_mask = 0
+        # Ranks on the board alone.
+        self.board_rank_mask = 0
+        # The FLUSH_FLAGS bit of each suit among the hole cards.
+        self.hole_suit_flags = 0
+        for index, card in enumerate(cards):
+            self.add(card, hole=index < hole_count)
+
+    def add(self, card: int, hole=False):
+        self.cards.append(card)
+        self.product *= card & 0xFF
+        suit = (card >> 12) & 0xF
+        self.suit_counts += SUIT_COUNTERS[suit]
+        self.suit_masks[suit] |= card >> 16
+        self.rank_mask |= card >> 16
+        if hole:
+            self.hole_suit_flags |= SUIT_COUNTERS[suit] << 3
+        else:
+            self.board_rank_mask |= card >> 16
+
+    # Same value evaluate(self.cards) would give; needs at least 5 cards.
+    def strength(self) -> int:
+        tables = _tables if _tables is not None else load_tables()
+
+        flushed = (self.suit_counts + FLUSH_CHECK) & FLUSH_FLAGS
+        if flushed:
+            return tables.flush[self.suit_masks[1 << ((flushed.bit_length() - 4) // 4)]]
+        return tables.values[bisect.bisect_left(tables.keys, self.product)]
+
+    def category(self) -> int:
+        return category(self.strength())
+
+    # Ranks that would complete a straight this hand doesn't already have. As with flushes, only
+    # those the hole cards help with: a rank making the same straight on the board alone is everyone's.
+    def straight_outs(self) -> list[int]:
+        if rank_straight_high(self.rank_mask) != -1:
+            return []
+        return [rank for rank in range(13) if not self.rank_mask & (1 << rank) \
+            and rank_straight_high(self.rank_mask | (1 << rank)) > rank_straight_high(self.board_rank_mask | (1 << rank))]
+
+    # Draws still live with cards to come, by name.
+    def draws(self) -> list[str]:
+        if len(self.cards) >= 7:
+            return []
+
+        draws = []
+        suits_at_four = (self.suit_counts + 0x4444) & FLUSH_FLAGS
+        suits_flushed = (self.suit_counts + FLUSH_CHECK) & FLUSH_FLAGS
+        # Four to a flush all on the board is everyone's draw, not this player's.
+        if suits_at_four & self.hole_suit_flags and not suits_flushed:
+            draws.append('flush draw')
+
+        outs = self.straight_outs()
+        if len(outs) > 1:
+            draws.append('open-ended straight draw' if is_open_ended(self.rank_mask, outs) else 'double gutshot straight draw')
+        elif outs:
+            draws.append('gutshot straight draw')
+        return draws
+
+# Four ranks in a row with a straight card at both ends. Two outs filling two gaps
+# (5 7 8 9 J) are a double gutshot instead, for the same eight cards.
+def is_open_ended(rank_mask: int, outs: list[int]) -> bool:
+    # Shifted up one, so bit 0 can hold the ace playing low.
+    held = (rank_mask << 1) | ((rank_mask >> 12) & 1)
+    out_mask = 0
+    for rank in outs:
+        out_mask |= 1 << (rank + 1)
+        if rank == 12:
+            out_mask |= 1
+    for below in range(9):
+        run = 0xF << (below + 1)
+        if held & run == run and out_mask >> below & 1 and out_mask >> (below + 5) & 1:
+            return True
+    return False
+
+# Vectorized evaluate over an (N, 5..7) array of int-encoded cards.
+# Returns (strengths, categories), both (N,), with categories indexing Hand.HANDS.
+def evaluate_batch(cards):
+    tables = _tables if _tables is not None else load_tables()
+
+    cards = np.asarray(cards, dtype=np.int64)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError(f"Expected an (N, 5..7) array of cards, got shape {cards.shape}.")
+
+    products = np.prod((cards & 0xFF).astype(np.uint64), axis=1)
+    indices = np.searchsorted(tables.key_array, products)
+    strengths = tables.value_array[np.minimum(indices, tables.key_count - 1)].astype(np.int32)
+
+    suits = (cards >> 12) & 0xF
+    rank_bits = cards >> 16
+    for suit in (1, 2, 4, 8):
+        in_suit = suits == suit
+        flushed = np.count_nonzero(in_suit, axis=1) >= 5
+        if not flushed.any():
+            continue
+        masks = np.bitwise_or.reduce(np.where(in_suit[flushed], rank_bits[flushed], 0), axis=1)
+        strengths[flushed] = tables.flush_array[masks]
+
+    categories = np.searchsorted(CATEGORY_FLOORS, strengths, side='right') - 1
+    return strengths, categories
+
+def load_tables(path: Path = TABLES_PATH) -> Tables:
+    global _tables
+
+    if not path.exists():
+        generate_tables(path)
+
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, key_count = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        buffer.close()
+        generate_tables(path)
+        return load_tables(path)
+
+    _tables = Tables(buffer, key_count)
+    return _tables
+
+
+"""Table generation"""
+
+def rank_straight_high(mask: int) -> int:
+    for high in range(12, 3, -1):
+        window = 0x1F << (high - 4)
+        if mask & window == window:
+            return high
+    if mask & 0x100F == 0x100F:
+        return 3
+    return -1
+
+# Every distinct five-card hand as (category, tie-breaking ranks), weakest first.
+def five_card_classes():
+    classes = []
+    straights = set(tuple(range(high, high - 5, -1)) for high in range(12, 3, -1))
+    straights.add((12, 3, 2, 1, 0))
+
+    def distinct(n, exclude=()):
+        ranks = [rank for rank in range(13) if rank not in exclude]
+        return sorted(tuple(reversed(combo)) for combo in itertools.combinations(ranks, n))
+
+    no_straight = [ranks for ranks in distinct(5) if ranks not in straights]
+
+    classes += [(0, ranks) for ranks in no_straight]
+    for pair in range(13):
+        classes += [(1, (pair,) + kickers) for kickers in distinct(3, (pair,))]
+    for high, low in sorted((high, low) for high in range(13) for low in range(high)):
+        classes += [(2, (high, low) + kicker) for kicker in distinct(1, (high, low))]
+    for three in range(13):
+        classes += [(3, (three,) + kickers) for kickers in distinct(2, (three,))]
+    classes += [(4, (high,)) for high in range(3, 13)]
+    classes += [(5, ranks) for ranks in no_straight]
+    classes += [(6, (three, pair)) for three in range(13) for pair in range(13) if pair != three]
+    classes += [(7, (four, kicker)) for four in range(13) for kicker in range(13) if kicker != four]
+    classes += [(8, (high,)) for high in range(3, 12)]
+    classes += [(9, (12,))]
+
+    return sorted(classes, key=lambda c: (c[0], c[1]))
+
+# Best non-flush hand in a multiset of 5 to 7 ranks, given as counts per rank.
+def best_unsuited(counts):
+    present = [rank for rank in range(12, -1, -1) if counts[rank] > 0]
+    by_count = {n: [rank for rank in present if counts[rank] == n] for n in (4, 3, 2)}
+
+    def others(*used):
+        return tuple(rank for rank in present if rank not in used)
+
+    mask = 0
+    for rank in present:
+        mask |= 1 << rank
+    straight_high = rank_straight_high(mask)
+
+    if by_count[4]:
+        four = by_count[4][0]
+        return (7, (four,) + others(four)[:1])
+    if by_count[3] and (len(by_count[3]) > 1 or by_count[2]):
+        three = by_count[3][0]
+        pair = max(by_count[3][1:] + by_count[2])
+        return (6, (three, pair))
+    if straight_high != -1:
+        return (4, (straight_high,))
+    if by_count[3]:
+        three = by_count[3][0]
+        return (3, (three,) + others(three)[:2])
+    if len(by_count[2]) > 1:
+        high, low = by_count[2][:2]
+        return (2, (high, low) + others(high, low)[:1])
+    if by_count[2]:
+        pair = by_count[2][0]
+        return (1, (pair,) + others(pair)[:3])
+    return (0, tuple(present[:5]))
+
+def best_suited(mask):
+    straight_high = rank_straight_high(mask)
+    if straight_high == 12:
+        return (9, (12,))
+    if straight_high != -1:
+        return (8, (straight_high,))
+    return (5, tuple(rank for rank in range(12, -1, -1) if mask & (1 << rank))[:5])
+
+def generate_tables(path: Path = TABLES_PATH):
+    from deck import Card
+
+    strengths = {c: i + 1 for i, c in enumerate(five_card_classes())}
+
+    flush = [0] * 8192
+    for mask in range(8192):
+        if 5 <= bin(mask).count('1') <= 7:
+            flush[mask] = strengths[best_suited(mask)]
+
+    unsuited = {}
+    for n in (5, 6, 7):
+        for multiset in itertools.combinations_with_replacement(range(13), n):
+            counts = [0] * 13
+            for rank in multiset:
+                counts[rank] += 1
+            if max(counts) > 4:
+                continue
+            product = 1
+            for rank in multiset:
+                product *= Card.PRIMES[rank]
+            unsuited[product] = strengths[best_unsuited(counts)]
+
+    keys = sorted(unsuited)
+    values = [unsuited[key] for key in keys]
+
+    write_atomic(path, [
+        HEADER.pack(MAGIC, VERSION, len(keys)),
+        struct.pack(f'<{len(keys)}Q', *keys),
+        struct.pack('<8192H', *flush),
+        struct.pack(f'<{len(values)}H', *values)
+    ])
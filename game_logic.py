@@ -1,22 +1,23 @@
-from openai import OpenAI
-
-from game_structs import HoldemRound, Action, Player, Snapshot, T, Pot, PotQueue
+from game_structs import HoldemRound, Action, Snapshot, T, Pot, PotQueue, RoundState, PlayerState, SeatRing
 from constants import Phases, Actions, Positions, Subjects
 from deck import Deck, Hand, Card
-from utils import init_rand, shuffle, get_time, get_nanoseconds, update
+from evaluator import HandState
+from equity import Equity, estimate_equity, enumerate_equity
+from preflop import preflop_equity
+from utils import RandomStream, get_time, get_nanoseconds, update
 from game_save import save_game, generate_speech
+from llm import get_backend
 
 
-import anthropic
-
-import random
 import math
 round_ = round # fml for naming the HoldemRound instance round
 import time
 import copy
 
+# Monte Carlo runouts behind the equity line in each postflop prompt. Preflop reads preflop.bin.
+EQUITY_SAMPLES = 2000
 
-def build_prompt(round: HoldemRound, player: Player, bet_occurred: bool, highest_bet: float, min_raise: float):
+def build_prompt(round: RoundState, player: PlayerState, bet_occurred: bool, highest_bet: int, min_raise: int, equity: Equity | None = None, hand_state: HandState | None = None):
         """
         CASES
         1. bet, check, fold
@@ -84,11 +85,19 @@ def build_prompt(round: HoldemRound, player: Player, bet_occurred: bool, highest
 
         bet_or_raise_option = "" if call_all_in else f'''"{bet_or_raise} N" {bet_or_raise_all_in}\n\
 Such that N is a number between {min_raise} and {player.chips - prev_highest_bet}.\n'''
+        equity_line = "" if equity is None else \
+            f"Against the players still in, your hand wins {equity.win:.0%} of the time and ties {equity.tie:.0%}.\n"
+        draws = [] if hand_state is None else hand_state.draws()
+        draw_clause = "" if not draws else f", with a {' and a '.join(draws)}"
+        hand_line = "" if hand_state is None else \
+            f"Right now your best hand is {Hand.HANDS[hand_state.category()]}{draw_clause}.\n"
         ending = """Remember, JUSTIFICATION is one sentence then two line breaks. ACTION consists of at most ONE word and ONE number, with NO punctuation!"""
 
         p = player.personality
         return f"""\n{player.name}? It's your turn to act.\n\n\
-You've been dealt {player.hole_cards}.\n\
+You've been dealt {Card.repr_list(player.hole_cards)}.\n\
+{hand_line}\
+{equity_line}\
 There's ${round.pot_queue.total_amount} in the pot.\n\
 You have ${player.chips} in chips.\n\
 
@@ -119,7 +128,7 @@ For ACTION, Choose from the following responses:
 {ending}"""
 
 
-def build_log(round: HoldemRound, perspective: Player | None = None, short_term_memory_limit=30) -> str:
+def build_log(round: RoundState, perspective: PlayerState | None = None, short_term_memory_limit=30) -> str:
     actions = round.actions
     if(len(actions) > short_term_memory_limit):
         surplus = len(actions)-short_term_memory_limit
@@ -161,10 +170,12 @@ def build_log(round: HoldemRound, perspective: Player | None = None, short_term_
 
     return log_string
 
-def log_action(round: HoldemRound, action: str, typed_object: T, object: str | None = None, subject_id:str = Subjects.DEALER_ID) -> HoldemRound:
+# The only place engine state is frozen: every Action carries a Snapshot of the round as it was.
+def log_action(round: RoundState, action: str, typed_object: T, object: str | None = None, subject_id:str = Subjects.DEALER_ID) -> RoundState:
 
     if object == None:
-        object = str(typed_object)
+        # Cards stay ints through the engine; this is where they become strings.
+        object = Card.repr_list(typed_object) if action in Actions.CARDS_INVOLVED else str(typed_object)
 
     subject_type = Subjects.DEALER
     subject = Subjects.DEALER
@@ -174,7 +185,8 @@ def log_action(round: HoldemRound, action: str, typed_object: T, object: str | N
         subject = round.players[subject_id].name
 
     action_hash = f'{subject.replace(' ', '')}_{action}_{get_nanoseconds()}'
-    if action==Actions.THINK or action==Actions.SAY:
+    headless = round.policies is not None
+    if (action==Actions.THINK or action==Actions.SAY) and not headless:
         # Generate speech files for relevant actions.
 
         generate_speech(round, typed_object, action_hash, voice_index=round.players[subject_id].personality.voice_index)
@@ -186,12 +198,15 @@ def log_action(round: HoldemRound, action: str, typed_object: T, object: str | N
         typed_object=typed_object, 
         phase=round.phase, 
         round_id=round.round_id,
-        pot_queue=round.pot_queue,
-        community_cards=copy.deepcopy(round.community_cards), 
-        players=copy.deepcopy(round.players), 
+        pot_queue=round.pot_queue.freeze(),
+        community_cards=round.community_cards,
+        players=round.freeze_players(),
         seats=round.seats,
         time=get_time(), 
-        subject_id=subject_id
+        subject_id=subject_id,
+        seat_index_of_btn=round.seat_index_of_btn,
+        small_blind=round.small_blind,
+        big_blind=round.big_blind
         )
 
     new_action = Action(
@@ -203,33 +218,35 @@ def log_action(round: HoldemRound, action: str, typed_object: T, object: str | N
         snapshot=snapshot
         )
 
-    action_list = round.actions
-    action_list.append(new_action)
-
-    round = update(round, actions=action_list)
-    save_game(round)
+    round.actions.append(new_action)
+    stack_sanity_check(round, action, subject_id)
+    if not headless:
+        save_game(round)
 
     return round
 
+# Console output, which headless rounds skip.
+def say(round: RoundState, *values):
+    if round.policies is None:
+        print(*values)
+
+# Each hand gets its own stream, seeded from the table's (or the clock) unless a seed is given;
+# the logged SHUFFLE seed alone is enough to deal the hand again.
 def init_rand(round, seed=None):
     if(seed == None):
-        seed = math.floor(time.time()*1000000)
-    random.seed(seed)
+        seed = round.table_rng.getrandbits(63) if round.table_rng is not None else math.floor(time.time()*1000000)
+    round.rng = RandomStream(seed)
     round = log_action(round, Actions.SHUFFLE, seed)
     return round
 
-def shuffle(l):
-    random.shuffle(l)
-    return l
-
-def refresh_players(round: HoldemRound) -> HoldemRound:
+def refresh_players(round: RoundState) -> RoundState:
     updated_players = {}
-    updated_seats = [-1, -1, -1, -1, -1, -1]
+    updated_seats = [-1] * len(round.seats)
 
     # Reset players' values
     for player in round.players.values():
 
-        updated_player = Player(
+        updated_player = PlayerState(
             player_id=player.player_id,
             name=player.name, 
             position=Positions.NONE, 
@@ -239,9 +256,7 @@ def refresh_players(round: HoldemRound) -> HoldemRound:
             amount_in_street=0, 
             amount_in_round=0,
             has_folded=False, 
-            is_all_in=False,
-            prev_id=-1,
-            next_id=-1
+            is_all_in=False
         )
         updated_players[player.player_id] = updated_player
         # Populate updated player in same seat.
@@ -249,14 +264,16 @@ def refresh_players(round: HoldemRound) -> HoldemRound:
         updated_seats[seat_index] = updated_player.player_id
     
 
-    return update(round, players=updated_players, seats=updated_seats)
-    
-def set_positions(round: HoldemRound) -> HoldemRound:
-    round = update(round, seat_index_of_btn=(round.seat_index_of_btn + 1) % len(round.seats))
+    round.players = updated_players
+    round.seats = updated_seats
+    if round.ledger is not None:
+        round.ledger.track(*updated_players.values())
+    return round
 
-    position_names = HoldemRound.POSITIONS_PER_PLAYERCOUNT[len(round.players)]
+def set_positions(round: RoundState) -> RoundState:
+    round.seat_index_of_btn = (round.seat_index_of_btn + 1) % len(round.seats)
 
-    updated_players = copy.deepcopy(round.players)
+    position_names = HoldemRound.POSITIONS_PER_PLAYERCOUNT[len(round.players)]
 
     # Find ID of btn
     btn_seat_index = round.seat_index_of_btn
@@ -267,7 +284,7 @@ def set_positions(round: HoldemRound) -> HoldemRound:
 
     btn_id = round.seats[btn_seat_index]
     # For next time. Prevent this value from lagging behind when seats are empty.
-    round = update(round, seat_index_of_btn = btn_seat_index) 
+    round.seat_index_of_btn = btn_seat_index
     btn_player = round.players[btn_id]
 
 
@@ -280,17 +297,14 @@ def set_positions(round: HoldemRound) -> HoldemRound:
         players_in_seat_order.append(round.players[player_id])
 
     offset = players_in_seat_order.index(btn_player)
+    round.ring = SeatRing.from_seats(round.seats)
 
     for i in range(offset - len(players_in_seat_order), offset):
         player = players_in_seat_order[i]
         new_position = position_names[i - offset]
-        new_next_id = players_in_seat_order[(i + 1)%len(players_in_seat_order)].player_id
-        new_prev_id = players_in_seat_order[(i - 1)%len(players_in_seat_order)].player_id
 
-        updated_players[player.player_id] = \
-            update(player, position=new_position, next_id=new_next_id, prev_id=new_prev_id)
+        player.position = new_position
 
-        round = update(round, players=updated_players)
         round = log_action(
             round=round,
             action=Actions.IS_POSITION,
@@ -298,21 +312,9 @@ def set_positions(round: HoldemRound) -> HoldemRound:
             subject_id=player.player_id
         )
 
+    return round
 
-
-
-    return update(round, players=updated_players)
-
-def update_players(round: HoldemRound, players_to_update: list[Player]) -> HoldemRound:
-
-    updated_players = round.players
-    
-    for player in players_to_update:
-        updated_players[player.player_id] = player
-
-    return update(round, players=updated_players)
-
-def right_pot(round: HoldemRound) -> HoldemRound:
+def right_pot(round: RoundState) -> RoundState:
 
     pot_queue = round.pot_queue
     ids_to_bets = pot_queue.ids_to_bets
@@ -376,11 +378,11 @@ def right_pot(round: HoldemRound) -> HoldemRound:
             list_to_concatenate = list_to_concatenate + [actual_main_pot]
 
         right_pots = right_pots[:-1] + list_to_concatenate
-        pot_queue = update(pot_queue, right_pots=list(right_pots), ids_to_bets={})
-        round = update(round, pot_queue=pot_queue)
-        print("condition 1")
-        print(ids_to_bets)
-        print(right_pots)
+        pot_queue.right_pots = list(right_pots)
+        pot_queue.ids_to_bets = {}
+        say(round, "condition 1")
+        say(round, ids_to_bets)
+        say(round, right_pots)
 
 
         return round
@@ -463,46 +465,32 @@ def right_pot(round: HoldemRound) -> HoldemRound:
             # Subtract the difference from every remaining player.
             copy_to_disburse[id] -= adjusted_amount
 
-    pot_queue = update(pot_queue, right_pots=right_pots, ids_to_bets={})
-    round = update(round, pot_queue=pot_queue)
+    pot_queue.right_pots = right_pots
+    pot_queue.ids_to_bets = {}
     return round
 
-def update_pot(round: HoldemRound, amount: float, bettor_id: int) -> HoldemRound:
-    ids_to_bets = round.pot_queue.ids_to_bets
-
-    prev_bet = ids_to_bets.setdefault(bettor_id, 0)
-    ids_to_bets[bettor_id] = prev_bet + amount
-
-    updated_pot_queue = update( \
-        round.pot_queue,
-        ids_to_bets=ids_to_bets,
-        total_amount=round.pot_queue.total_amount + amount
-        )
-    return update(round, pot_queue=updated_pot_queue)
+def update_pot(round: RoundState, amount: int, bettor_id: int) -> RoundState:
+    pot_queue = round.pot_queue
+    pot_queue.ids_to_bets[bettor_id] = pot_queue.ids_to_bets.get(bettor_id, 0) + amount
+    pot_queue.total_amount += amount
+    return round
 
-def attempt_bet(round: HoldemRound, player: Player, attempted_amount: int, action: str) -> HoldemRound:
+def attempt_bet(round: RoundState, player: PlayerState, attempted_amount: int, action: str) -> tuple[RoundState, int]:
     actual_bet = min(attempted_amount, player.chips)
-    updated_chips = player.chips - actual_bet
-    updated_amount_in_street = player.amount_in_street + actual_bet
-    updated_amount_in_round = player.amount_in_round + actual_bet
-    updated_is_all_in = (updated_chips == 0)
-
-    updated_player = update( \
-        player, chips=updated_chips, \
-        amount_in_street=updated_amount_in_street, \
-        amount_in_round=updated_amount_in_round, \
-        is_all_in=updated_is_all_in)
-
-    round = update_players(round, [updated_player])
+    player.chips -= actual_bet
+    player.amount_in_street += actual_bet
+    player.amount_in_round += actual_bet
+    player.is_all_in = (player.chips == 0)
+
     round = update_pot(round, actual_bet, player.player_id)
 
     return round, actual_bet
 
-def post_blinds(round: HoldemRound) -> HoldemRound:
+def post_blinds(round: RoundState) -> RoundState:
 
     # Post blinds.
-    sb = HoldemRound.SMALL_BLIND
-    bb = HoldemRound.BIG_BLIND
+    sb = round.small_blind
+    bb = round.big_blind
 
     sb_id = -1
     bb_id = -1
@@ -519,7 +507,7 @@ def post_blinds(round: HoldemRound) -> HoldemRound:
 
     return round
 
-def get_player_id_by_position(round: HoldemRound, position: str) -> int:
+def get_player_id_by_position(round: RoundState, position: str) -> int:
     id = -1
     for player in round.players.values():
         if player.position == position:
@@ -527,54 +515,25 @@ def get_player_id_by_position(round: HoldemRound, position: str) -> int:
     return id
 
 
-def deal_hole_cards(deck: Deck, round: HoldemRound) -> tuple[Deck, HoldemRound]:
-    updated_players = round.players
+def deal_hole_cards(deck: Deck, round: RoundState) -> tuple[Deck, RoundState]:
     btn_id = get_player_id_by_position(round, Positions.BTN)
-    current_id = round.players[btn_id].next_id
-    ids_seen = set()
 
-    while(current_id not in ids_seen):
+    for current_id in round.ring.clockwise_from(btn_id):
         current_player = round.players[current_id]
-        deck, hole_cards = Deck.pop(deck, 2)
+        hole_cards = deck.deal(2)
 
-        # Potential issue: These actions are being logged with outdated round instances
-        updated_players[current_player.player_id] = update(current_player, hole_cards=hole_cards)
+        current_player.hole_cards = hole_cards
         round = log_action(round, Actions.DEALT, typed_object=hole_cards, subject_id=current_player.player_id)
-        ids_seen.add(current_id)
-        current_id = current_player.next_id
-
-    round = update(round, players=updated_players)
-
-    # Now remove the nodes of those who were all-in after posting blinds
-    player_keys = list(round.players.keys())
-    for key in player_keys:
-        if(not round.players[key].is_all_in):
-            continue
-        round = remove_node(round=round, player=round.players[key])
 
-    round = update(round, players=updated_players)
-    
+    # Those all-in from posting blinds have no more action.
+    for player in round.players.values():
+        if player.is_all_in:
+            round.ring.remove(player.player_id)
 
     return deck, round
 
-def remove_node(round: HoldemRound, player: Player) -> HoldemRound:
-
-    my_id = player.player_id
-    new_parent_id = player.prev_id
-    new_child_id = player.next_id
-
-    new_parent = update(round.players[new_parent_id], next_id=new_child_id)
-    new_child = update(round.players[new_child_id], prev_id=new_parent_id)
-    player = update(round.players[my_id], prev_id=-1, next_id=-1)
-
-    round = update_players(round, [new_parent, new_child, player])
-
-    return round
-
 def interpret_response(response: str) -> tuple [str, float]:
 
-    print(f"{response}")
-
     # If they didn't follow instructions, split it by \n\n and prune all but the last instance.
     if(len(response) > 15):
         response = response.split('\n\n')[-1]
@@ -592,7 +551,7 @@ def interpret_response(response: str) -> tuple [str, float]:
         val_string = char + val_string
     
     response_string = response[: -1 * len(val_string)] if len(val_string) > 0 else response
-    val = float(val_string) if val_string != "" else -1
+    val = int(val_string) if val_string != "" else -1
 
     # Some models reply with "allin" or "all in".
     if("allin" in response_string) or ("all in" in response_string):
@@ -604,131 +563,84 @@ def interpret_response(response: str) -> tuple [str, float]:
 def send_prompt(context: str) -> str:
     print(f"\n\n\n{context}\n")
 
-    # client = anthropic.Anthropic()
-    # message = client.messages.create(
-    #     # claude-opus-4-6 -> ~$0.10/min
-    #     model="claude-haiku-4-5",
-    #     max_tokens=200,
-    #     messages=[
-    #         {
-    #             "role": "user",
-    #             "content": context,
-    #         }
-    #     ],
-    # )
-    # response = message.content[0].text
-
-    # Initialize client with your custom credentials
-    client = OpenAI(
-        api_key="your-api-key-here",
-        base_url="https://your-custom-url.com"
-    )
-
-    response = client.chat.completions.create(
-        model="gpt-4o", # Replace with your target model
-        max_tokens=200,
-        messages=[
-            {
-                "role": "user",
-                "content": context,
-            }
-        ],
-    )
-    
-    # Access the text content from the first choice
-    return response.choices[0].message.content
+    # Long-lived, pooled client for whichever provider is configured (see llm.py).
+    return get_backend().complete(context)
 
-def prompt_stuff(round: HoldemRound) -> HoldemRound:
+# hand_states holds each live player's HandState from the flop on, kept current by play_round.
+def prompt_stuff(round: RoundState, hand_states: dict[int, HandState] | None = None) -> RoundState:
     phase = round.phase
 
     is_preflop = (phase == Phases.PREFLOP)
     bet_occurred = is_preflop
-    total_players = round.players.values()
+    ring = round.ring
 
-    # Attempt to skip action.
+    highest_bet = 0 if not is_preflop else round.big_blind
+    min_raise = round.big_blind
 
-    active_players = []
-    for player in total_players:
-        if (not player.has_folded) and (not player.is_all_in):
-            active_players.append(player)
-
-    action_remains = len(active_players) > 1
+    # Attempt to skip action. A lone player who can still bet acts only to answer a bet they
+    # haven't matched, e.g. when both blinds went all in posting.
+    action_remains = ring.count > 1 or \
+        (ring.count == 1 and any(p.amount_in_street < highest_bet for id, p in round.players.items() if ring.is_active(id)))
 
     if not action_remains:
         return round
 
-    # Get players by position.
-
-    players_by_position = {}
+    # Big blind ends action preflop, btn on all other streets.
+    last_position = Positions.BB if is_preflop else Positions.BTN
+    # If they've folded, or are all-in (e.g. from posting the blind), it's the nearest active player before them.
+    last_to_act = ring.last_active(get_player_id_by_position(round, last_position))
 
-    for player in total_players:
-        players_by_position[player.position] = player
-    
-    # Big blind ends action preflop.
-    last_to_act = players_by_position[Positions.BB]
-    
-    # Btn ends action all other streets.
-    if phase != Phases.PREFLOP:
-        last_to_act = players_by_position[Positions.BTN]
-        # If BTN has folded we must find the nearest active player.
-        ppp = HoldemRound.POSITIONS_PER_PLAYERCOUNT[len(total_players)]
-        ppp_index = ppp.index(Positions.BTN) # Always 0
-        while(last_to_act not in active_players):
-            ppp_index -= 1
-            prev_position = ppp[ppp_index]
-            last_to_act = players_by_position[prev_position]
-
-    first_id = last_to_act.next_id
+    first_id = ring.next_active(last_to_act)
     curr_id = first_id
 
     acted = set() # Flush this each time a player bets.
 
-    highest_bet = 0 if not is_preflop else HoldemRound.BIG_BLIND
-    min_raise = HoldemRound.BIG_BLIND
-
-    starting_active_ids = set([player.player_id for player in active_players])
     folded_ids = set()
     all_in_ids = set()
 
-    while(curr_id not in acted):
-        # Keep this for the next time curr_id is -1, to trace where the error occurred.
-        print(f"REQUESTING ACTION FROM {curr_id}: {round.players[curr_id]}\n\nDATA: {round.players}\n\n {round.seats}")
+    # -1 once nobody is left who can act.
+    while(curr_id != -1 and curr_id not in acted):
         player = round.players[curr_id]
-        # Skip all-in and folded players
-        if(player.is_all_in or player.has_folded):
-            print(f"Warning. This child ({player.name}) should have been severed.")
-            next_id = player.next_id
-            next_player = round.players[next_id]
-            print(f"Attempting to continue with {next_player}.")
-            player = next_player
-            continue
-
 
-        # Check if everyone else has folded.
-        if(len(set.difference(starting_active_ids, folded_ids)) == 1):
+        # Check if everyone else has folded. Players all in are still in, so whoever is left
+        # facing their bet still has to answer it.
+        if(has_folded_out_(round)):
             return round
 
 
 
-        log = build_log(round, player)
+        hand_state = None if hand_states is None else hand_states.get(player.player_id)
 
-        prompt = build_prompt(round, player, bet_occurred, highest_bet, min_raise)
-        context = log + prompt
-        print("\n\nSENDING PROMPT.\n\n")
-        response = send_prompt(context)
+        if round.policies is not None:
+            # Headless: the policy answers with the ACTION part only, and there's nothing to think out loud.
+            response = round.policies[player.player_id](round, player, highest_bet, min_raise, hand_state)
+            processed, value = interpret_response(response)
+        else:
+            log = build_log(round, player)
 
-        print(response)
+            opponents = sum(1 for p in round.players.values() if (not p.has_folded) and p.player_id != player.player_id)
+            if is_preflop:
+                equity = preflop_equity(player.hole_cards, opponents + 1)
+            else:
+                equity = estimate_equity(player.hole_cards, round.community_cards, opponents, samples=EQUITY_SAMPLES, seed=round.rng.getrandbits(63))
 
-        parts = response.rsplit('\n\n', 1)
+            prompt = build_prompt(round, player, bet_occurred, highest_bet, min_raise, equity, hand_state)
+            context = log + prompt
+            print("\n\nSENDING PROMPT.\n\n")
+            response = send_prompt(context)
 
-        processed, value = interpret_response(parts[1])
+            print(response)
 
-        round = log_action(
-            round = round,
-            action=Actions.THINK,
-            typed_object=response,
-            subject_id=player.player_id
-        )
+            parts = response.rsplit('\n\n', 1)
+
+            processed, value = interpret_response(parts[1])
+
+            round = log_action(
+                round = round,
+                action=Actions.THINK,
+                typed_object=response,
+                subject_id=player.player_id
+            )
 
         bet_amount = 0
 
@@ -741,7 +653,6 @@ def prompt_stuff(round: HoldemRound) -> HoldemRound:
             action = Actions.RAISE
             raise_by = max(value, min_raise)
             bet_amount = highest_bet + raise_by - player.amount_in_street
-            min_raise = raise_by
             acted = set([player.player_id]).union(folded_ids).union(all_in_ids) # Everyone but this player needs to act again.
 
         elif (Actions.CALL in processed):
@@ -757,8 +668,8 @@ def prompt_stuff(round: HoldemRound) -> HoldemRound:
             action = Actions.FOLD
             bet_amount = 0
 
-            player = update(player, has_folded=True, hole_cards = [])
-            round = update_players(round, [player])
+            player.has_folded = True
+            player.hole_cards = ()
             folded_ids.add(player.player_id)
 
         if(bet_amount > 0):
@@ -767,18 +678,20 @@ def prompt_stuff(round: HoldemRound) -> HoldemRound:
 
         acted.add(player.player_id)
 
+        # By what was actually put in: an all-in asks for an infinite raise, and a short one doesn't reopen less.
+        if action == Actions.RAISE:
+            min_raise = max(min_raise, player.amount_in_street - highest_bet)
         highest_bet = max(highest_bet, player.amount_in_street)
 
-        next_id = player.next_id
-
         if(player.is_all_in):
             all_in_ids.add(player.player_id)
-            round = remove_node(round, player)
-            
+            ring.remove(player.player_id)
 
         if(player.has_folded):
             folded_ids.add(player.player_id)
-            round = remove_node(round, player)
+            ring.remove(player.player_id)
+
+        next_id = ring.next_active(player.player_id)
 
         round = log_action( \
             round=round, 
@@ -787,32 +700,41 @@ def prompt_stuff(round: HoldemRound) -> HoldemRound:
             subject_id=player.player_id
             )
 
-        print(f'{round.players[curr_id]} has ${player.chips} in chips left after the end of this action')
+        say(round, f'{round.players[curr_id]} has ${player.chips} in chips left after the end of this action')
         curr_id = next_id
 
-        stack_sanity_check(round)
-
 
     return round
 
-def has_folded_out_(round: HoldemRound) -> bool:
+def has_folded_out_(round: RoundState) -> bool:
     phase = round.phase
     is_showdown = phase == Phases.SHOWDOWN
     remaining = sum([1 for p in round.players.values() if not p.has_folded])
     return (remaining == 1)
     
 
-def settle_pot(round: HoldemRound, folded_out=False):
+# Nobody left can bet, but more than one player is still in: the board just runs out.
+def is_runout(round: RoundState) -> bool:
+    live = [p for p in round.players.values() if not p.has_folded]
+    can_act = [p for p in live if not p.is_all_in]
+    return len(live) > 1 and len(can_act) <= 1
+
+# Broadcast-style overlay: each live player's exact equity on the current board.
+def log_runout_equity(round: RoundState) -> RoundState:
+    live = [p for p in round.players.values() if not p.has_folded]
+    equities = enumerate_equity([p.hole_cards for p in live], round.community_cards)
+
+    for player, equity in zip(live, equities):
+        round = log_action(round, Actions.EQUITY, equity, object=f"{equity.equity:.1%}", subject_id=player.player_id)
+    return round
+
+def settle_pot(round: RoundState, folded_out=False) -> RoundState:
 
     # Disable all-in tag at showdown
     if round.phase == Phases.SHOWDOWN:
-        player_ids = round.players.keys()
-        updated_players = {}
-        for id in player_ids:
-            player = update(round.players[id], is_all_in=False)
-            updated_players[id] = player
-        round = update(round, players=updated_players)
-        
+        for player in round.players.values():
+            player.is_all_in = False
+
 
     pot = round.pot_queue
 
@@ -820,12 +742,10 @@ def settle_pot(round: HoldemRound, folded_out=False):
         amount = round.pot_queue.total_amount
         winner = [p for p in round.players.values() if not p.has_folded]
         player = winner[0]
-        player = update(player, is_all_in=False)
-        player = update(player, chips=player.chips + amount)
-        round = update_players(round, [player])
+        player.is_all_in = False
+        player.chips += amount
 
-        pot_queue = update(round.pot_queue, total_amount=0)
-        round = update(round, pot_queue=pot_queue)
+        round.pot_queue.total_amount = 0
 
         round = log_action(
             round=round,
@@ -838,6 +758,12 @@ def settle_pot(round: HoldemRound, folded_out=False):
 
     right_pots = pot.right_pots
     shown_ids = set()
+
+    # Score everyone still in once; each pot below only filters this by who's involved.
+    live_players = [p for p in round.players.values() if not p.has_folded]
+    strengths = Hand.score_players(live_players, round.community_cards)
+    # Classified on first win, then reused for every further pot that player takes.
+    hands = {}
     pot_number = -1
     first_pot_was_uncalled = False
     while(len(right_pots) > 0):
@@ -854,15 +780,22 @@ def settle_pot(round: HoldemRound, folded_out=False):
             if(current_pot.amount == 0):
                 continue
 
-            player = update(candidates[0], chips=candidates[0].chips + current_pot.amount)
-            round = update_players(round, [player])
+            candidates[0].chips += current_pot.amount
+            round.pot_queue.total_amount -= current_pot.amount
             round = log_action(round, Actions.RETURN, current_pot.amount, subject_id=candidates[0].player_id)
             right_pots = right_pots[:-1]
             continue
 
 
         # Update right_pot to include winning hand's cards.
-        winning_hands = Hand.find_winners(candidates, round.community_cards)
+        best = max(strengths[p.player_id] for p in candidates)
+        winning_hands = []
+        for candidate in candidates:
+            if strengths[candidate.player_id] != best:
+                continue
+            if candidate.player_id not in hands:
+                hands[candidate.player_id] = Hand.classify([*candidate.hole_cards, *round.community_cards], candidate)
+            winning_hands.append(hands[candidate.player_id])
         winning_card_set = set()
         for hand in winning_hands:
             for card in hand.cards:
@@ -870,25 +803,26 @@ def settle_pot(round: HoldemRound, folded_out=False):
         
         current_pot = update(current_pot, winning_card_set=list(winning_card_set))
         right_pots[-1] = current_pot
-        updated_pot_queue = update(round.pot_queue, right_pots=right_pots)
-        round = update(round, pot_queue = updated_pot_queue)
+        round.pot_queue.right_pots = right_pots
 
-        # Disburse winnings
-        amount_per_winner = current_pot.amount/len(winning_hands)
+        # Disburse winnings in whole chips. Odd chips go one each to the winners nearest the
+        # button's left, the first seat the deal reaches.
+        share, odd_chips = divmod(current_pot.amount, len(winning_hands))
+        seat_count = len(round.seats)
+        winning_hands.sort(key=lambda hand: (round.seats.index(hand.player.player_id) - round.seat_index_of_btn - 1) % seat_count)
         
         for hand in winning_hands:
             player = hand.player
-            if(player in shown_ids):
+            if(player.player_id in shown_ids):
                 continue
-            player = hand.player
             round = log_action(round, Actions.SHOW, player.hole_cards, \
-                    object=f"{player.hole_cards} ({hand.hand_id})", subject_id=player.player_id)
+                    object=f"{Card.repr_list(player.hole_cards)} ({hand.hand_id})", subject_id=player.player_id)
             shown_ids.add(player.player_id)
         
-        for hand in winning_hands:
-            player = hand.player
-            player = update(player, chips=player.chips + amount_per_winner)
-            round = update_players(round, [player])
+        for i, hand in enumerate(winning_hands):
+            player = round.players[hand.player.player_id]
+            amount_per_winner = share + (1 if i < odd_chips else 0)
+            player.chips += amount_per_winner
 
             action = Actions.COLLECT_SIDE
 
@@ -896,9 +830,7 @@ def settle_pot(round: HoldemRound, folded_out=False):
             pot_number == 1 and first_pot_was_uncalled:
                 action = Actions.COLLECT
 
-            pot_queue = update(round.pot_queue, total_amount=round.pot_queue.total_amount - amount_per_winner)
-            round = update(round, pot_queue=pot_queue)
-
+            round.pot_queue.total_amount -= amount_per_winner
 
             round = log_action(round, action, amount_per_winner, subject_id=player.player_id)
         right_pots = right_pots[:-1]
@@ -908,77 +840,76 @@ def remove_seat_by_id(seats: list[int], id: int):
     return list([seat if seat != id else -1 for seat in seats])
 
 
-def remove_empty_stacks(round:HoldemRound) -> HoldemRound:
+def remove_empty_stacks(round: RoundState) -> RoundState:
     updated_players = {}
     player_keys = list(round.players.keys())
-    updated_seats = []
     for key in player_keys:
         player = round.players[key]
         if(player.chips == 0):
-            updated_seats = remove_seat_by_id(round.seats, player.player_id)
-            round = update(round, seats=updated_seats)
+            round.seats = remove_seat_by_id(round.seats, player.player_id)
             round = log_action(round=round, action=Actions.EXIT, typed_object=None, subject_id=player.player_id)
             continue
         updated_players[player.player_id] = player
-    return update(round, players=updated_players)
+    round.players = updated_players
+    return round
 
-def stack_sanity_check(round: HoldemRound):
-    sum = 0
-    for player in round.players.values():
-        sum += player.chips
-    
-    sum += round.pot_queue.total_amount
-    expected = HoldemRound.MAX_BUY_IN*6
-    if(sum == expected):
+# Constant time, at every logged action: the ledger keeps a running count of the stacks and the pot.
+def stack_sanity_check(round: RoundState, action: str, subject_id: int):
+    ledger = round.ledger
+    if ledger is None or ledger.check(round.round_id, round.phase, action, subject_id):
         return
-
-    print("@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@")
-    log_string = build_log(round)
-    print(log_string)
-    print("@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@")
-    print(f"Warning. Expected {expected} but got {sum}.")
-    # exit()
+    say(round, f"Warning. {ledger.violations[-1]}")
 
 
-def play_round(round: HoldemRound) -> HoldemRound:
+# Plays one hand on mutable engine state and hands back the frozen round.
+# With policies (player_id -> policy, see simulate.py) the hand is played headless.
+def play_round(round: HoldemRound, policies: dict | None = None, seed: int | None = None) -> HoldemRound:
+    round = RoundState.from_round(round)
+    round.policies = policies
     round = refresh_players(round)
-    round = update(round, phase=Phases.GAME_START)
+    round.phase = Phases.GAME_START
     # seed=1774796861768377 <- good one for quick testing
-    round = init_rand(round)
-    deck = shuffle(Deck.generate_deck())
+    round = init_rand(round, seed)
+    deck = Deck().shuffle(round.rng)
     round = set_positions(round)
     round = post_blinds(round)
     deck, round = deal_hole_cards(deck, round)
+    # Built on the flop, then one card added per street.
+    hand_states = {}
 
-    def play_street(round: HoldemRound, deck:list[Card], phase:str, cards_to_pop:int) -> HoldemRound:
-        community_cards=round.community_cards
-
-        round = update(round, phase=phase)
+    def play_street(round: RoundState, deck:Deck, phase:str, cards_to_pop:int) -> tuple[RoundState, Deck, bool]:
+        round.phase = phase
 
         if(cards_to_pop != 0):
-            deck, added_cards = Deck.pop(deck, cards_to_pop)
-            community_cards += added_cards
-            round = update(round, community_cards=community_cards)
-            object = str(community_cards) if cards_to_pop != 1 else \
-                f"{community_cards[:-1]} [{community_cards[-1]}]"
+            round.community_cards += deck.deal(cards_to_pop)
+            community_cards = round.community_cards
+            object = Card.repr_list(community_cards) if cards_to_pop != 1 else \
+                f"{Card.repr_list(community_cards[:-1])} [{Card.to_str(community_cards[-1])}]"
             round = log_action(round=round, action=Actions.FLIP, \
                 typed_object=community_cards, object=object)
 
-        round = prompt_stuff(round)
+            for player in round.players.values():
+                if player.has_folded:
+                    continue
+                if player.player_id in hand_states:
+                    hand_states[player.player_id].add(community_cards[-1])
+                else:
+                    hand_states[player.player_id] = HandState((*player.hole_cards, *community_cards))
+
+            if is_runout(round) and round.policies is None:
+                round = log_runout_equity(round)
+
+        round = prompt_stuff(round, hand_states)
 
         # Flush players' amounts in at the end of each street.
-        updated_players = {}
         for player in round.players.values():
-            id = player.player_id
-            updated_players[id] = update(player, amount_in_street=0)
-            continue
-        round = update(round, players=updated_players)
+            player.amount_in_street = 0
 
         has_folded_out = has_folded_out_(round)
         
 
         if has_folded_out:
-            round = update(round, phase=Phases.RESULT)
+            round.phase = Phases.RESULT
             round = settle_pot(round, folded_out=True)
         else:
             round = right_pot(round)
@@ -986,26 +917,26 @@ def play_round(round: HoldemRound) -> HoldemRound:
         return round, deck, has_folded_out
 
     round, deck, has_folded_out = play_street(round, deck, Phases.PREFLOP, cards_to_pop=0)
-    if(has_folded_out): return round
+    if(has_folded_out): return round.freeze()
 
     round, deck, has_folded_out = play_street(round, deck, Phases.FLOP, cards_to_pop=3)
-    if(has_folded_out): return round
+    if(has_folded_out): return round.freeze()
 
     round, deck, has_folded_out = play_street(round, deck, Phases.TURN, cards_to_pop=1)
-    if(has_folded_out): return round
+    if(has_folded_out): return round.freeze()
 
     round, deck, has_folded_out = play_street(round, deck, Phases.RIVER, cards_to_pop=1)
-    if(has_folded_out): return round
+    if(has_folded_out): return round.freeze()
 
-    round = update(round, phase=Phases.SHOWDOWN)
+    round.phase = Phases.SHOWDOWN
     round = settle_pot(round, folded_out=False)
     
     round = remove_empty_stacks(round)
 
-    
-    log_string = build_log(round)
-    print(log_string)
-    return round
+    if round.policies is None:
+        log_string = build_log(round)
+        print(log_string)
+    return round.freeze()
 
 
 
@@ -1,13 +1,17 @@
 from dataclasses import asdict
+import bisect
 import json
-from game_structs import HoldemRound
+from game_structs import HoldemRound, Action
+from constants import Actions
+from deck import Card
 from pathlib import Path
 import subprocess
 import pyttsx3
     
 
 def generate_round_filename(round: HoldemRound):
-    return f'{round.date}_{round.time.replace(':', '-')}'
+    filename = f'{round.date}_{round.time.replace(':', '-')}'
+    return filename if round.table_id is None else f'{filename}_table{round.table_id}'
 
 def generate_speech(round, words, hash, voice_index=14):
     engine = pyttsx3.init()
@@ -35,12 +39,174 @@ def generate_speech(round, words, hash, voice_index=14):
 
     raw_path.unlink(missing_ok=True)
 
+# Fields that hold int-encoded cards, written out in the {rank, suit, value} shape the visualizer reads.
+CARD_FIELDS = set(['hole_cards', 'community_cards', 'winning_card_set'])
+
+def cards_to_dicts(data):
+    if isinstance(data, dict):
+        return {key: [Card.to_dict(card) for card in value] if key in CARD_FIELDS else cards_to_dicts(value) \
+            for key, value in data.items()}
+    if isinstance(data, list):
+        return [cards_to_dicts(item) for item in data]
+    return data
+
+def serialize_action(action: Action) -> dict:
+    data = cards_to_dicts(asdict(action))
+    if action.action in Actions.CARDS_INVOLVED:
+        typed_object = action.snapshot.typed_object
+        data['snapshot']['typed_object'] = [Card.to_dict(card) for card in typed_object]
+    return data
+
+"""Hand history
+
+Saves are JSON Lines, appended to as the game goes rather than rewritten on every action.
+The first line is a header; every line after it is one Action, serialized as above, except
+that only every KEYFRAME_INTERVAL-th action (and the first) carries its full snapshot.
+The rest carry a snapshot_patch against the action before them:
+
+    {"action_hash": ..., "action": "call", ..., "snapshot_patch": {"players": {"3": {"chips": 24}}, ...}}
+
+A patch maps each changed key to its new value, or to a nested patch when both old and new
+values are dicts, and lists removed keys under DELETED. Lists are replaced whole.
+"""
+
+HISTORY_FORMAT = 'mp-history'
+HISTORY_VERSION = 1
+KEYFRAME_INTERVAL = 32
+DELETED = '__deleted__'
+
+def diff(old: dict, new: dict) -> dict:
+    patch = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+            continue
+        previous = old[key]
+        if previous == value:
+            continue
+        if isinstance(previous, dict) and isinstance(value, dict):
+            patch[key] = diff(previous, value)
+        else:
+            patch[key] = value
+
+    deleted = [key for key in old if key not in new]
+    if deleted:
+        patch[DELETED] = deleted
+    return patch
+
+def apply_patch(old: dict, patch: dict) -> dict:
+    new = dict(old)
+    for key in patch.get(DELETED, []):
+        new.pop(key, None)
+    for key, value in patch.items():
+        if key == DELETED:
+            continue
+        if isinstance(value, dict) and isinstance(new.get(key), dict):
+            new[key] = apply_patch(new[key], value)
+        else:
+            new[key] = value
+    return new
+
+# JSON's view of the data: int keys become strings, sets and tuples become lists.
+def to_json_types(data):
+    return json.loads(json.dumps(data, default=lambda o: list(o) if isinstance(o, set) else str(o)))
+
+class HistoryWriter:
+    def __init__(self, path: Path, keyframe_interval: int = KEYFRAME_INTERVAL, date: str | None = None):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.count = 0
+        self.previous_snapshot = None
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            header = {'format': HISTORY_FORMAT, 'version': HISTORY_VERSION, 'keyframe_interval': keyframe_interval, 'date': date}
+            f.write(json.dumps(header) + '\n')
+
+    def append(self, actions: list[Action]):
+        lines = []
+        for action in actions:
+            record = to_json_types(serialize_action(action))
+            snapshot = record.pop('snapshot')
+            if self.count % self.keyframe_interval == 0:
+                record['snapshot'] = snapshot
+            else:
+                record['snapshot_patch'] = diff(self.previous_snapshot, snapshot)
+            self.previous_snapshot = snapshot
+            self.count += 1
+            lines.append(json.dumps(record) + '\n')
+
+        with open(self.path, 'a') as f:
+            f.writelines(lines)
+
+# Reconstructs full actions from a history file. Only line offsets are read up front;
+# an action is rebuilt from the nearest keyframe at or before it, and reading forward
+# from the last action rebuilt only applies the one patch in between.
+class HistoryReader:
+    def __init__(self, path: Path):
+        self.path = path
+        self.offsets = []
+        self.keyframes = []
+        self.last_index = -1
+        self.last_snapshot = None
+
+        with open(path, 'rb') as f:
+            header = self.header = json.loads(f.readline())
+            if header.get('format') != HISTORY_FORMAT or header.get('version') != HISTORY_VERSION:
+                raise ValueError(f"{path} is not a version {HISTORY_VERSION} {HISTORY_FORMAT} file.")
+            offset = f.tell()
+            for line in f:
+                if b'"snapshot":' in line:
+                    self.keyframes.append(len(self.offsets))
+                self.offsets.append(offset)
+                offset += len(line)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def record(self, index: int, f) -> dict:
+        f.seek(self.offsets[index])
+        return json.loads(f.readline())
+
+    def __getitem__(self, index: int) -> dict:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        keyframe = self.keyframes[bisect.bisect_right(self.keyframes, index) - 1]
+        if keyframe <= self.last_index < index:
+            start, snapshot = self.last_index + 1, self.last_snapshot
+        else:
+            start, snapshot = keyframe, None
+
+        with open(self.path, 'rb') as f:
+
+            for i in range(start, index + 1):
+                record = self.record(i, f)
+                if 'snapshot' in record:
+                    snapshot = record['snapshot']
+                else:
+                    snapshot = apply_patch(snapshot, record.pop('snapshot_patch'))
+                    record['snapshot'] = snapshot
+
+        self.last_index = index
+        self.last_snapshot = snapshot
+        return record
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+def load_history(path: Path) -> list[dict]:
+    return list(HistoryReader(path))
+
+_writers = {}
+
+# Called after every log_action; appends whichever actions haven't been written yet.
 def save_game(round: HoldemRound):
-    data = [asdict(obj) for obj in round.actions]
-    path = Path(f'saves/{generate_round_filename(round)}.json')
-    path.parent.mkdir(parents=True, exist_ok=True)
-
-    json_string = json.dumps(data, indent=4)
-    with open(path, 'w')  as f:
-        json.dump(data, f, indent=4, default=lambda o: list(o) if isinstance(o, set) else str(o))
-    return
\ No newline at end of file
+    path = Path(f'saves/{generate_round_filename(round)}.jsonl')
+    writer = _writers.get(path)
+    if writer is None:
+        writer = _writers[path] = HistoryWriter(path, date=str(round.date))
+    writer.append(round.actions[writer.count:])
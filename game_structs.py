@@ -1,5 +1,6 @@
 import datetime
-from typing import List, Dict, Set, Tuple, Optional, ClassVar, TypeVar, Generic
+import random
+from typing import List, Dict, Set, Tuple, Optional, ClassVar, TypeVar, Generic, Callable
 from dataclasses import dataclass, field
 
 from constants import Positions as p_
@@ -27,19 +28,17 @@ class Player:
     position: str
     personality: Personality
 
-    hole_cards: Tuple[str]
-    chips: float
+    hole_cards: Tuple[int]
+    # Whole chips, here and everywhere else chips are counted.
+    chips: int
     # For calculating bet sizes
-    amount_in_street: float
+    amount_in_street: int
     # For calculating all-in stack size
-    amount_in_round: float
+    amount_in_round: int
 
     has_folded: bool
     is_all_in: bool
 
-    prev_id: int
-    next_id: int
-
     def __post_init__(self):
         object.__setattr__(self, "hole_cards", tuple(self.hole_cards))
 
@@ -49,8 +48,8 @@ class Player:
 @dataclass(frozen=True)
 class Pot: 
     ids_involved: List[int]
-    winning_card_set: List[str]
-    amount: float
+    winning_card_set: List[int]
+    amount: int
 
 @dataclass(frozen=True)
 class PotQueue:
@@ -59,8 +58,8 @@ class PotQueue:
     # This means side pots only ever matter when the short-stacked, all-in player wins the hand.
     # Another core principle is to model the behavior and timing after what actual human Dealers do.
 
-    ids_to_bets: Dict[int, float]
-    total_amount: float
+    ids_to_bets: Dict[int, int]
+    total_amount: int
     right_pots: List[Pot]
 
 T = TypeVar("T")
@@ -71,11 +70,15 @@ class Snapshot(Generic[T]):
     phase: str
     round_id: int
     pot_queue: PotQueue
-    community_cards: Tuple[str]
+    community_cards: Tuple[int]
     players: Dict[int, Player]
     seats: List[int]
     time: datetime
     subject_id: int = -1
+    # Enough with the rest to rebuild the HoldemRound (see replay.py); saves from before them lack them.
+    seat_index_of_btn: int = -1
+    small_blind: Optional[int] = None
+    big_blind: Optional[int] = None
 
     def __post_init__(self):
         object.__setattr__(self, "community_cards", tuple(self.community_cards))
@@ -141,16 +144,306 @@ class HoldemRound:
     
     players: Dict[int, Player]
     seats: List[int]
-    community_cards: List[str]
+    community_cards: List[int]
 
     seat_index_of_btn: int = -1
 
+    # This table's blinds; tournaments raise them level by level.
+    small_blind: int = SMALL_BLIND
+    big_blind: int = BIG_BLIND
+
+    # Which of the tables playing at once this is (see tournament.py), so each saves to its own
+    # file; None for a lone table.
+    table_id: Optional[int] = None
+
+    # The table's random stream; play_round draws each hand's SHUFFLE seed from it.
+    # Without one, a hand is seeded from the clock.
+    rng: Optional[random.Random] = field(default=None, repr=False, compare=False)
+
+    # Every time the last hand's chips didn't add up (see ChipLedger).
+    violations: Tuple['ChipViolation', ...] = field(default=(), compare=False)
+
     POSITIONS_PER_PLAYERCOUNT: \
         ClassVar[Dict[int, List[str]]] = {
             2: [p_.BTN, p_.BB],
             3: [p_.BTN, p_.SB, p_.BB],
             4: [p_.BTN, p_.SB, p_.BB, p_.CO],
             5: [p_.BTN, p_.SB, p_.BB, p_.HJ, p_.CO],
-            6: [p_.BTN, p_.SB, p_.BB, p_.UTG, p_.HJ, p_.CO]
-        }    
+            6: [p_.BTN, p_.SB, p_.BB, p_.UTG, p_.HJ, p_.CO],
+            7: [p_.BTN, p_.SB, p_.BB, p_.UTG, p_.MP, p_.HJ, p_.CO],
+            8: [p_.BTN, p_.SB, p_.BB, p_.UTG, p_.UTG1, p_.MP, p_.HJ, p_.CO],
+            9: [p_.BTN, p_.SB, p_.BB, p_.UTG, p_.UTG1, p_.MP, p_.LJ, p_.HJ, p_.CO],
+            10: [p_.BTN, p_.SB, p_.BB, p_.UTG, p_.UTG1, p_.UTG2, p_.MP, p_.LJ, p_.HJ, p_.CO]
+        }
+
+    # Seats at the biggest table there are position names for.
+    MAX_SEATS: ClassVar[int] = 10
+
+
+
+# Mutable engine state, used while a round is being played.
+# Betting, potting and settling change these in place; the frozen classes above are only
+# built when log_action takes a Snapshot, and once more when play_round hands the round back.
+#
+# Freezing is copy-on-write: each state keeps the frozen object it last produced and hands
+# that same object out again until something changes, so consecutive snapshots share every
+# player, pot queue, seat list and board that an action didn't touch.
+
+@dataclass(frozen=True)
+class ChipViolation:
+    round_id: int
+    phase: str
+    # The action being logged when the count came up wrong.
+    action: str
+    subject_id: int
+    expected: int
+    counted: int
+
+    def __str__(self):
+        return f"Round {self.round_id} {self.phase}, {self.action} by {self.subject_id}: expected {self.expected} chips but counted {self.counted}."
+
+# Chips at the table: every stack plus the pot. Stacks and the pot report each change to
+# their chip counts here as it happens, so checking nothing was made or lost is one comparison
+# per action rather than a sum over the table.
+@dataclass(slots=True)
+class ChipLedger:
+    total: int
+    in_stacks: int
+    in_pot: int
+    violations: List[ChipViolation] = field(default_factory=list)
+
+    # The count last reported, so a mismatch is recorded once rather than at every action after it.
+    _reported: Optional[int] = field(default=None, init=False, repr=False)
+
+    def track(self, *states):
+        for state in states:
+            object.__setattr__(state, '_ledger', self)
+
+    def check(self, round_id: int, phase: str, action: str, subject_id: int) -> bool:
+        counted = self.in_stacks + self.in_pot
+        # Any fraction of a chip, e.g. from splitting a pot unevenly, is a violation too.
+        if counted == self.total and type(counted) is int:
+            self._reported = None
+            return True
+        if counted != self._reported:
+            self._reported = counted
+            self.violations.append(ChipViolation(round_id, phase, action, subject_id, self.total, counted))
+        return False
+
+@dataclass(slots=True)
+class PlayerState:
+    player_id: int
+    name: str
+    position: str
+    personality: Personality
+
+    hole_cards: Tuple[int]
+    chips: int
+    amount_in_street: int
+    amount_in_round: int
+
+    has_folded: bool
+    is_all_in: bool
+
+    # The last freeze(), dropped by any assignment to a field.
+    _frozen: Optional[Player] = field(default=None, init=False, repr=False, compare=False)
+    _ledger: Optional[ChipLedger] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        if name == 'chips':
+            # Not there yet while __init__ is still assigning fields.
+            ledger = getattr(self, '_ledger', None)
+            if ledger is not None:
+                ledger.in_stacks += value - self.chips
+        object.__setattr__(self, name, value)
+        if name != '_frozen':
+            object.__setattr__(self, '_frozen', None)
 
+    def __repr__(self):
+        return self.name
+
+    @staticmethod
+    def from_player(player: Player) -> 'PlayerState':
+        return PlayerState(
+            player.player_id, player.name, player.position, player.personality,
+            player.hole_cards, player.chips, player.amount_in_street, player.amount_in_round,
+            player.has_folded, player.is_all_in
+        )
+
+    def freeze(self) -> Player:
+        if self._frozen is None:
+            self._frozen = Player(
+                self.player_id, self.name, self.position, self.personality,
+                self.hole_cards, self.chips, self.amount_in_street, self.amount_in_round,
+                self.has_folded, self.is_all_in
+            )
+        return self._frozen
+
+@dataclass(slots=True)
+class PotQueueState:
+    ids_to_bets: Dict[int, int]
+    total_amount: int
+    right_pots: List[Pot]
+
+    # ids_to_bets and right_pots are changed in place, so the last freeze() is compared rather than invalidated.
+    _frozen: Optional[PotQueue] = field(default=None, init=False, repr=False, compare=False)
+    _ledger: Optional[ChipLedger] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        if name == 'total_amount':
+            ledger = getattr(self, '_ledger', None)
+            if ledger is not None:
+                ledger.in_pot += value - self.total_amount
+        object.__setattr__(self, name, value)
+
+    @staticmethod
+    def from_pot_queue(pot_queue: PotQueue) -> 'PotQueueState':
+        return PotQueueState(dict(pot_queue.ids_to_bets), pot_queue.total_amount, list(pot_queue.right_pots))
+
+    def freeze(self) -> PotQueue:
+        frozen = self._frozen
+        if frozen is None or frozen.total_amount != self.total_amount or \
+            frozen.ids_to_bets != self.ids_to_bets or frozen.right_pots != self.right_pots:
+            frozen = self._frozen = PotQueue(dict(self.ids_to_bets), self.total_amount, list(self.right_pots))
+        return frozen
+
+# Action order: the table's seats in a fixed list (-1 where empty) and a bitmask of the seats
+# whose players can still act. Folding or going all in clears a bit; next and last to act are a
+# couple of bit operations on the mask, and no player is touched.
+@dataclass(slots=True)
+class SeatRing:
+    ids: List[int]
+    index_of: Dict[int, int]
+    seated: int
+    active: int
+
+    @staticmethod
+    def from_seats(seats: List[int]) -> 'SeatRing':
+        index_of = {id: i for i, id in enumerate(seats) if id != -1}
+        seated = sum(1 << i for i in index_of.values())
+        return SeatRing(list(seats), index_of, seated, seated)
+
+    @property
+    def count(self) -> int:
+        return self.active.bit_count()
+
+    def is_active(self, player_id: int) -> bool:
+        return bool(self.active >> self.index_of[player_id] & 1)
+
+    def remove(self, player_id: int):
+        self.active &= ~(1 << self.index_of[player_id])
+
+    # The first active player after player_id going round the table (player_id itself if it's
+    # the only one), or -1 once nobody can act.
+    def next_active(self, player_id: int) -> int:
+        i = self.index_of[player_id]
+        later = self.active >> (i + 1)
+        if later:
+            return self.ids[i + (later & -later).bit_length()]
+        if self.active:
+            return self.ids[(self.active & -self.active).bit_length() - 1]
+        return -1
+
+    # player_id if active, otherwise the nearest active player before it, or -1.
+    def last_active(self, player_id: int) -> int:
+        i = self.index_of[player_id]
+        earlier = self.active & ((2 << i) - 1)
+        if earlier:
+            return self.ids[earlier.bit_length() - 1]
+        if self.active:
+            return self.ids[self.active.bit_length() - 1]
+        return -1
+
+    # Every seated player, starting after player_id and ending with it.
+    def clockwise_from(self, player_id: int) -> List[int]:
+        i = self.index_of[player_id]
+        order = self.ids[i + 1:] + self.ids[:i + 1]
+        return [id for id in order if id != -1]
+
+@dataclass(slots=True)
+class RoundState:
+    phase: str
+    round_id: int
+    date: datetime
+    time: datetime
+    pot_queue: PotQueueState
+    actions: List[Action]
+
+    players: Dict[int, PlayerState]
+    # Both are only ever replaced, never changed in place, so snapshots hold them as they are.
+    seats: List[int]
+    community_cards: Tuple[int]
+
+    seat_index_of_btn: int = -1
+    small_blind: int = HoldemRound.SMALL_BLIND
+    big_blind: int = HoldemRound.BIG_BLIND
+    table_id: Optional[int] = None
+
+    # Headless play: player_id -> policy deciding in place of the LLM. While set, nothing is
+    # spoken, saved or printed (see game_logic.play_round and simulate.py).
+    policies: Optional[Dict[int, Callable]] = None
+
+    # The table's stream, and this hand's: seeded by the logged SHUFFLE seed, it deals the
+    # deck and is what anything sampling during the hand (policies included) should draw from.
+    table_rng: Optional[random.Random] = None
+    rng: Optional[random.Random] = None
+
+    # Built by from_round; anything that replaces a PlayerState has to track() the new one.
+    ledger: Optional[ChipLedger] = None
+    # Built by set_positions each hand.
+    ring: Optional[SeatRing] = None
+
+    _frozen_players: Optional[Dict[int, Player]] = field(default=None, init=False, repr=False, compare=False)
+
+    @staticmethod
+    def from_round(round: HoldemRound) -> 'RoundState':
+        state = RoundState(
+            phase=round.phase,
+            round_id=round.round_id,
+            date=round.date,
+            time=round.time,
+            pot_queue=PotQueueState.from_pot_queue(round.pot_queue),
+            actions=round.actions,
+            players={id: PlayerState.from_player(player) for id, player in round.players.items()},
+            seats=list(round.seats),
+            community_cards=tuple(round.community_cards),
+            seat_index_of_btn=round.seat_index_of_btn,
+            small_blind=round.small_blind,
+            big_blind=round.big_blind,
+            table_id=round.table_id,
+            table_rng=round.rng
+        )
+        in_stacks = sum(player.chips for player in state.players.values())
+        state.ledger = ChipLedger(in_stacks + state.pot_queue.total_amount, in_stacks, state.pot_queue.total_amount)
+        state.ledger.track(state.pot_queue, *state.players.values())
+        return state
+
+    # The previous snapshot's dict when no player has changed since, otherwise a new dict
+    # that still shares every unchanged Player.
+    def freeze_players(self) -> Dict[int, Player]:
+        frozen = self._frozen_players
+        if frozen is not None and len(frozen) == len(self.players) and \
+            all(frozen.get(id) is player._frozen for id, player in self.players.items()):
+            return frozen
+
+        frozen = self._frozen_players = {id: player.freeze() for id, player in self.players.items()}
+        return frozen
+
+    def freeze(self) -> HoldemRound:
+        return HoldemRound(
+            phase=self.phase,
+            round_id=self.round_id,
+            date=self.date,
+            time=self.time,
+            pot_queue=self.pot_queue.freeze(),
+            actions=self.actions,
+            players=self.freeze_players(),
+            seats=list(self.seats),
+            community_cards=list(self.community_cards),
+            seat_index_of_btn=self.seat_index_of_btn,
+            small_blind=self.small_blind,
+            big_blind=self.big_blind,
+            table_id=self.table_id,
+            rng=self.table_rng,
+            violations=tuple(self.ledger.violations) if self.ledger is not None else ()
+        )
@@ -0,0 +1,122 @@
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from constants import Providers
+
+# The model behind send_prompt, picked by configuration rather than by editing game_logic:
+#
+#   POKER_LLM_PROVIDER   openai (the default, for any OpenAI-compatible server), anthropic or ollama
+#   POKER_LLM_MODEL      else DEFAULT_MODELS[provider]
+#   POKER_LLM_BASE_URL   else the provider's own; ollama's is OLLAMA_BASE_URL
+#   POKER_LLM_API_KEY    else the SDK's usual variable (OPENAI_API_KEY, ANTHROPIC_API_KEY)
+#   POKER_LLM_TIMEOUT    seconds per attempt
+#   POKER_LLM_RETRIES    further attempts after a connection error, timeout, 429 or 5xx
+#
+# Each SDK client owns a keep-alive connection pool, so one client is built per config and kept
+# for the life of the process: every decision after the first reuses the open connection instead
+# of paying for DNS, TCP and TLS again. Retries back off inside the SDK.
+
+DEFAULT_MODELS = {
+    Providers.OPENAI: "gpt-4o",
+    Providers.ANTHROPIC: "claude-haiku-4-5",
+    Providers.OLLAMA: "llama3.1",
+}
+OLLAMA_BASE_URL = "http://localhost:11434/v1"
+
+@dataclass(frozen=True)
+class LLMConfig:
+    provider: str = Providers.OPENAI
+    model: str | None = None
+    base_url: str | None = None
+    api_key: str | None = None
+    timeout: float = 30.0
+    max_retries: int = 2
+    max_tokens: int = 200
+
+def config_from_env(environ=os.environ) -> LLMConfig:
+    defaults = LLMConfig()
+
+    def number(name, parse, default):
+        value = environ.get(name)
+        if not value:
+            return default
+        try:
+            parsed = parse(value)
+        except ValueError:
+            parsed = -1
+        if not parsed >= 0:
+            raise ValueError(f"{name} should be a non-negative {parse.__name__}, got {value!r}.")
+        return parsed
+
+    return LLMConfig(
+        provider=environ.get("POKER_LLM_PROVIDER", defaults.provider).lower(),
+        model=environ.get("POKER_LLM_MODEL") or None,
+        base_url=environ.get("POKER_LLM_BASE_URL") or None,
+        api_key=environ.get("POKER_LLM_API_KEY") or None,
+        timeout=number("POKER_LLM_TIMEOUT", float, defaults.timeout),
+        max_retries=number("POKER_LLM_RETRIES", int, defaults.max_retries),
+    )
+
+# The SDKs are imported by the backend that uses them, so headless runs and workers never load them
+# and only the chosen provider's needs installing.
+class Backend(ABC):
+    def __init__(self, config: LLMConfig):
+        self.config = config
+        self.model = config.model or DEFAULT_MODELS[config.provider]
+
+    @abstractmethod
+    def complete(self, prompt: str) -> str:
+        ...
+
+class OpenAIBackend(Backend):
+    def __init__(self, config: LLMConfig):
+        super().__init__(config)
+        from openai import OpenAI
+
+        base_url = config.base_url
+        api_key = config.api_key
+        if config.provider == Providers.OLLAMA:
+            base_url = base_url or OLLAMA_BASE_URL
+            # Ollama ignores the key, but the SDK won't go without one.
+            api_key = api_key or "ollama"
+        self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=config.timeout, max_retries=config.max_retries)
+
+    def complete(self, prompt: str) -> str:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            max_tokens=self.config.max_tokens,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return response.choices[0].message.content
+
+class AnthropicBackend(Backend):
+    def __init__(self, config: LLMConfig):
+        super().__init__(config)
+        import anthropic
+
+        self.client = anthropic.Anthropic(api_key=config.api_key, base_url=config.base_url, timeout=config.timeout, max_retries=config.max_retries)
+
+    def complete(self, prompt: str) -> str:
+        message = self.client.messages.create(
+            model=self.model,
+            max_tokens=self.config.max_tokens,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        return message.content[0].text
+
+BACKENDS = {
+    Providers.OPENAI: OpenAIBackend,
+    Providers.ANTHROPIC: AnthropicBackend,
+    Providers.OLLAMA: OpenAIBackend,
+}
+
+_backends = {}
+
+def get_backend(config: LLMConfig | None = None) -> Backend:
+    config = config or config_from_env()
+    if config.provider not in BACKENDS:
+        raise ValueError(f"Unknown LLM provider {config.provider!r}, expected one of {', '.join(BACKENDS)}.")
+    if config not in _backends:
+        _backends[config] = BACKENDS[config.provider](config)
+    return _backends[config]
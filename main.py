@@ -5,8 +5,10 @@ from game_structs import Personality, Player, HoldemRound, PotQueue
 from game_logic import play_round
 from constants import Positions, Phases
 
+import os
 import random
-from utils import shuffle, get_date, get_time, update
+import preflop
+from utils import RandomStream, shuffle, get_date, get_time, update
 
 def load_personalities(filename: str):
     with open(filename, 'r') as file:
@@ -44,14 +46,12 @@ def init_players(personalities: list[Personality]) -> list[Player]:
                 amount_in_street=0,
                 amount_in_round=0,
                 has_folded=False,
-                is_all_in=False,
-                prev_id=-1,
-                next_id=-1
+                is_all_in=False
             )
             players.append(p)
         return players
 
-def select_players(options: list[Player], count=6, ids:list[int]|None=None) -> dict[int, Player]:
+def select_players(options: list[Player], count=6, ids:list[int]|None=None, rng:random.Random|None=None) -> dict[int, Player]:
     selected_players = {}
 
     if ids != None:
@@ -61,7 +61,7 @@ def select_players(options: list[Player], count=6, ids:list[int]|None=None) -> d
                 selected_players[player.player_id] = player
 
         return selected_players
-    shuffle(options)
+    shuffle(options, rng if rng is not None else RandomStream())
 
 
     for i in range(count):
@@ -78,9 +78,14 @@ def populate_seats(round: HoldemRound) -> HoldemRound:
 
 
 if __name__ == "__main__":
+    # Before the first hand, not at the first preflop decision.
+    preflop.ensure_table(processes=os.cpu_count() or 1)
+
     personalities = load_personalities('characters.yaml')
     player_pool = init_players(personalities)
-    players = select_players(player_pool)
+    # One stream for the table: who sits down, then every hand's shuffle.
+    rng = RandomStream()
+    players = select_players(player_pool, rng=rng)
 
     for p in players:
         player = players[p]
@@ -100,7 +105,8 @@ if __name__ == "__main__":
         actions = [],
         players = players,
         seats = [],
-        community_cards = []
+        community_cards = [],
+        rng = rng
     )
 
     round = populate_seats(round)
@@ -1,6 +1,7 @@
 import type { PageServerLoad } from './$types';
 import { promises as fs } from 'fs';
 import path from 'path';
+import { decodeHistory } from './history';
 
 type Action = {
 	// define your actual structure here
@@ -13,7 +14,8 @@ export const load: PageServerLoad = async () => {
 	const savesDir: string = path.resolve('../saves');
 
 	const files: string[] = await fs.readdir(savesDir);
-	const jsonFiles: string[] = files.filter((f) => f.endsWith('.json'));
+	// .jsonl is the delta-encoded history; plain .json saves are from before it.
+	const jsonFiles: string[] = files.filter((f) => f.endsWith('.json') || f.endsWith('.jsonl'));
 
 	let items: Action[] = [];
 
@@ -24,7 +26,9 @@ export const load: PageServerLoad = async () => {
 		const filePath: string = path.join(savesDir, latestFile);
 		const fileContent: string = await fs.readFile(filePath, 'utf-8');
 
-		items = JSON.parse(fileContent) as Action[];
+		items = (
+			latestFile.endsWith('.jsonl') ? decodeHistory(fileContent) : JSON.parse(fileContent)
+		) as Action[];
 	}
 
 	// --- AUDIO ---
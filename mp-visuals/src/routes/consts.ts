@@ -77,7 +77,8 @@ export const PASSIVE_ACTIONS = {
 	RETURN: 'return',
 	SHOW: 'show',
 	FLIP: 'flip',
-	EXIT: 'exit'
+	EXIT: 'exit',
+	EQUITY: 'equity'
 };
 
 export const ACTIONS = {
@@ -99,7 +100,8 @@ export const ACTIONS = {
 	RETURN: 'return',
 	SHOW: 'show',
 	FLIP: 'flip',
-	EXIT: 'exit'
+	EXIT: 'exit',
+	EQUITY: 'equity'
 };
 
 export const IGNORED_ACTIONS = [ACTIONS.IS_POSITION, ACTIONS.DEALT, ACTIONS.FLIP];
@@ -130,7 +132,8 @@ export const PHRASES = {
 	RETURN: `${Grammar.OBJECT}, un-called, returns to ${Grammar.SUBJECT}.`,
 	SHOW: `${Grammar.SUBJECT} shows ${Grammar.OBJECT}.`,
 	FLIP: `${Grammar.SUBJECT} flips ${Grammar.OBJECT}.`,
-	EXIT: `${Grammar.SUBJECT} exits the table.`
+	EXIT: `${Grammar.SUBJECT} exits the table.`,
+	EQUITY: `${Grammar.SUBJECT} has ${Grammar.OBJECT} equity.`
 };
 
 export const DOLLAR_VALUE_PHRASES = [
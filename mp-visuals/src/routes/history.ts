@@ -0,0 +1,52 @@
+// Reader for the hand history files written by game_save.HistoryWriter (JSON Lines).
+// The first line is a header; each later line is one action carrying either its full
+// snapshot (a keyframe) or a snapshot_patch against the action before it.
+
+const HISTORY_FORMAT = 'mp-history';
+const HISTORY_VERSION = 1;
+const DELETED = '__deleted__';
+
+type JsonObject = Record<string, unknown>;
+
+function isObject(value: unknown): value is JsonObject {
+	return typeof value === 'object' && value !== null && !Array.isArray(value);
+}
+
+function applyPatch(old: JsonObject, patch: JsonObject): JsonObject {
+	const updated: JsonObject = { ...old };
+	for (const key of (patch[DELETED] as string[] | undefined) ?? []) {
+		delete updated[key];
+	}
+	for (const [key, value] of Object.entries(patch)) {
+		if (key === DELETED) continue;
+		const previous = updated[key];
+		updated[key] = isObject(value) && isObject(previous) ? applyPatch(previous, value) : value;
+	}
+	return updated;
+}
+
+// Every action with its full snapshot, in the same shape the old .json saves held.
+export function decodeHistory(text: string): JsonObject[] {
+	const lines = text.split('\n').filter((line) => line.trim() !== '');
+	if (lines.length === 0) return [];
+
+	const header = JSON.parse(lines[0]) as JsonObject;
+	if (header.format !== HISTORY_FORMAT || header.version !== HISTORY_VERSION) {
+		throw new Error(`Not a version ${HISTORY_VERSION} ${HISTORY_FORMAT} file.`);
+	}
+
+	const actions: JsonObject[] = [];
+	let snapshot: JsonObject = {};
+	for (const line of lines.slice(1)) {
+		const record = JSON.parse(line) as JsonObject;
+		if ('snapshot_patch' in record) {
+			snapshot = applyPatch(snapshot, record.snapshot_patch as JsonObject);
+			delete record.snapshot_patch;
+			record.snapshot = snapshot;
+		} else {
+			snapshot = record.snapshot as JsonObject;
+		}
+		actions.push(record);
+	}
+	return actions;
+}
@@ -19,8 +19,6 @@ export interface Player {
 	amount_in_round: number;
 	has_folded: boolean;
 	is_all_in: boolean;
-	prev_id: number;
-	next_id: number;
 }
 
 export interface Card {
@@ -51,6 +49,9 @@ export interface Snapshot {
 	seats: number[];
 	time: string;
 	subject_id: number;
+	seat_index_of_btn?: number;
+	small_blind?: number;
+	big_blind?: number;
 }
 
 export interface Action {
@@ -0,0 +1,164 @@
+import mmap
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from deck import Deck, Hand, Card
+from equity import Equity, get_pool, spawn_seeds
+from game_structs import HoldemRound
+from utils import write_atomic
+
+# Preflop equities of the 169 canonical starting hands against 1 to 9 random opponents,
+# i.e. for every table size in HoldemRound.POSITIONS_PER_PLAYERCOUNT.
+#
+# The 169 hands are laid out like the usual 13x13 grid, aces in the top left:
+# pairs on the diagonal, suited hands above it and offsuit hands below it.
+# Each cell stores win, tie and pot-share equity as uint16 fractions of 65535.
+
+TABLE_PATH = Path(__file__).parent / 'tables' / 'preflop.bin'
+MAGIC = b'MPPF'
+# 2: 2 to 10 players. Bumping it only makes load_table refuse older files; rebuilding is
+# up to ensure_table or `python preflop.py`.
+VERSION = 2
+# Magic, version, samples per cell, and the largest player count covered.
+HEADER = struct.Struct('<4sIII')
+
+PLAYER_COUNTS = sorted(HoldemRound.POSITIONS_PER_PLAYERCOUNT.keys())
+HAND_COUNT = 169
+FIELDS = 3
+SCALE = 65535
+
+# For every table built, on demand or by `python preflop.py` alike.
+DEFAULT_SAMPLES = 200000
+
+_table = None
+
+class PreflopTable:
+    def __init__(self, buffer, samples):
+        self.buffer = buffer
+        self.samples = samples
+        self.cells = memoryview(buffer)[HEADER.size:].cast('H')
+
+    def lookup(self, index: int, players: int) -> Equity:
+        offset = ((players - PLAYER_COUNTS[0]) * HAND_COUNT + index) * FIELDS
+        win, tie, share = self.cells[offset:offset + FIELDS]
+        return Equity(
+            win=win / SCALE,
+            tie=tie / SCALE,
+            lose=max(0, SCALE - win - tie) / SCALE,
+            equity=share / SCALE,
+            samples=self.samples
+        )
+
+def hand_index(hole_cards) -> int:
+    high, low = sorted(hole_cards, reverse=True)
+    row = 12 - Card.rank(high)
+    column = 12 - Card.rank(low)
+    if Card.suit(high) == Card.suit(low):
+        return row * 13 + column
+    return column * 13 + row
+
+def hand_name(index: int) -> str:
+    row, column = divmod(index, 13)
+    high = Deck.RANKS[12 - min(row, column)]
+    low = Deck.RANKS[12 - max(row, column)]
+    if row == column:
+        return f"{high}{low}"
+    return f"{high}{low}{'s' if row < column else 'o'}"
+
+# One concrete pair of hole cards for each grid cell.
+def representative(index: int) -> tuple[int, int]:
+    row, column = divmod(index, 13)
+    high = Deck.RANKS[12 - min(row, column)]
+    low = Deck.RANKS[12 - max(row, column)]
+    if row < column:
+        return Card.get(f"{high}s"), Card.get(f"{low}s")
+    return Card.get(f"{high}s"), Card.get(f"{low}h")
+
+def preflop_equity(hole_cards, players: int) -> Equity:
+    table = _table if _table is not None else load_table()
+    players = min(max(players, PLAYER_COUNTS[0]), PLAYER_COUNTS[-1])
+    return table.lookup(hand_index(hole_cards), players)
+
+# Never builds the table: that takes minutes, and from a pool worker or mid-hand it would
+# stall play and fork pools inside pools. ensure_table does it, once, up front.
+def load_table(path: Path = TABLE_PATH) -> PreflopTable:
+    global _table
+
+    if not path.exists():
+        raise FileNotFoundError(f"{path} is missing; build it with `python preflop.py`.")
+
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, samples, max_players = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        buffer.close()
+        raise ValueError(f"{path} is version {version}, this needs version {VERSION}; rebuild it with `python preflop.py`.")
+    if max_players != PLAYER_COUNTS[-1] or len(buffer) != HEADER.size + len(PLAYER_COUNTS) * HAND_COUNT * FIELDS * 2:
+        buffer.close()
+        raise ValueError(f"{path} covers up to {max_players} players, this needs {PLAYER_COUNTS[0]} to {PLAYER_COUNTS[-1]}; rebuild it with `python preflop.py`.")
+
+    _table = PreflopTable(buffer, samples)
+    return _table
+
+# For entry points, in the parent process before any pool forks: builds the table if it's
+# missing or out of date, then loads it so workers inherit the mapping.
+def ensure_table(path: Path = TABLE_PATH, processes: int = 1) -> PreflopTable:
+    try:
+        return load_table(path)
+    except (FileNotFoundError, ValueError):
+        generate_table(path, processes=processes)
+        return load_table(path)
+
+
+"""Table generation"""
+
+# Sampled (win, tie, share) for one starting hand at every table size.
+def simulate_hand(index: int, samples: int, seed: int) -> list[tuple[float, float, float]]:
+    rng = np.random.default_rng(seed)
+    hole_cards = representative(index)
+    deck = np.array([card for card in Deck.generate_deck() if card not in hole_cards], dtype=np.int64)
+
+    results = []
+    for players in PLAYER_COUNTS:
+        opponents = players - 1
+        needed = 5 + 2 * opponents
+        # A random permutation per sample, without replacement, all in one go.
+        drawn = deck[np.argsort(rng.random((samples, len(deck))), axis=1)[:, :needed]]
+        boards = drawn[:, :5]
+
+        hands = [np.broadcast_to(np.array(hole_cards), (samples, 2))]
+        hands += [drawn[:, 5 + 2 * i:7 + 2 * i] for i in range(opponents)]
+        cards = np.concatenate([np.concatenate([hand, boards], axis=1) for hand in hands])
+        strengths, _ = Hand.evaluate_batch(cards)
+        strengths = strengths.reshape(players, samples)
+
+        is_best = strengths == strengths.max(axis=0)
+        tied = is_best.sum(axis=0)
+        win = np.mean(is_best[0] & (tied == 1))
+        tie = np.mean(is_best[0] & (tied > 1))
+        share = np.mean(is_best[0] / tied)
+        results.append((float(win), float(tie), float(share)))
+    return results
+
+def generate_table(path: Path = TABLE_PATH, samples: int = DEFAULT_SAMPLES, seed: int | None = None, processes: int = 1):
+    seeds = spawn_seeds(seed, HAND_COUNT)
+
+    if processes > 1:
+        pool = get_pool(processes)
+        results = list(pool.map(simulate_hand, range(HAND_COUNT), [samples] * HAND_COUNT, seeds))
+    else:
+        results = [simulate_hand(index, samples, seeds[index]) for index in range(HAND_COUNT)]
+
+    cells = []
+    for player_index in range(len(PLAYER_COUNTS)):
+        for index in range(HAND_COUNT):
+            cells += [round(value * SCALE) for value in results[index][player_index]]
+
+    write_atomic(path, [HEADER.pack(MAGIC, VERSION, samples, PLAYER_COUNTS[-1]), struct.pack(f'<{len(cells)}H', *cells)])
+
+if __name__ == "__main__":
+    generate_table(processes=os.cpu_count() or 1)
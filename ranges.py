@@ -0,0 +1,207 @@
+import numpy as np
+
+from deck import Deck, Hand, Card
+from equity import Equity, get_pool, spawn_seeds
+
+# Hand ranges in the usual shorthand, comma separated:
+#
+#   AKs, AKo, AK    one starting hand; without s or o it means both
+#   QQ+, ATs+       pairs from QQ up, or the kicker from T up to one below the top card
+#   A2s-A5s, 22-55  a span of kickers under the same top card, or of pairs
+#   AhKh            one exact combo
+#   AKs:0.5         any of the above at a weight between 0 and 1
+#
+# A range is a dict of combo to weight, each combo a (high, low) pair of int cards in the
+# same order sorted() gives hole cards. Later tokens overwrite the weights of earlier ones.
+
+# Samples are drawn in batches this big, rejecting the deals where ranges hold the same card.
+BATCH = 4096
+# Batches in a row without one compatible deal before the ranges are deemed incompatible.
+MAX_EMPTY_BATCHES = 100
+
+CARD_INDICES = {card: i for i, card in enumerate(Card.TABLE)}
+
+def combo(cards) -> tuple[int, int]:
+    high, low = sorted(cards, reverse=True)
+    return high, low
+
+def starting_hand_combos(high: int, low: int, suited: bool | None) -> list[tuple[int, int]]:
+    combos = []
+    for high_suit in Card.SUIT_NAMES:
+        for low_suit in Card.SUIT_NAMES:
+            if high == low and high_suit <= low_suit:
+                continue
+            if suited is not None and high != low and (high_suit == low_suit) != suited:
+                continue
+            combos.append(combo((Card.encode(high, high_suit), Card.encode(low, low_suit))))
+    return combos
+
+# "AKs" -> (12, 11, True); "QQ" -> (10, 10, None)
+def parse_hand(token: str) -> tuple[int, int, bool | None]:
+    if len(token) not in (2, 3) or token[0] not in Deck.RANKS or token[1] not in Deck.RANKS:
+        raise ValueError(f"Unrecognized hand '{token}'.")
+
+    high, low = sorted((Deck.RANKS.index(token[0]), Deck.RANKS.index(token[1])), reverse=True)
+    suffix = token[2:]
+    if suffix not in ('', 's', 'o') or (high == low and suffix):
+        raise ValueError(f"Unrecognized hand '{token}'.")
+    return high, low, {'s': True, 'o': False}.get(suffix)
+
+def parse_token(token: str) -> list[tuple[int, int]]:
+    if len(token) == 4 and token[:2] in Card.INDEX and token[2:] in Card.INDEX:
+        cards = (Card.get(token[:2]), Card.get(token[2:]))
+        if cards[0] == cards[1]:
+            raise ValueError(f"Combo '{token}' holds the same card twice.")
+        return [combo(cards)]
+
+    if token.endswith('+'):
+        high, low, suited = parse_hand(token[:-1])
+        if high == low:
+            spans = [(rank, rank) for rank in range(low, 13)]
+        else:
+            spans = [(high, kicker) for kicker in range(low, high)]
+    elif '-' in token:
+        first, last = token.split('-')
+        high, low, suited = parse_hand(first)
+        other_high, other_low, other_suited = parse_hand(last)
+        if suited != other_suited or (high == low) != (other_high == other_low) or (high != low and high != other_high):
+            raise ValueError(f"Range '{token}' must span one kind of hand.")
+        lowest, highest = sorted((low, other_low))
+        if high == low:
+            spans = [(rank, rank) for rank in range(lowest, highest + 1)]
+        else:
+            spans = [(high, kicker) for kicker in range(lowest, highest + 1)]
+    else:
+        high, low, suited = parse_hand(token)
+        spans = [(high, low)]
+
+    return [c for span_high, span_low in spans for c in starting_hand_combos(span_high, span_low, suited)]
+
+def parse_range(text: str) -> dict[tuple[int, int], float]:
+    weights = {}
+    for token in text.replace(' ', '').split(','):
+        if not token:
+            continue
+        weight = 1.0
+        if ':' in token:
+            token, weight = token.split(':')
+            weight = float(weight)
+            if not 0 <= weight <= 1:
+                raise ValueError(f"Weight of '{token}' must be between 0 and 1, got {weight}.")
+        for c in parse_token(token):
+            weights[c] = weight
+    return weights
+
+# A range string, a range dict, or concrete hole cards (e.g. Player.hole_cards) as a one-combo range.
+def to_range(value) -> dict[tuple[int, int], float]:
+    if isinstance(value, str):
+        return parse_range(value)
+    if isinstance(value, dict):
+        return value
+    return {combo(value): 1.0}
+
+# Card removal against the board: combos sharing a card with it can't be held.
+def remove_dead(weights: dict, dead) -> dict[tuple[int, int], float]:
+    dead = set(dead)
+    return {c: weight for c, weight in weights.items() if weight > 0 and not dead.intersection(c)}
+
+# How much of all 1326 combos a range covers, by weight.
+def range_fraction(value) -> float:
+    return sum(to_range(value).values()) / 1326
+
+def sample_ranges(combo_indices, probabilities, community_cards, samples, seed):
+    rng = np.random.default_rng(seed)
+    table = np.array(Card.TABLE, dtype=np.int64)
+    board = np.array([CARD_INDICES[card] for card in community_cards], dtype=np.int64)
+    board_needed = 5 - len(board)
+    range_count = len(combo_indices)
+
+    wins = np.zeros(range_count)
+    ties = np.zeros(range_count)
+    shares = np.zeros(range_count)
+    accepted = 0
+    empty_batches = 0
+
+    while accepted < samples:
+        picks = [indices[rng.choice(len(indices), size=BATCH, p=p)] for indices, p in zip(combo_indices, probabilities)]
+
+        # Two ranges can't both hold a card; rejecting those deals is the card removal between ranges.
+        used = np.zeros(BATCH, dtype=np.uint64)
+        compatible = np.ones(BATCH, dtype=bool)
+        for hand in picks:
+            bits = (np.uint64(1) << hand[:, 0].astype(np.uint64)) | (np.uint64(1) << hand[:, 1].astype(np.uint64))
+            compatible &= (used & bits) == 0
+            used |= bits
+
+        count = min(int(compatible.sum()), samples - accepted)
+        if count == 0:
+            empty_batches += 1
+            if empty_batches >= MAX_EMPTY_BATCHES:
+                raise ValueError("The ranges share too many cards to ever be dealt together.")
+            continue
+        empty_batches = 0
+        picks = [hand[compatible][:count] for hand in picks]
+
+        # The rest of the board, from whatever no range or board card already holds.
+        keys = rng.random((count, 52))
+        rows = np.arange(count)[:, None]
+        for hand in picks:
+            keys[rows, hand] = 2
+        keys[:, board] = 2
+        runouts = np.argsort(keys, axis=1)[:, :board_needed]
+        boards = np.concatenate([np.broadcast_to(board, (count, len(board))), runouts], axis=1)
+
+        cards = np.concatenate([np.concatenate([hand, boards], axis=1) for hand in picks])
+        strengths, _ = Hand.evaluate_batch(table[cards])
+        strengths = strengths.reshape(range_count, count)
+
+        is_best = strengths == strengths.max(axis=0)
+        tied = is_best.sum(axis=0)
+        wins += (is_best & (tied == 1)).sum(axis=1)
+        ties += (is_best & (tied > 1)).sum(axis=1)
+        shares += (is_best / tied).sum(axis=1)
+        accepted += count
+
+    return wins, ties, shares
+
+# Equity of each of ranges against all the others, e.g. range_equity(["QQ+,AKs", "22+,ATs+:0.5"], board).
+# Each range can be a range string, a range dict or a player's hole cards.
+# Deals are sampled by combo weight, then the board is run out; with processes > 1
+# the sample budget is split across a process pool, one seeded stream per worker.
+def range_equity(ranges, community_cards=(), samples=100000, seed=None, processes=1) -> list[Equity]:
+    community_cards = tuple(community_cards)
+    if len(ranges) < 2:
+        raise ValueError(f"Equity needs at least two ranges, got {len(ranges)}.")
+
+    combo_indices = []
+    probabilities = []
+    for value in ranges:
+        weights = remove_dead(to_range(value), community_cards)
+        if not weights:
+            raise ValueError(f"Range {value!r} has no combos left on {Card.repr_list(community_cards)}.")
+        combo_indices.append(np.array([[CARD_INDICES[card] for card in c] for c in weights], dtype=np.int64))
+        total = sum(weights.values())
+        probabilities.append(np.array([weight / total for weight in weights.values()]))
+
+    processes = max(1, min(processes, samples))
+    seeds = spawn_seeds(seed, processes)
+    budgets = [samples // processes + (1 if i < samples % processes else 0) for i in range(processes)]
+
+    if processes == 1:
+        results = [sample_ranges(combo_indices, probabilities, community_cards, samples, seeds[0])]
+    else:
+        futures = [get_pool(processes).submit(sample_ranges, combo_indices, probabilities, community_cards, budget, worker_seed) \
+            for budget, worker_seed in zip(budgets, seeds)]
+        results = [future.result() for future in futures]
+
+    wins = sum(result[0] for result in results)
+    ties = sum(result[1] for result in results)
+    shares = sum(result[2] for result in results)
+
+    return [Equity(
+        win=float(wins[i] / samples),
+        tie=float(ties[i] / samples),
+        lose=float((samples - wins[i] - ties[i]) / samples),
+        equity=float(shares[i] / samples),
+        samples=samples
+    ) for i in range(len(ranges))]
@@ -0,0 +1,161 @@
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from constants import Actions, Phases
+from deck import Card
+from game_save import HistoryReader
+from game_structs import Action, HoldemRound, Personality, Player, Pot, PotQueue, Snapshot
+
+# Replays saved hand histories (see game_save.py) as engine state.
+#
+# Opening a save reads every line once, but only to index it: which hand each action belongs to,
+# its kind and its phase. Nothing is decoded until asked for. Seeking to an action then rebuilds
+# its snapshot from the nearest keyframe at or before it, so at most keyframe_interval - 1 patches
+# away, and reading on from there applies one patch per action.
+
+# Snapshot keys as json.dumps writes them. Quotes inside string values are escaped, so none of
+# these can match inside a name, a quote or a thought. A patch only carries a key that changed.
+ROUND_ID = re.compile(rb'"round_id": (-?\d+)')
+PHASE = re.compile(rb'"phase": "([^"]*)"')
+ACTION = re.compile(rb'"action": "([^"]*)"')
+
+@dataclass(frozen=True)
+class Hand:
+    round_id: int
+    # Its actions are start to stop - 1, in file order.
+    start: int
+    stop: int
+    # The first action at showdown, -1 if everyone else folded.
+    showdown: int
+
+def cards_from_dicts(cards: list[dict]) -> tuple[int, ...]:
+    return tuple(Card.from_dict(card) for card in cards)
+
+def player_from_dict(data: dict) -> Player:
+    return Player(**{**data, 'personality': Personality(**data['personality']), 'hole_cards': cards_from_dicts(data['hole_cards'])})
+
+def pot_queue_from_dict(data: dict) -> PotQueue:
+    return PotQueue(
+        ids_to_bets={int(id): amount for id, amount in data['ids_to_bets'].items()},
+        total_amount=data['total_amount'],
+        right_pots=[pot_from_dict(pot) for pot in data['right_pots']]
+    )
+
+def pot_from_dict(data: dict) -> Pot:
+    return Pot(ids_involved=data['ids_involved'], winning_card_set=list(cards_from_dicts(data['winning_card_set'])), amount=data['amount'])
+
+# Back from the JSON shape: int keys, int cards, and the dataclasses.
+def snapshot_from_dict(data: dict, action: str) -> Snapshot:
+    typed_object = data['typed_object']
+    if action in Actions.CARDS_INVOLVED:
+        typed_object = cards_from_dicts(typed_object)
+    return Snapshot(
+        typed_object=typed_object,
+        phase=data['phase'],
+        round_id=data['round_id'],
+        pot_queue=pot_queue_from_dict(data['pot_queue']),
+        community_cards=cards_from_dicts(data['community_cards']),
+        players={int(id): player_from_dict(player) for id, player in data['players'].items()},
+        seats=data['seats'],
+        time=data['time'],
+        subject_id=data['subject_id'],
+        seat_index_of_btn=data.get('seat_index_of_btn', -1),
+        small_blind=data.get('small_blind'),
+        big_blind=data.get('big_blind')
+    )
+
+class Replay:
+    def __init__(self, path: Path):
+        self.history = HistoryReader(path)
+        self.date = self.history.header.get('date')
+
+        # Per action, in file order.
+        self.round_ids = []
+        self.phases = []
+        self.kinds = []
+        # Per hand, in file order, and by round_id.
+        self.hands = []
+        self.hand_by_round_id = {}
+
+        round_id = None
+        phase = None
+        with open(path, 'rb') as f:
+            f.readline()
+            for line in f:
+                # The action's fields come before its snapshot, so the first match is its own.
+                kind = ACTION.search(line).group(1).decode()
+                match = ROUND_ID.search(line)
+                if match:
+                    round_id = int(match.group(1))
+                match = PHASE.search(line)
+                if match:
+                    phase = match.group(1).decode()
+                self.round_ids.append(round_id)
+                self.phases.append(phase)
+                self.kinds.append(kind)
+
+        # A hand is a run of actions with one round_id.
+        start = 0
+        for index in range(1, len(self) + 1):
+            if index < len(self) and self.round_ids[index] == self.round_ids[start]:
+                continue
+            phases = self.phases[start:index]
+            showdown = start + phases.index(Phases.SHOWDOWN) if Phases.SHOWDOWN in phases else -1
+            self.hands.append(Hand(self.round_ids[start], start, index, showdown))
+            start = index
+        self.hand_by_round_id = {hand.round_id: hand for hand in self.hands}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def hand(self, round_id: int) -> Hand:
+        return self.hand_by_round_id[round_id]
+
+    def action(self, index: int) -> Action:
+        record = self.history[index]
+        return Action(
+            action_hash=record['action_hash'],
+            subject_type=record['subject_type'],
+            subject=record['subject'],
+            action=record['action'],
+            object=record['object'],
+            snapshot=snapshot_from_dict(record['snapshot'], record['action'])
+        )
+
+    # The round as it stood right after action index. Its actions are the hand's so far, unless
+    # with_actions is False, which skips rebuilding them for jobs that only read the state.
+    def state(self, index: int, with_actions=True) -> HoldemRound:
+        if index < 0:
+            index += len(self)
+        hand = self.hand(self.round_ids[index])
+        actions = [self.action(i) for i in range(hand.start, index + 1)] if with_actions else [self.action(index)]
+        snapshot = actions[-1].snapshot
+        return HoldemRound(
+            phase=snapshot.phase,
+            round_id=snapshot.round_id,
+            date=self.date,
+            time=snapshot.time,
+            pot_queue=snapshot.pot_queue,
+            actions=actions if with_actions else [],
+            players=snapshot.players,
+            seats=snapshot.seats,
+            community_cards=list(snapshot.community_cards),
+            seat_index_of_btn=snapshot.seat_index_of_btn,
+            small_blind=snapshot.small_blind if snapshot.small_blind is not None else HoldemRound.SMALL_BLIND,
+            big_blind=snapshot.big_blind if snapshot.big_blind is not None else HoldemRound.BIG_BLIND
+        )
+
+    # The hand's state after its last action.
+    def seek_hand(self, round_id: int, with_actions=True) -> HoldemRound:
+        return self.state(self.hand(round_id).stop - 1, with_actions)
+
+    def find(self, kind: str) -> list[int]:
+        return [i for i, k in enumerate(self.kinds) if k == kind]
+
+    # Every hand that went to showdown, as it stood when it got there: the board out, the pots
+    # not yet paid.
+    def showdowns(self, with_actions=False):
+        for hand in self.hands:
+            if hand.showdown != -1:
+                yield self.state(hand.showdown, with_actions)
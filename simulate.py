@@ -0,0 +1,361 @@
+import collections
+import os
+import time
+import traceback
+from dataclasses import dataclass, field
+
+from game_structs import HoldemRound, Personality, Player, PotQueue, PlayerState, RoundState
+from game_logic import play_round
+from constants import Actions, Phases, Positions
+from equity import get_pool, spawn_seeds
+import evaluator
+from evaluator import HandState
+from main import load_personalities, init_players, select_players
+from preflop import ensure_table, preflop_equity
+from utils import RandomStream, get_date, get_time, update
+
+# Headless simulation: the same play_round the LLM games use, with pure-Python policies
+# deciding in place of send_prompt, and no speech, saves or printing.
+#
+# A policy is called as policy(round, player, highest_bet, min_raise, hand_state) and answers
+# like the ACTION line of a prompt reply, e.g. "check", "call", "fold", "bet 4", "raise 6" or "all in".
+# hand_state is the player's evaluator.HandState from the flop on, None preflop. Anything random
+# draws from round.rng, the hand's stream, so a hand plays out the same from its SHUFFLE seed.
+
+def to_call(player: PlayerState, highest_bet: int) -> int:
+    return highest_bet - player.amount_in_street
+
+def check_or_call(player: PlayerState, highest_bet: int) -> str:
+    return "call" if to_call(player, highest_bet) > 0 else "check"
+
+def calling_station(round: RoundState, player: PlayerState, highest_bet: int, min_raise: int, hand_state: HandState | None) -> str:
+    return check_or_call(player, highest_bet)
+
+def maniac(round: RoundState, player: PlayerState, highest_bet: int, min_raise: int, hand_state: HandState | None) -> str:
+    return "all in"
+
+def random_policy(round: RoundState, player: PlayerState, highest_bet: int, min_raise: int, hand_state: HandState | None) -> str:
+    roll = round.rng.random()
+    if roll < 0.15:
+        return "fold" if to_call(player, highest_bet) > 0 else "check"
+    if roll < 0.65:
+        return check_or_call(player, highest_bet)
+    if roll < 0.95:
+        verb = "raise" if highest_bet > 0 else "bet"
+        return f"{verb} {int(min_raise * round.rng.choice([1, 2, 3]))}"
+    return "all in"
+
+# Plays its equity: preflop from the table, after that from the made hand.
+def tight_aggressive(round: RoundState, player: PlayerState, highest_bet: int, min_raise: int, hand_state: HandState | None) -> str:
+    live = sum(1 for p in round.players.values() if not p.has_folded)
+    if hand_state is None:
+        strength = preflop_equity(player.hole_cards, live).equity * live
+    else:
+        strength = 0.5 + hand_state.category() / 2 + 0.25 * len(hand_state.draws())
+
+    verb = "raise" if highest_bet > 0 else "bet"
+    if strength > 1.5:
+        return f"{verb} {int(min_raise * 2)}"
+    if strength > 1 or to_call(player, highest_bet) == 0:
+        return check_or_call(player, highest_bet)
+    return "fold"
+
+POLICIES = {
+    'calling_station': calling_station,
+    'maniac': maniac,
+    'random': random_policy,
+    'tight_aggressive': tight_aggressive
+}
+
+@dataclass(frozen=True)
+class SimulationResult:
+    hands: int
+    sessions: int
+    seconds: float
+    hands_per_second: float
+    # Per seat, keyed "<seat> <policy name>".
+    net_chips: dict[str, int]
+    pots_won: dict[str, int]
+    busts: dict[str, int]
+    showdowns: int
+    # The engine's chip violations and exceptions, by the seed of the hand they came from.
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+def policy_name(policy) -> str:
+    for name, known in POLICIES.items():
+        if known is policy:
+            return name
+    return getattr(policy, '__name__', str(policy))
+
+def new_session(names: list[str]) -> HoldemRound:
+    players = {}
+    for seat, name in enumerate(names):
+        personality = Personality(seat, 0, name, '', '', [])
+        players[seat] = Player(
+            player_id=seat,
+            name=name,
+            position=Positions.NONE,
+            personality=personality,
+            hole_cards=[],
+            chips=HoldemRound.MAX_BUY_IN,
+            amount_in_street=0,
+            amount_in_round=0,
+            has_folded=False,
+            is_all_in=False
+        )
+
+    return HoldemRound(
+        phase=Phases.GAME_START,
+        round_id=0,
+        date=get_date(),
+        time=get_time(),
+        pot_queue=PotQueue({}, 0, []),
+        actions=[],
+        players=players,
+        seats=list(players.keys()),
+        community_cards=[]
+    )
+
+# Plays n_hands with one policy per seat (2 to 10 seats; names from POLICIES or callables).
+# Like main.py, a session runs until one player has every chip; then every seat buys back in.
+def simulate(n_hands: int, policies: list, seed: int | None = None) -> SimulationResult:
+    policies = [POLICIES[policy] if isinstance(policy, str) else policy for policy in policies]
+    if not 2 <= len(policies) <= HoldemRound.MAX_SEATS:
+        raise ValueError(f"Expected 2 to {HoldemRound.MAX_SEATS} policies, got {len(policies)}.")
+
+    names = [f"{seat} {policy_name(policy)}" for seat, policy in enumerate(policies)]
+    by_id = dict(enumerate(policies))
+    rng = RandomStream(seed)
+
+    net_chips = {name: 0 for name in names}
+    pots_won = {name: 0 for name in names}
+    busts = {name: 0 for name in names}
+    showdowns = 0
+    errors = []
+    sessions = 1
+
+    round = new_session(names)
+    start = time.perf_counter()
+    for _ in range(n_hands):
+        if len(round.players) < 2:
+            round = new_session(names)
+            sessions += 1
+
+        hand_seed = rng.getrandbits(63)
+        before = {id: player.chips for id, player in round.players.items()}
+
+        # Only this hand's actions are kept; nothing headless reads further back.
+        round = update(round, pot_queue=PotQueue({}, 0, []), community_cards=[], actions=[], round_id=round.round_id + 1)
+        try:
+            round = play_round(round, policies={id: by_id[id] for id in round.players}, seed=hand_seed)
+        except Exception:
+            errors.append((hand_seed, traceback.format_exc(limit=-3)))
+            round = new_session(names)
+            sessions += 1
+            continue
+
+        errors.extend((hand_seed, str(violation)) for violation in round.violations)
+
+        for id, chips in before.items():
+            player = round.players.get(id)
+            net_chips[names[id]] += (player.chips if player else 0) - chips
+            if player is None:
+                busts[names[id]] += 1
+
+        for action in round.actions:
+            if action.action in (Actions.COLLECT, Actions.COLLECT_SIDE):
+                pots_won[names[action.snapshot.subject_id]] += 1
+        showdowns += any(action.action == Actions.SHOW for action in round.actions)
+
+    seconds = time.perf_counter() - start
+    return SimulationResult(
+        hands=n_hands,
+        sessions=sessions,
+        seconds=seconds,
+        hands_per_second=n_hands / seconds if seconds else 0.0,
+        net_chips=net_chips,
+        pots_won=pots_won,
+        busts=busts,
+        showdowns=showdowns,
+        errors=errors
+    )
+
+
+"""Sessions"""
+
+# Many sessions of the main.py loop at once: pick characters, play until one has every chip.
+# Each session is independent and seeded on its own, so they spread over a process pool and
+# any one of them can be replayed alone from its seed.
+
+CHARACTERS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'characters.yaml')
+
+# Stand-in policies for the LLM, from the words in each character's playstyle.
+def playstyle_policy(playstyle: str):
+    playstyle = playstyle.lower()
+    if 'calling station' in playstyle or 'whale' in playstyle:
+        return calling_station
+    if 'aggressive' in playstyle:
+        return maniac if 'loose' in playstyle else tight_aggressive
+    if 'passive' in playstyle or 'cautious' in playstyle:
+        return tight_aggressive if 'tight' in playstyle else calling_station
+    return random_policy
+
+@dataclass(frozen=True)
+class SessionResult:
+    seed: int
+    hands: int
+    # Character names, winner first; players busting on the same hand are ordered by the chips they started it with.
+    finishing_order: list[str]
+    # Per character, chips after every hand, 0 once busted.
+    trajectories: dict[str, list[int]]
+    # False if max_hands ran out first; the order of those still seated is then by chips.
+    finished: bool
+    error: str | None = None
+
+@dataclass(frozen=True)
+class SessionSummary:
+    sessions: int
+    hands: int
+    seconds: float
+    sessions_per_second: float
+    hands_per_session: list[int]
+    # Per character: how often it finished in each place (1 is the winner), and its mean place.
+    finishes: dict[str, collections.Counter]
+    mean_finish: dict[str, float]
+    wins: dict[str, int]
+    unfinished: int
+    # Every session's chip trajectories, in seed order; empty unless asked for.
+    trajectories: list[dict[str, list[int]]]
+    # Sessions where the engine raised: (session seed, description).
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+# One session from its seed. policies maps character names to a policy (or POLICIES name);
+# everyone else plays playstyle_policy of their playstyle.
+def play_session(seed: int, personalities: list[Personality], count=6, policies: dict | None = None, max_hands=10000) -> SessionResult:
+    rng = RandomStream(seed)
+    ids = rng.sample([personality.id for personality in personalities], count)
+    players = select_players(init_players(personalities), ids=ids)
+
+    by_id = {}
+    for id, player in players.items():
+        policy = (policies or {}).get(player.name) or playstyle_policy(player.personality.style)
+        by_id[id] = POLICIES[policy] if isinstance(policy, str) else policy
+
+    round = HoldemRound(
+        phase=Phases.GAME_START,
+        round_id=0,
+        date=get_date(),
+        time=get_time(),
+        pot_queue=PotQueue({}, 0, []),
+        actions=[],
+        players=players,
+        seats=list(players.keys()),
+        community_cards=[]
+    )
+
+    names = {id: player.name for id, player in players.items()}
+    trajectories = {name: [] for name in names.values()}
+    busted = []
+    error = None
+    while len(round.players) > 1 and round.round_id < max_hands:
+        before = {id: player.chips for id, player in round.players.items()}
+        round = update(round, pot_queue=PotQueue({}, 0, []), community_cards=[], actions=[], round_id=round.round_id + 1)
+        try:
+            round = play_round(round, policies={id: by_id[id] for id in round.players}, seed=rng.getrandbits(63))
+        except Exception:
+            error = traceback.format_exc(limit=-3)
+            break
+
+        for id, name in names.items():
+            player = round.players.get(id)
+            trajectories[name].append(player.chips if player else 0)
+        out = [id for id in before if id not in round.players]
+        busted.extend(sorted(out, key=lambda id: before[id]))
+
+    standing = sorted(round.players, key=lambda id: round.players[id].chips, reverse=True)
+    return SessionResult(
+        seed=seed,
+        hands=round.round_id,
+        finishing_order=[names[id] for id in standing + busted[::-1]],
+        trajectories=trajectories,
+        finished=len(round.players) == 1,
+        error=error
+    )
+
+def play_sessions(seeds: list[int], personalities: list[Personality], count: int, policies: dict | None, max_hands: int) -> list[SessionResult]:
+    return [play_session(seed, personalities, count, policies, max_hands) for seed in seeds]
+
+# Plays n_sessions across a process pool and merges them, e.g. run_sessions(20000, seed=0).
+# Sessions go out in chunks to keep the pickling per session small; the results only depend
+# on seed, never on processes or chunk_size.
+def run_sessions(n_sessions: int, seed: int | None = None, processes: int | None = None, count=6,
+        policies: dict | None = None, max_hands=10000, keep_trajectories=False, chunk_size=16,
+        characters=CHARACTERS) -> SessionSummary:
+    personalities = load_personalities(characters)
+    if not 2 <= count <= min(len(personalities), HoldemRound.MAX_SEATS):
+        raise ValueError(f"Expected 2 to {HoldemRound.MAX_SEATS} players per session, got {count}.")
+
+    processes = max(1, min(processes or os.cpu_count() or 1, n_sessions))
+    seeds = spawn_seeds(seed, n_sessions)
+    chunks = [seeds[i:i + chunk_size] for i in range(0, n_sessions, chunk_size)]
+
+    # Here, before the pool forks, so no worker builds either table or races another one to it.
+    evaluator.load_tables()
+    ensure_table(processes=processes)
+
+    start = time.perf_counter()
+    if processes == 1:
+        results = [play_sessions(chunk, personalities, count, policies, max_hands) for chunk in chunks]
+    else:
+        futures = [get_pool(processes).submit(play_sessions, chunk, personalities, count, policies, max_hands) for chunk in chunks]
+        results = [future.result() for future in futures]
+    seconds = time.perf_counter() - start
+
+    finishes = collections.defaultdict(collections.Counter)
+    hands_per_session = []
+    trajectories = []
+    errors = []
+    unfinished = 0
+    for result in (result for chunk in results for result in chunk):
+        hands_per_session.append(result.hands)
+        if result.error is not None:
+            errors.append((result.seed, result.error))
+            continue
+        unfinished += not result.finished
+        for place, name in enumerate(result.finishing_order, start=1):
+            finishes[name][place] += 1
+        if keep_trajectories:
+            trajectories.append(result.trajectories)
+
+    return SessionSummary(
+        sessions=n_sessions,
+        hands=sum(hands_per_session),
+        seconds=seconds,
+        sessions_per_second=n_sessions / seconds if seconds else 0.0,
+        hands_per_session=hands_per_session,
+        finishes=dict(finishes),
+        mean_finish={name: sum(place * n for place, n in places.items()) / places.total() for name, places in finishes.items()},
+        wins={name: places[1] for name, places in finishes.items()},
+        unfinished=unfinished,
+        trajectories=trajectories,
+        errors=errors
+    )
+
+if __name__ == "__main__":
+    ensure_table(processes=os.cpu_count() or 1)
+    result = simulate(10000, ['tight_aggressive', 'calling_station', 'random', 'random', 'maniac', 'tight_aggressive'], seed=0)
+    print(f"{result.hands} hands in {result.seconds:.1f}s ({result.hands_per_second:,.0f} hands/sec), {result.sessions} sessions")
+    for name in result.net_chips:
+        print(f"  {name:<20} net {result.net_chips[name]:>+9}  pots {result.pots_won[name]:>6}  busts {result.busts[name]:>5}")
+    print(f"{len(result.errors)} errors")
+    for hand_seed, description in result.errors[:5]:
+        print(f"  seed {hand_seed}: {description}")
+
+    summary = run_sessions(2000, seed=0)
+    print(f"{summary.sessions} sessions, {summary.hands} hands in {summary.seconds:.1f}s ({summary.sessions_per_second:,.0f} sessions/sec)")
+    for name, mean_finish in sorted(summary.mean_finish.items(), key=lambda item: item[1]):
+        played = summary.finishes[name].total()
+        print(f"  {name:<24} mean place {mean_finish:.2f}  won {summary.wins[name]:>5} of {played:>5}")
+    print(f"{summary.unfinished} unfinished, {len(summary.errors)} errors")
+    for session_seed, description in summary.errors[:5]:
+        print(f"  seed {session_seed}: {description}")
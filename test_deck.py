@@ -0,0 +1,669 @@
+import collections
+import itertools
+import math
+import os
+import random
+import sys
+import time
+import types
+
+import numpy as np
+import pytest
+
+from deck import Deck, Hand, Card
+import evaluator
+import llm
+from utils import write_atomic
+import ranges
+from equity import enumerate_equity, estimate_equity
+import preflop
+from game_structs import Player, Personality, HoldemRound, SeatRing
+
+# Frequencies of each category over all five-card hands.
+HAND_PROBABILITIES = \
+{
+    "royal flush": 0.00000154,
+    "straight flush": 0.0000139,
+    "four of a kind": 0.0002401,
+    "full house": 0.001441,
+    "flush": 0.001965,
+    "straight": 0.003925,
+    "three of a kind": 0.021128,
+    "two pair": 0.047539,
+    "one pair": 0.422569,
+    "high card": 0.501177
+}
+
+NAMES = ["Ben", "Carol", "Sasha", "Kevin", "Cory", "Amy"]
+
+def make_players(hole_card_array):
+    personality = Personality(0, 0, "Tester", "", "", [])
+    return [Player(player_id=i, name=NAMES[i], position='', personality=personality,
+            hole_cards=hole_cards, chips=HoldemRound.MAX_BUY_IN, amount_in_street=0, amount_in_round=0,
+            has_folded=False, is_all_in=False) \
+        for i, hole_cards in enumerate(hole_card_array)]
+
+def cards(names):
+    return [Card.get(name) for name in names.split()]
+
+# Random hands as a (samples, size) array, each row drawn without replacement.
+def sample_hands(samples, seed, size=5):
+    rng = np.random.default_rng(seed)
+    deck = np.array(Deck.generate_deck(), dtype=np.int64)
+    return deck[np.argsort(rng.random((samples, len(deck))), axis=1)[:, :size]]
+
+# Observed counts within 5 standard deviations of the expected count, per category.
+def assert_frequencies(counts, samples):
+    for index, hand_id in enumerate(Hand.HANDS):
+        p = HAND_PROBABILITIES[hand_id]
+        expected = p * samples
+        tolerance = 5 * (expected * (1 - p)) ** 0.5 + 1
+        assert abs(counts[index] - expected) <= tolerance, \
+            f"{hand_id}: expected {expected:.1f}, got {counts[index]}"
+
+
+"""Brute-force reference"""
+
+# Independent of the evaluator tables: (category, tie-breaking ranks) for exactly five cards.
+def reference_five(five):
+    ranks = sorted((Card.rank(card) for card in five), reverse=True)
+    is_flush = len(set(Card.suit(card) for card in five)) == 1
+
+    distinct = sorted(set(ranks), reverse=True)
+    straight_high = None
+    if len(distinct) == 5 and distinct[0] - distinct[4] == 4:
+        straight_high = distinct[0]
+    elif distinct == [12, 3, 2, 1, 0]:
+        straight_high = 3
+
+    groups = sorted(collections.Counter(ranks).items(), key=lambda group: (group[1], group[0]), reverse=True)
+    shape = [count for _, count in groups]
+    by_count = [rank for rank, _ in groups]
+
+    if straight_high is not None and is_flush:
+        return (9 if straight_high == 12 else 8, [straight_high])
+    if shape == [4, 1]:
+        return (7, by_count)
+    if shape == [3, 2]:
+        return (6, by_count)
+    if is_flush:
+        return (5, ranks)
+    if straight_high is not None:
+        return (4, [straight_high])
+    if shape == [3, 1, 1]:
+        return (3, by_count)
+    if shape == [2, 2, 1]:
+        return (2, by_count)
+    if shape == [2, 1, 1, 1]:
+        return (1, by_count)
+    return (0, ranks)
+
+# Best of all 21 five-card combinations of seven cards.
+def reference_best(cards):
+    return max(reference_five(five) for five in itertools.combinations(cards, 5))
+
+
+"""Correctness"""
+
+def test_probabilities_sum_to_one():
+    assert sum(HAND_PROBABILITIES.values()) == pytest.approx(1, abs=1e-4)
+    assert set(HAND_PROBABILITIES) == set(Hand.HANDS)
+
+@pytest.mark.parametrize("hole_card_array, community_cards, winners, hand_id", [
+    # Aces up with a five beats aces with a king kicker.
+    (["Ah Kd", "5d Ad"], "Qh 3d 5c 8c As", ["Carol"], "two pair"),
+    # The wheel is the lowest straight.
+    (["Ah 2c", "6h 7c"], "3d 4s 5c Kd Qh", ["Carol"], "straight"),
+    # The board plays for everyone.
+    (["2c 3d", "4h 7c", "8s 9s"], "Ts Js Qs Ks As", ["Ben", "Carol", "Sasha"], "royal flush"),
+    # Only the best kicker counts; the fifth card of two pair decides.
+    (["Kc 4d", "Qh 3c"], "Ad Ac 8h 8d 2s", ["Ben"], "two pair"),
+    # A third pair is no better than a kicker.
+    (["Qc Tc", "Qd 3c"], "Kd Ks Qh 9h 3s", ["Ben"], "two pair"),
+    # Two threes make a full house of the higher over the lower.
+    (["9c 9d", "Ah Kh"], "9h 5c 5d 5h Ad", ["Ben"], "full house"),
+    # Same straight on both sides is a chop.
+    (["9c 2d", "9h 3h"], "5s 6d 7c 8h Kd", ["Ben", "Carol"], "straight"),
+])
+def test_specific_result(hole_card_array, community_cards, winners, hand_id):
+    players = make_players([cards(hole_cards) for hole_cards in hole_card_array])
+    hands = Hand.find_winners(players, cards(community_cards))
+
+    assert [hand.player.name for hand in hands] == winners
+    assert all(hand.hand_id == hand_id for hand in hands)
+
+def test_strengths_match_brute_force():
+    rng = random.Random(0)
+    by_reference = {}
+    for _ in range(3000):
+        seven = Deck().shuffle(rng).deal(7)
+        reference = reference_best(seven)
+        strength = Hand.evaluate(seven)
+
+        assert evaluator.category(strength) == reference[0]
+        assert by_reference.setdefault(tuple(reference[1]) + (reference[0],), strength) == strength
+
+    # Strengths order hands exactly as the reference does.
+    ordered = sorted(by_reference.items(), key=lambda item: (item[0][-1], item[0][:-1]))
+    strengths = [strength for _, strength in ordered]
+    assert strengths == sorted(set(strengths))
+
+def test_classify_matches_brute_force():
+    rng = random.Random(1)
+    for _ in range(2000):
+        seven = Deck().shuffle(rng).deal(7)
+        hand = Hand.classify(seven)
+        reference = reference_best(seven)
+
+        assert len(hand.cards) == 5
+        assert set(hand.cards) <= set(seven)
+        assert Hand.HANDS.index(hand.hand_id) == reference[0]
+        assert reference_five(hand.cards) == reference
+
+def test_find_winners_matches_brute_force():
+    rng = random.Random(2)
+    for _ in range(500):
+        deck = Deck().shuffle(rng)
+        players = make_players([deck.deal(2) for _ in range(6)])
+        community_cards = deck.deal(5)
+
+        references = [reference_best(player.hole_cards + community_cards) for player in players]
+        expected = [player.name for player, reference in zip(players, references) if reference == max(references)]
+
+        assert [hand.player.name for hand in Hand.find_winners(players, community_cards)] == expected
+
+def test_batch_matches_scalar():
+    hands = sample_hands(2000, seed=3, size=7)
+    strengths, categories = Hand.evaluate_batch(hands)
+    for row, strength, category in zip(hands.tolist(), strengths.tolist(), categories.tolist()):
+        assert Hand.evaluate(row) == strength
+        assert evaluator.category(strength) == category
+
+def test_category_frequencies():
+    samples = 500000
+    _, categories = Hand.evaluate_batch(sample_hands(samples, seed=4))
+    assert_frequencies(np.bincount(categories, minlength=len(Hand.HANDS)), samples)
+
+def test_classify_frequencies():
+    samples = 50000
+    rng = random.Random(5)
+    counts = collections.Counter(Hand.classify(Deck().shuffle(rng).deal(5)).hand_id for _ in range(samples))
+    assert_frequencies([counts[hand_id] for hand_id in Hand.HANDS], samples)
+
+def test_benchmarks_run():
+    assert benchmark_classify(hands=1000) > 0
+    assert benchmark_find_winners(rounds=200) > 0
+
+def test_cached_classify_matches_uncached():
+    rng = random.Random(6)
+    deals = [Deck().shuffle(rng).deal(7) for _ in range(200)]
+    players = make_players([seven[:2] for seven in deals[:6]])
+    evaluator.cache.resize(1 << 10)
+    try:
+        for _ in range(2):
+            for i, seven in enumerate(deals):
+                player = players[i % len(players)]
+                hand = Hand.classify(seven, player)
+                expected = Hand.classify_uncached(seven, player)
+                assert (hand.player, hand.hand_id, hand.cards, hand.strength, hand.key) == \
+                    (player, expected.hand_id, expected.cards, expected.strength, expected.key)
+        assert evaluator.cache.stats()['hits'] == len(deals)
+    finally:
+        evaluator.cache.resize(0)
+        evaluator.cache.clear()
+
+# Repeated hands are where the cache pays; the margin is wide enough not to flake.
+def test_cache_speeds_up_repeated_hands():
+    uncached = benchmark_classify(hands=20000, distinct=200)
+    cached = benchmark_classify(hands=20000, distinct=200, maxsize=1 << 10)
+    assert cached > 3 * uncached
+
+
+
+"""Draws"""
+
+@pytest.mark.parametrize("hole_cards, community_cards, draws", [
+    # Four to a flush with a hole card in it.
+    ("Ah 2h", "Kh 9h 4c", ["flush draw"]),
+    # Four to a flush all on the board is no draw of the player's.
+    ("Ac 2d", "Kh 9h 4h 7h", []),
+    ("Ac 2h", "Kh 9h 4h 7h", []),
+    # Four in a row, open at both ends.
+    ("8c 9d", "Th Js 2c", ["open-ended straight draw"]),
+    # 2345 is open at the ace and the six.
+    ("2c 3d", "4h 5s Kc", ["open-ended straight draw"]),
+    # Two gaps, each filled by one rank: eight outs, but no run of four.
+    ("5c 7d", "8h 9s Jc", ["double gutshot straight draw"]),
+    ("9c Jd", "Kh 7s Tc", ["double gutshot straight draw"]),
+    # JQKA only fills with a ten, and one gap is a gutshot.
+    ("Jc Qd", "Kh As 2c", ["gutshot straight draw"]),
+    ("5c 6d", "8h 9s Kc", ["gutshot straight draw"]),
+    # A234 only fills with a five.
+    ("Ah 2h", "3h 4h Kc", ["flush draw", "gutshot straight draw"]),
+    # Four in a row on the board: a four or a nine straightens everyone.
+    ("Ac 2d", "5h 6s 7c 8d", []),
+    # Unless a hole card makes a higher straight with one of them: the nine gives this player T-high.
+    ("Tc 2d", "5h 6s 7c 8d", ["gutshot straight draw"]),
+    # A made hand or the river draws nothing.
+    ("8c 9d", "Th Js Qc", []),
+    ("Ah 2h", "Kh 9h 4c 5d 6s", []),
+])
+def test_draws(hole_cards, community_cards, draws):
+    assert evaluator.HandState((*cards(hole_cards), *cards(community_cards))).draws() == draws
+
+def test_draws_after_adding_cards():
+    state = evaluator.HandState(cards("Ac 2d") + cards("Kh 9h 4h"))
+    state.add(Card.get("7h"))
+    assert state.draws() == []
+    state = evaluator.HandState(cards("Ah 2d") + cards("Kh 9h 4c"))
+    state.add(Card.get("7h"))
+    assert state.draws() == ["flush draw"]
+
+
+"""Seat ring"""
+
+# Seats 1, 3 and 5 empty.
+SEATS = [10, -1, 11, -1, 12, -1, 13]
+
+def test_ring_skips_empty_seats():
+    ring = SeatRing.from_seats(SEATS)
+    assert ring.count == 4
+    assert [ring.next_active(id) for id in (10, 11, 12, 13)] == [11, 12, 13, 10]
+    assert [ring.last_active(id) for id in (10, 11, 12, 13)] == [10, 11, 12, 13]
+    assert ring.clockwise_from(11) == [12, 13, 10, 11]
+    # Wraps past the end of the seats.
+    assert ring.clockwise_from(13) == [10, 11, 12, 13]
+
+def test_ring_wraps_around_removed_players():
+    ring = SeatRing.from_seats(SEATS)
+    ring.remove(10)
+    ring.remove(11)
+    assert ring.count == 2
+    assert not ring.is_active(10) and ring.is_active(12)
+    # From the last seat, round to the first still active.
+    assert ring.next_active(13) == 12
+    # From removed players too, which is how the action passes a fold.
+    assert ring.next_active(10) == 12
+    assert ring.next_active(11) == 12
+    # Nearest active at or before, wrapping backwards past seat 0.
+    assert ring.last_active(11) == 13
+    assert ring.last_active(10) == 13
+    # Removed players still get dealt to.
+    assert ring.clockwise_from(13) == [10, 11, 12, 13]
+
+def test_ring_single_active_seat():
+    ring = SeatRing.from_seats(SEATS)
+    for id in (10, 12, 13):
+        ring.remove(id)
+    assert ring.count == 1
+    assert ring.next_active(11) == 11
+    assert all(ring.next_active(id) == 11 and ring.last_active(id) == 11 for id in (10, 12, 13))
+
+def test_ring_everyone_removed():
+    ring = SeatRing.from_seats(SEATS)
+    for id in (10, 11, 12, 13):
+        ring.remove(id)
+    assert ring.count == 0
+    assert all(ring.next_active(id) == -1 and ring.last_active(id) == -1 for id in (10, 11, 12, 13))
+
+def test_ring_all_in_blind():
+    # Button 10, small blind 11, big blind 12 all in from posting: preflop action ends with the
+    # nearest active player before the big blind and starts after it.
+    ring = SeatRing.from_seats(SEATS)
+    ring.remove(12)
+    last_to_act = ring.last_active(12)
+    assert last_to_act == 11
+    assert ring.next_active(last_to_act) == 13
+    assert ring.next_active(13) == 10
+
+
+"""Ranges"""
+
+@pytest.mark.parametrize("text, combos", [
+    ("AKs", 4),
+    ("AKo", 12),
+    ("AK", 16),
+    ("QQ", 6),
+    ("22+", 78),
+    ("QQ+", 18),
+    # AT, AJ, AQ and AK; the kicker stops one below the top card.
+    ("ATs+", 16),
+    ("KTo+", 36),
+    ("A2s-A5s", 16),
+    ("A5s-A2s", 16),
+    ("22-55", 24),
+    ("AhKh", 1),
+    ("AKs, AKo", 16),
+    ("QQ+, AK, 22-44", 18 + 16 + 18),
+])
+def test_parse_range_combo_counts(text, combos):
+    weights = ranges.parse_range(text)
+    assert len(weights) == combos
+    # Each combo is two distinct cards, high card first.
+    assert all(high != low and (high, low) == ranges.combo((high, low)) for high, low in weights)
+
+def test_parse_range_suits():
+    assert all(Card.suit(high) == Card.suit(low) for high, low in ranges.parse_range("ATs+"))
+    assert all(Card.suit(high) != Card.suit(low) for high, low in ranges.parse_range("ATo+"))
+    assert ranges.parse_range("AhKh") == {(Card.get("Ah"), Card.get("Kh")): 1.0}
+    assert set(ranges.parse_range("KK+")) == set(ranges.parse_range("KK, AA"))
+
+def test_parse_range_weights():
+    weights = ranges.parse_range("AK:0.5, AKs")
+    assert sorted(collections.Counter(weights.values()).items()) == [(0.5, 12), (1.0, 4)]
+    assert ranges.range_fraction("22+") == pytest.approx(78 / 1326)
+
+@pytest.mark.parametrize("text", ["AKx", "AAs", "AK+-", "A2s-K5s", "22-A5s", "AhAh", "AK:2", "1K"])
+def test_parse_range_rejects(text):
+    with pytest.raises(ValueError):
+        ranges.parse_range(text)
+
+def test_dead_cards_removed():
+    board = cards("Ah Kd 7c")
+    weights = ranges.remove_dead(ranges.parse_range("AA, KK, 77, AKs"), board)
+    # AA and KK lose three of six combos each, 77 likewise, and the only AKs left are clubs and spades.
+    assert len(weights) == 3 + 3 + 3 + 2
+    assert not any(set(board).intersection(c) for c in weights)
+
+    with pytest.raises(ValueError):
+        ranges.range_equity(["AhKh", "QQ"], board, samples=100, seed=0)
+
+def test_range_equity_respects_card_removal():
+    # Only AcAd is left of the aces, and it has quads against any pair of kings.
+    board = cards("As Ah 2d 3c 7s")
+    equities = ranges.range_equity(["AA", "KK"], board, samples=2000, seed=0)
+    assert equities[0].win == 1 and equities[1].lose == 1
+    assert sum(equity.equity for equity in equities) == pytest.approx(1)
+
+
+"""Equity"""
+
+# (win, tie, equity) per hand over every runout, one at a time.
+def naive_equity(hands, board):
+    dead = set(board).union(*hands)
+    deck = [card for card in Deck.generate_deck() if card not in dead]
+    totals = [[0, 0, 0.0] for _ in hands]
+    runouts = 0
+    for runout in itertools.combinations(deck, 5 - len(board)):
+        strengths = [Hand.evaluate((*hand, *board, *runout)) for hand in hands]
+        best = max(strengths)
+        winners = strengths.count(best)
+        for total, strength in zip(totals, strengths):
+            if strength == best:
+                total[0 if winners == 1 else 1] += 1
+                total[2] += 1 / winners
+        runouts += 1
+    return [(wins / runouts, ties / runouts, share / runouts) for wins, ties, share in totals]
+
+@pytest.mark.parametrize("hands, board", [
+    # Every suit in use, so nothing to fold together.
+    (["Ah Kh", "Qs Qd"], "2c 7h Ts"),
+    (["Ah Kd", "7c 7s", "Qh Jh"], "Th 9d 2c"),
+    # Diamonds, hearts and spades are free: their runouts fold together.
+    (["Ac Kc", "Qc Jc"], "2c 7c 9c"),
+    # Hearts and spades free, with chops.
+    (["Ac Kc", "Ad Kd"], "2c 7d 9d"),
+    (["Ad 2d", "Kd Qd"], "Td 9d 3c 4c"),
+    (["As Ks", "Qd Qh"], "Js Ts 2d 3h"),
+])
+def test_enumerate_equity_matches_brute_force(hands, board):
+    hands = [cards(hand) for hand in hands]
+    board = cards(board)
+    equities = enumerate_equity(hands, board)
+    for equity, (win, tie, share) in zip(equities, naive_equity(hands, board)):
+        assert (equity.win, equity.tie, equity.equity) == pytest.approx((win, tie, share))
+        assert equity.lose == pytest.approx(1 - win - tie)
+    assert sum(equity.equity for equity in equities) == pytest.approx(1)
+    assert equities[0].samples == math.comb(52 - 2 * len(hands) - len(board), 5 - len(board))
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_estimate_equity_is_seeded_and_close(processes):
+    hero, villain, board = cards("Ac Kc"), cards("Qd Qh"), cards("2c 7d 9c")
+    exact = enumerate_equity([hero, villain], board)[0]
+
+    samples = 20000
+    estimate = estimate_equity(hero, board, [villain], samples=samples, seed=7, processes=processes)
+    assert estimate == estimate_equity(hero, board, [villain], samples=samples, seed=7, processes=processes)
+    assert estimate.samples == samples
+    # Within 5 standard errors.
+    error = 5 * (exact.equity * (1 - exact.equity) / samples) ** 0.5
+    assert abs(estimate.equity - exact.equity) <= error
+    assert abs(estimate.win - exact.win) <= error
+
+"""Preflop"""
+
+def test_hand_index_round_trip():
+    names = [preflop.hand_name(index) for index in range(preflop.HAND_COUNT)]
+    assert len(set(names)) == 169
+    assert sum(len(name) == 2 for name in names) == 13
+    assert sum(name.endswith('s') for name in names) == 78
+    assert sum(name.endswith('o') for name in names) == 78
+
+    for index in range(preflop.HAND_COUNT):
+        hole_cards = preflop.representative(index)
+        assert preflop.hand_index(hole_cards) == index
+        assert preflop.hand_index(hole_cards[::-1]) == index
+        assert preflop.hand_name(preflop.hand_index(hole_cards)) == names[index]
+
+    assert preflop.hand_name(preflop.hand_index(cards("As Ks"))) == "AKs"
+    assert preflop.hand_name(preflop.hand_index(cards("Kd Ah"))) == "AKo"
+    assert preflop.hand_name(preflop.hand_index(cards("7c 7d"))) == "77"
+
+@pytest.fixture
+def small_table(tmp_path, monkeypatch):
+    # load_table replaces the module's table; put the real one back afterwards.
+    monkeypatch.setattr(preflop, '_table', preflop._table)
+    path = tmp_path / 'preflop.bin'
+    preflop.generate_table(path, samples=20, seed=0)
+    return path
+
+def test_load_table(small_table):
+    table = preflop.load_table(small_table)
+    assert table.samples == 20
+    assert preflop.preflop_equity(cards("As Ad"), 2) == table.lookup(0, 2)
+
+@pytest.mark.parametrize("header", [
+    # From before tables covered ten players.
+    dict(version=preflop.VERSION - 1),
+    dict(magic=b'XXXX'),
+    dict(max_players=preflop.PLAYER_COUNTS[-1] - 1),
+])
+def test_load_table_rejects_other_tables(small_table, header):
+    data = bytearray(small_table.read_bytes())
+    fields = dict(magic=preflop.MAGIC, version=preflop.VERSION, samples=20, max_players=preflop.PLAYER_COUNTS[-1]) | header
+    preflop.HEADER.pack_into(data, 0, *fields.values())
+    small_table.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="python preflop.py"):
+        preflop.load_table(small_table)
+
+def test_load_table_rejects_missing_cells(small_table):
+    # The right header over a table a player count short.
+    cells = preflop.HAND_COUNT * preflop.FIELDS * 2
+    small_table.write_bytes(small_table.read_bytes()[:-cells])
+    with pytest.raises(ValueError):
+        preflop.load_table(small_table)
+
+    with pytest.raises(FileNotFoundError):
+        preflop.load_table(small_table.with_name('missing.bin'))
+
+def test_simulate_hand_aces():
+    win, tie, share = preflop.simulate_hand(0, 5000, seed=1)[0]
+    assert share == pytest.approx(0.85, abs=0.02)
+
+def test_preflop_lookup():
+    try:
+        preflop.load_table()
+    except (FileNotFoundError, ValueError):
+        pytest.skip("tables/preflop.bin isn't built; run `python preflop.py`.")
+    aces = preflop.preflop_equity(cards("Ac Ad"), 2)
+    assert aces.equity == pytest.approx(0.85, abs=0.01)
+    assert aces.win + aces.tie + aces.lose == pytest.approx(1, abs=1e-4)
+    # Nine opponents take most of it.
+    assert preflop.preflop_equity(cards("Ac Ad"), 10).equity < 0.35
+    assert preflop.preflop_equity(cards("7c 2d"), 2).equity < 0.4
+
+"""LLM backends"""
+
+# Stands in for an SDK client: records how it was built and answers every prompt with "call".
+class StubClient:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.prompts = []
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self.create))
+        self.messages = types.SimpleNamespace(create=self.create)
+
+    def create(self, model, max_tokens, messages):
+        self.prompts.append((model, messages[0]['content']))
+        message = types.SimpleNamespace(content="call", text="call")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], content=[message])
+
+@pytest.fixture
+def sdks(monkeypatch):
+    clients = []
+    def build(**kwargs):
+        clients.append(StubClient(**kwargs))
+        return clients[-1]
+    monkeypatch.setitem(sys.modules, 'openai', types.SimpleNamespace(OpenAI=build))
+    monkeypatch.setitem(sys.modules, 'anthropic', types.SimpleNamespace(Anthropic=build))
+    monkeypatch.setattr(llm, '_backends', {})
+    return clients
+
+def test_config_from_env():
+    assert llm.config_from_env({}) == llm.LLMConfig()
+    config = llm.config_from_env({
+        "POKER_LLM_PROVIDER": "Anthropic",
+        "POKER_LLM_MODEL": "some-model",
+        "POKER_LLM_BASE_URL": "http://localhost:8000",
+        "POKER_LLM_API_KEY": "key",
+        "POKER_LLM_TIMEOUT": "2.5",
+        "POKER_LLM_RETRIES": "0",
+    })
+    assert config == llm.LLMConfig(provider="anthropic", model="some-model", base_url="http://localhost:8000", api_key="key", timeout=2.5, max_retries=0)
+    # Set but empty is the same as unset.
+    assert llm.config_from_env({"POKER_LLM_MODEL": "", "POKER_LLM_TIMEOUT": ""}) == llm.LLMConfig()
+
+@pytest.mark.parametrize("name, value", [
+    ("POKER_LLM_TIMEOUT", "soon"),
+    ("POKER_LLM_TIMEOUT", "-1"),
+    ("POKER_LLM_TIMEOUT", "nan"),
+    ("POKER_LLM_RETRIES", "2.5"),
+    ("POKER_LLM_RETRIES", "-3"),
+])
+def test_config_from_env_rejects(name, value):
+    with pytest.raises(ValueError, match=name):
+        llm.config_from_env({name: value})
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        llm.Backend(llm.LLMConfig())
+
+def test_one_client_per_config(sdks):
+    config = llm.LLMConfig(timeout=5.0, max_retries=1)
+    backend = llm.get_backend(config)
+    assert isinstance(backend, llm.OpenAIBackend) and backend.model == llm.DEFAULT_MODELS["openai"]
+    assert backend.complete("first") == "call"
+    # An equal config, built separately, reuses the same client and its connection.
+    assert llm.get_backend(llm.LLMConfig(timeout=5.0, max_retries=1)) is backend
+    assert llm.get_backend(config).complete("second") == "call"
+    assert len(sdks) == 1
+    assert sdks[0].kwargs == dict(api_key=None, base_url=None, timeout=5.0, max_retries=1)
+    assert sdks[0].prompts == [("gpt-4o", "first"), ("gpt-4o", "second")]
+
+    other = llm.get_backend(llm.LLMConfig(provider="anthropic", model="some-model"))
+    assert isinstance(other, llm.AnthropicBackend) and other is not backend
+    assert other.complete("third") == "call"
+    assert len(sdks) == 2 and sdks[1].prompts == [("some-model", "third")]
+
+def test_ollama_defaults(sdks):
+    llm.get_backend(llm.LLMConfig(provider="ollama"))
+    assert sdks[0].kwargs['base_url'] == llm.OLLAMA_BASE_URL
+    assert sdks[0].kwargs['api_key'] == "ollama"
+
+def test_backend_from_env(sdks, monkeypatch):
+    monkeypatch.setenv("POKER_LLM_PROVIDER", "anthropic")
+    monkeypatch.setenv("POKER_LLM_MODEL", "from-env")
+    assert llm.get_backend() is llm.get_backend()
+    assert llm.get_backend().model == "from-env"
+    assert len(sdks) == 1
+
+def test_unknown_provider(sdks):
+    with pytest.raises(ValueError, match="gemini"):
+        llm.get_backend(llm.LLMConfig(provider="gemini"))
+    assert sdks == []
+
+"""Files"""
+
+@pytest.mark.parametrize("umask", [0o022, 0o077, 0o002])
+def test_write_atomic(tmp_path, umask):
+    path = tmp_path / 'tables' / 'table.bin'
+    previous = os.umask(umask)
+    try:
+        write_atomic(path, [b'abc', b'def'])
+        write_atomic(path, [b'ghi'])
+    finally:
+        os.umask(previous)
+    assert path.read_bytes() == b'ghi'
+    # As open() would have made it, not mkstemp's 0600, and no temporary file left behind.
+    assert path.stat().st_mode & 0o777 == 0o666 & ~umask
+    assert os.listdir(path.parent) == ['table.bin']
+
+def test_write_atomic_keeps_old_file_on_error(tmp_path):
+    path = tmp_path / 'table.bin'
+    path.write_bytes(b'old')
+    def chunks():
+        yield b'new'
+        raise RuntimeError
+    with pytest.raises(RuntimeError):
+        write_atomic(path, chunks())
+    assert path.read_bytes() == b'old'
+    assert os.listdir(tmp_path) == ['table.bin']
+
+"""Benchmarks"""
+
+# Seven-card hands per second through Hand.classify with the cache at maxsize, over hands deals
+# drawn from distinct different hands (every deal different by default).
+def benchmark_classify(hands=100000, seed=0, maxsize=0, distinct=None):
+    rng = random.Random(seed)
+    unique = [Deck().shuffle(rng).deal(7) for _ in range(distinct or hands)]
+    deals = [unique[i % len(unique)] for i in range(hands)]
+
+    previous = evaluator.cache.maxsize
+    evaluator.cache.resize(maxsize)
+    evaluator.cache.clear()
+    try:
+        start = time.perf_counter()
+        for seven in deals:
+            Hand.classify(seven)
+        return hands / (time.perf_counter() - start)
+    finally:
+        evaluator.cache.resize(previous)
+
+# Showdowns per second through Hand.find_winners, each counting players hands.
+def benchmark_find_winners(rounds=20000, players=6, seed=0):
+    rng = random.Random(seed)
+    deals = []
+    for _ in range(rounds):
+        deck = Deck().shuffle(rng)
+        deals.append((make_players([deck.deal(2) for _ in range(players)]), deck.deal(5)))
+
+    evaluator.cache.clear()
+    start = time.perf_counter()
+    for table, community_cards in deals:
+        Hand.find_winners(table, community_cards)
+    return rounds * players / (time.perf_counter() - start)
+
+# Seven-card hands per second through Hand.evaluate_batch.
+def benchmark_evaluate_batch(hands=1000000, seed=0):
+    deals = sample_hands(hands, seed, size=7)
+    start = time.perf_counter()
+    Hand.evaluate_batch(deals)
+    return hands / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    evaluator.load_tables()
+    print(f"Hand.classify:       {benchmark_classify():>12,.0f} hands/sec")
+    print(f"  cache on:          {benchmark_classify(maxsize=1 << 14):>12,.0f} hands/sec, {evaluator.cache.stats()['hit_rate']:.1%} hits")
+    print(f"  1000 hands again:  {benchmark_classify(distinct=1000):>12,.0f} hands/sec")
+    print(f"  cache on:          {benchmark_classify(distinct=1000, maxsize=1 << 14):>12,.0f} hands/sec, {evaluator.cache.stats()['hit_rate']:.1%} hits")
+    print(f"Hand.find_winners:   {benchmark_find_winners():>12,.0f} hands/sec")
+    print(f"Hand.evaluate_batch: {benchmark_evaluate_batch():>12,.0f} hands/sec")
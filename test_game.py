@@ -0,0 +1,567 @@
+import sys
+
+import pytest
+
+# game_save and game_logic use 3.12 f-strings.
+if sys.version_info < (3, 12):
+    pytest.skip("The engine needs Python 3.12.", allow_module_level=True)
+
+import json
+import pickle
+import random
+
+import numpy as np
+
+import game_save
+from game_save import DELETED, HistoryReader, HistoryWriter, apply_patch, diff, serialize_action, to_json_types
+from constants import Actions, Phases
+from deck import Card
+from game_logic import log_action, play_round, settle_pot
+from game_structs import HoldemRound, Personality, Player, Pot, PotQueue, RoundState
+from replay import Replay
+import simulate
+from simulate import calling_station, check_or_call, maniac, random_policy, to_call
+from tournament import balance_tables, new_table, next_big_blind, seat_players
+from utils import RandomStream, update
+import vector_sim
+
+NAMES = ["Ben", "Carol", "Sasha", "Kevin", "Cory", "Amy"]
+
+def make_players(stacks):
+    return [Player(player_id=i, name=NAMES[i], position='', personality=Personality(i, 0, NAMES[i], "", "", []),
+            hole_cards=(), chips=chips, amount_in_street=0, amount_in_round=0, has_folded=False, is_all_in=False) \
+        for i, chips in enumerate(stacks)]
+
+# Headless hands at one seeded table until hands have been played or one player is left,
+# as (every action in order, the table after each hand).
+def play_hands(stacks, policies, hands, seed=0, table_size=6):
+    table = new_table(make_players(stacks), table_size, RandomStream(seed))
+    actions = []
+    tables = []
+    for _ in range(hands):
+        if len(table.players) < 2:
+            break
+        table = update(table, pot_queue=PotQueue({}, 0, []), community_cards=[], actions=[], round_id=table.round_id + 1)
+        table = play_round(table, policies={id: policies[id % len(policies)] for id in table.players})
+        actions += table.actions
+        tables.append(table)
+    return actions, tables
+
+def cards(names):
+    return [Card.get(name) for name in names.split()]
+
+# Engine state at showdown, with every chip either in a stack or in right_pots.
+def showdown_state(stacks, hole_cards, board, right_pots, btn=0, folded=()):
+    players = [update(player, hole_cards=cards(hands), has_folded=player.player_id in folded) \
+        for player, hands in zip(make_players(stacks), hole_cards)]
+    round = HoldemRound(phase=Phases.SHOWDOWN, round_id=1, date='', time='',
+        pot_queue=PotQueue({}, sum(pot.amount for pot in right_pots), right_pots), actions=[],
+        players={player.player_id: player for player in players}, seats=[player.player_id for player in players],
+        community_cards=cards(board), seat_index_of_btn=btn)
+    state = RoundState.from_round(round)
+    # Headless: nothing spoken, printed or saved.
+    state.policies = {}
+    return state
+
+def as_json(action):
+    return to_json_types(serialize_action(action))
+
+
+"""History"""
+
+@pytest.mark.parametrize("old, new", [
+    ({'a': 1, 'b': 2}, {'a': 1, 'b': 3}),
+    ({'a': 1, 'b': 2}, {'a': 1}),
+    ({'a': {'x': 1, 'y': 2}}, {'a': {'x': 1}, 'b': [1, 2]}),
+    ({'players': {'0': {'chips': 5}, '1': {'chips': 0}}}, {'players': {'0': {'chips': 9}}}),
+    ({'a': {'x': 1}}, {'a': 2}),
+    ({'a': [1, 2]}, {'a': [2]}),
+])
+def test_patch_round_trip(old, new):
+    before = json.dumps(old)
+    patch = diff(old, new)
+    assert apply_patch(old, patch) == new
+    # Snapshots are patched one after another, so the old one must come through untouched.
+    assert json.dumps(old) == before
+
+def test_patch_lists_deleted_keys():
+    patch = diff({'players': {'0': {'chips': 5}, '1': {'chips': 0}}}, {'players': {'0': {'chips': 5}}})
+    assert patch == {'players': {DELETED: ['1']}}
+    assert diff({'a': 1}, {'a': 1}) == {}
+
+def test_history_round_trip(tmp_path):
+    # Short stacks against a maniac, so players bust and drop out of later snapshots.
+    actions, tables = play_hands([6, 40, 8, 40], [maniac, calling_station], hands=30, seed=1)
+    assert len(tables[-1].players) < 4
+
+    path = tmp_path / 'history.jsonl'
+    writer = HistoryWriter(path, keyframe_interval=7, date='2026-10-18')
+    # Appended a hand at a time, as save_game does.
+    for table in tables:
+        writer.append(table.actions)
+
+    lines = path.read_text().splitlines()
+    header = json.loads(lines[0])
+    assert header['keyframe_interval'] == 7 and header['date'] == '2026-10-18'
+    records = [json.loads(line) for line in lines[1:]]
+    assert ['snapshot' in record for record in records] == [i % 7 == 0 for i in range(len(actions))]
+    assert any(DELETED in record.get('snapshot_patch', {}).get('players', {}) for record in records)
+
+    reader = HistoryReader(path)
+    assert len(reader) == len(actions)
+    expected = [as_json(action) for action in actions]
+    assert list(reader) == expected
+    # Backwards, so every read starts over from a keyframe.
+    for index in reversed(range(len(actions))):
+        assert reader[index] == expected[index]
+    assert reader[-1] == expected[-1]
+
+def test_history_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.jsonl'
+    path.write_text(json.dumps({'format': 'something else', 'version': 1}) + '\n')
+    with pytest.raises(ValueError):
+        HistoryReader(path)
+
+
+"""Replay"""
+
+# Never all in, so stacks last and hands end at showdown or on a fold.
+def min_raiser(round, player, highest_bet, min_raise, hand_state):
+    roll = round.rng.random()
+    if roll < 0.2 and to_call(player, highest_bet) > 0:
+        return "fold"
+    if roll < 0.4:
+        return f"{'raise' if highest_bet > 0 else 'bet'} {min_raise}"
+    return check_or_call(player, highest_bet)
+
+@pytest.fixture(scope='module')
+def saved_hands(tmp_path_factory):
+    actions, tables = play_hands([1000] * 6, [min_raiser], hands=30, seed=2)
+    path = tmp_path_factory.mktemp('replay') / 'history.jsonl'
+    writer = HistoryWriter(path, date='2026-10-18')
+    for table in tables:
+        writer.append(table.actions)
+    return path, actions, tables
+
+def test_replay_actions_match_original(saved_hands):
+    path, actions, _ = saved_hands
+    replay = Replay(path)
+    assert len(actions) > 1000
+    assert len(replay) == len(actions)
+    assert replay.date == '2026-10-18'
+
+    expected = [as_json(action) for action in actions]
+    assert [as_json(replay.action(i)) for i in range(len(replay))] == expected
+    # Out of order, so most reads go back to a keyframe first.
+    order = list(range(len(replay)))
+    random.Random(0).shuffle(order)
+    for index in order:
+        assert as_json(replay.action(index)) == expected[index]
+
+def test_replay_indexes_hands(saved_hands):
+    path, actions, tables = saved_hands
+    replay = Replay(path)
+
+    assert [hand.round_id for hand in replay.hands] == [table.round_id for table in tables]
+    assert [hand.stop - hand.start for hand in replay.hands] == [len(table.actions) for table in tables]
+    assert replay.kinds == [action.action for action in actions]
+    assert replay.find(Actions.RAISE) == [i for i, action in enumerate(actions) if action.action == Actions.RAISE]
+
+    for table in tables:
+        state = replay.seek_hand(table.round_id)
+        assert state.phase == table.phase
+        # The last snapshot still has anyone who busted on the hand's final action.
+        assert {id: state.players[id].chips for id in table.players} == {id: player.chips for id, player in table.players.items()}
+        assert [as_json(action) for action in state.actions] == [as_json(action) for action in table.actions]
+
+def test_replay_showdowns(saved_hands):
+    path, _, tables = saved_hands
+    replay = Replay(path)
+    showdowns = list(replay.showdowns())
+
+    went_to_showdown = [hand for hand in replay.hands if hand.showdown != -1]
+    assert 0 < len(went_to_showdown) < len(replay.hands)
+    assert len(showdowns) == len(went_to_showdown)
+    for state, hand in zip(showdowns, went_to_showdown):
+        assert state.phase == Phases.SHOWDOWN
+        assert state.round_id == hand.round_id
+        assert len(state.community_cards) == 5
+        assert not state.actions
+
+
+"""Chips"""
+
+# The board plays for everyone, so whoever hasn't folded splits.
+ROYAL = "Ts Js Qs Ks As"
+
+@pytest.mark.parametrize("btn, shares", [
+    # The odd chip goes to the first winner left of the button.
+    (0, {1: 3, 2: 2}),
+    (1, {1: 2, 2: 3}),
+    # Player 0 folded, so from the button at seat 2 the deal reaches player 1 first.
+    (2, {1: 3, 2: 2}),
+])
+def test_odd_chip_goes_left_of_button(btn, shares):
+    state = showdown_state([10, 10, 10], ["2c 3d", "4c 5d", "6c 7d"], ROYAL, [Pot([0, 1, 2], [], 5)], btn=btn, folded=[0])
+    state = settle_pot(state)
+
+    assert {id: state.players[id].chips - 10 for id in (1, 2)} == shares
+    assert state.players[0].chips == 10
+    assert state.pot_queue.total_amount == 0
+    assert not state.ledger.violations
+
+def test_three_way_split_hands_out_every_chip():
+    state = showdown_state([0, 0, 0], ["2c 3d", "4c 5d", "6c 7d"], ROYAL, [Pot([0, 1, 2], [], 11)], btn=1)
+    state = settle_pot(state)
+    assert [state.players[id].chips for id in (2, 0, 1)] == [4, 4, 3]
+    assert [action.action for action in state.actions].count(Actions.COLLECT) == 3
+    assert not state.ledger.violations
+
+def test_uncalled_bet_returns_out_of_the_pot():
+    # Player 1 bet 4 more than player 2 could call; the rest is a main pot of 6.
+    state = showdown_state([0, 0, 0], ["2c 3d", "Ah Ad", "Kh Kd"], "2s 7h 9c Jd 4s",
+        [Pot([0, 1, 2], [], 6), Pot([1], [], 4)], folded=[0])
+    state = settle_pot(state)
+
+    returned = state.actions[0]
+    assert (returned.action, returned.snapshot.typed_object) == (Actions.RETURN, 4)
+    # Taken out of the pot in the same step it went back to the stack.
+    assert returned.snapshot.pot_queue.total_amount == 6
+    assert returned.snapshot.players[1].chips == 4
+    assert state.players[1].chips == 10 and state.players[2].chips == 0
+    assert state.pot_queue.total_amount == 0
+    assert not state.ledger.violations
+
+def test_chip_violation_recorded_once():
+    state = showdown_state([10, 10], ["2c 3d", "4c 5d"], ROYAL, [Pot([0, 1], [], 4)])
+    # A chip from nowhere.
+    state.players[0].chips += 1
+    for _ in range(3):
+        state = log_action(state, Actions.CHECK, None, subject_id=0)
+    assert len(state.ledger.violations) == 1
+    violation = state.ledger.violations[0]
+    assert (violation.expected, violation.counted, violation.action, violation.subject_id) == (24, 25, Actions.CHECK, 0)
+    assert state.freeze().violations == (violation,)
+
+    # Once the count is right again, the next mismatch is a new violation.
+    state.players[0].chips -= 1
+    state = log_action(state, Actions.CHECK, None, subject_id=0)
+    state.pot_queue.total_amount -= 2
+    state = log_action(state, Actions.CHECK, None, subject_id=1)
+    assert len(state.ledger.violations) == 2
+    assert state.ledger.violations[1].counted == 22
+
+
+"""Action order"""
+
+def test_all_in_big_blind_never_acts():
+    # Seats 0, 1, 2 with the button moving onto seat 0: player 2 is the big blind, with one chip.
+    players = make_players([20, 20, 1])
+    round = HoldemRound(phase=Phases.GAME_START, round_id=1, date='', time='', pot_queue=PotQueue({}, 0, []), actions=[],
+        players={player.player_id: player for player in players}, seats=[0, 1, 2], community_cards=[], rng=RandomStream(0))
+    round = play_round(round, policies={id: calling_station for id in round.players})
+
+    posted = [action for action in round.actions if action.action == Actions.POST]
+    assert [(action.snapshot.subject_id, action.snapshot.typed_object) for action in posted] == [(1, 1), (2, 1)]
+    assert posted[1].snapshot.players[2].is_all_in
+
+    decisions = [action.snapshot.subject_id for action in round.actions if action.action in (Actions.CHECK, Actions.CALL, Actions.BET, Actions.RAISE, Actions.FOLD)]
+    assert 2 not in decisions
+    # Preflop starts after the big blind, at the button, and ends with the small blind.
+    preflop = [action.snapshot.subject_id for action in round.actions if action.snapshot.phase == Phases.PREFLOP and action.action in (Actions.CHECK, Actions.CALL)]
+    assert preflop == [0, 1]
+
+def fold(round, player, highest_bet, min_raise, hand_state):
+    return "fold"
+
+@pytest.mark.parametrize("policy, decision", [(calling_station, Actions.CALL), (fold, Actions.FOLD)])
+def test_lone_player_answers_all_in_blinds(policy, decision):
+    # Both blinds go all in posting, leaving the button the only one who can bet, facing 2.
+    players = make_players([20, 1, 2])
+    round = HoldemRound(phase=Phases.GAME_START, round_id=1, date='', time='', pot_queue=PotQueue({}, 0, []), actions=[],
+        players={player.player_id: player for player in players}, seats=[0, 1, 2], community_cards=[], rng=RandomStream(0))
+    round = play_round(round, policies={0: policy, 1: calling_station, 2: calling_station})
+
+    decisions = [(action.snapshot.subject_id, action.action, action.snapshot.phase) for action in round.actions \
+        if action.action in (Actions.CHECK, Actions.CALL, Actions.BET, Actions.RAISE, Actions.FOLD)]
+    # Nobody else can bet, so that's the only decision of the hand.
+    assert decisions == [(0, decision, Phases.PREFLOP)]
+    assert sum(player.chips for player in round.players.values()) == 23
+    assert not round.violations
+    if decision == Actions.FOLD:
+        assert round.players[0].chips == 20
+    else:
+        call = next(action for action in round.actions if action.action == Actions.CALL)
+        assert call.snapshot.typed_object == 2
+
+
+"""Tournaments"""
+
+def test_tables_save_separately(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(game_save, '_writers', {})
+
+    tables = seat_players(make_players([0] * 6), 3, 20, RandomStream(0))
+    assert [table.table_id for table in tables] == [0, 1]
+    # Started together, so only table_id tells them apart.
+    assert tables[0].date == tables[1].date and tables[0].time == tables[1].time
+
+    played = []
+    for table in tables:
+        table = update(table, round_id=1)
+        table = play_round(table, policies={id: calling_station for id in table.players})
+        game_save.save_game(table)
+        played.append(table)
+
+    assert len(list((tmp_path / 'saves').iterdir())) == 2
+    for table in played:
+        path = tmp_path / 'saves' / f'{game_save.generate_round_filename(table)}.jsonl'
+        reader = HistoryReader(path)
+        assert len(reader) == len(table.actions)
+        assert {int(id) for id in reader[0]['snapshot']['players']} == set(table.players)
+
+# A table with exactly these seats (-1 empty), every player id seated where given.
+def fixed_table(seats, btn=-1):
+    players = [Player(player_id=id, name=f"P{id}", position='', personality=Personality(id, 0, f"P{id}", "", "", []),
+            hole_cards=(), chips=20, amount_in_street=0, amount_in_round=0, has_folded=False, is_all_in=False) \
+        for id in seats if id != -1]
+    return update(new_table(players, len(seats), RandomStream(0)), seats=list(seats), seat_index_of_btn=btn)
+
+@pytest.mark.parametrize("seats, btn, big_blind", [
+    # Next hand the button moves to 11 and 12 posts the small blind.
+    ([10, 11, 12, 13, -1, -1], 0, 13),
+    # Round past the empty seats and the end of the table.
+    ([10, -1, 11, -1, 12], 4, 12),
+    ([10, -1, 11, -1, 12, 13], 2, 10),
+    # A new table: the button lands on the first seated player.
+    ([-1, 10, 11, 12], -1, 12),
+    # Heads-up the button posts the small blind, so the other player is the big blind.
+    ([10, -1, 11], 0, 10),
+    ([10, -1, 11], 2, 11),
+])
+def test_next_big_blind(seats, btn, big_blind):
+    assert next_big_blind(fixed_table(seats, btn)) == big_blind
+
+def ids(tables):
+    return sorted(id for table in tables for id in table.players)
+
+def assert_seated(table):
+    assert sorted(id for id in table.seats if id != -1) == sorted(table.players)
+
+def test_balance_breaks_table_when_others_have_room():
+    tables = [fixed_table([0, 1, 2, -1]), fixed_table([3, -1, 4, 5]), fixed_table([6, -1, -1, -1])]
+    balanced, breaks, moves = balance_tables(tables, 4, RandomStream(0))
+
+    assert (breaks, moves) == (1, 0)
+    assert [len(table.players) for table in balanced] == [4, 3]
+    assert 6 in balanced[0].players
+    assert ids(balanced) == list(range(7))
+    for table in balanced:
+        assert_seated(table)
+
+def test_balance_breaks_down_to_final_table():
+    tables = [fixed_table([0, -1, 1, -1, -1]), fixed_table([2, -1, -1, 3, -1]), fixed_table([-1, 4, -1, -1, -1])]
+    balanced, breaks, moves = balance_tables(tables, 5, RandomStream(0))
+    assert (breaks, moves) == (2, 0)
+    assert [len(table.players) for table in balanced] == [5]
+    assert_seated(balanced[0])
+
+def test_balance_moves_next_big_blind():
+    big = fixed_table([0, 1, 2, 3, 4, 5], btn=1)
+    small = fixed_table([6, 7, -1, 8, -1, -1], btn=0)
+    balanced, breaks, moves = balance_tables([big, small], 6, RandomStream(0))
+
+    assert (breaks, moves) == (0, 1)
+    assert [len(table.players) for table in balanced] == [5, 4]
+    # Seats 2 and 3 will post the blinds next, so 4 moves.
+    assert 4 in balanced[1].players and 4 not in balanced[0].seats
+    assert balanced[0].seats == [0, 1, 2, 3, -1, 5]
+    for table in balanced:
+        assert_seated(table)
+
+def test_balance_moves_until_within_one():
+    tables = [fixed_table([0, 1, 2, 3, 4, 5], btn=5), fixed_table([6, -1, 7, -1, -1, -1])]
+    balanced, breaks, moves = balance_tables(tables, 6, RandomStream(0))
+    assert (breaks, moves) == (0, 2)
+    assert [len(table.players) for table in balanced] == [4, 4]
+    # Each move takes whoever is the next big blind then: seat 2, then with it empty seat 3.
+    assert set(balanced[1].players) == {6, 7, 2, 3}
+
+def test_balance_leaves_balanced_tables_and_drops_empty_ones():
+    tables = [fixed_table([0, 1, 2, -1]), fixed_table([3, 4, -1, -1]), fixed_table([-1, -1, -1, -1])]
+    balanced, breaks, moves = balance_tables(tables, 4, RandomStream(0))
+    assert (breaks, moves) == (0, 0)
+    assert [table.seats for table in balanced] == [[0, 1, 2, -1], [3, 4, -1, -1]]
+
+
+"""Randomness"""
+
+def draws(rng, count=5):
+    return [rng.getrandbits(63) for _ in range(count)]
+
+def test_logged_shuffle_seed_deals_hand_again():
+    table = new_table(make_players([50, 80, 120, 40]), 6, RandomStream(9))
+    policies = {id: random_policy for id in table.players}
+    first = play_round(table, policies=policies)
+
+    seed = next(action.snapshot.typed_object for action in first.actions if action.action == Actions.SHUFFLE)
+    again = play_round(table, policies=policies, seed=seed)
+
+    def hand(round):
+        return [(action.action, action.snapshot.subject_id, as_json(action)['snapshot']['typed_object']) for action in round.actions]
+    assert hand(again) == hand(first)
+    assert any(action.action == Actions.DEALT for action in first.actions)
+    assert {id: player.chips for id, player in again.players.items()} == {id: player.chips for id, player in first.players.items()}
+
+def test_random_stream_spawn_is_deterministic():
+    children = RandomStream(11).spawn(3)
+    assert [draws(child) for child in children] == [draws(child) for child in RandomStream(11).spawn(3)]
+    # Children differ from each other, from the next spawn and from the parent.
+    parent = RandomStream(11)
+    first = parent.spawn(2)
+    second = parent.spawn(2)
+    streams = [draws(stream) for stream in first + second + [parent]]
+    assert len(set(map(tuple, streams))) == len(streams)
+    # Drawing from the parent doesn't change what it spawns.
+    drawn = RandomStream(11)
+    draws(drawn, 100)
+    assert [draws(child) for child in drawn.spawn(3)] == [draws(child) for child in RandomStream(11).spawn(3)]
+
+def test_random_stream_pickle_round_trip():
+    rng = RandomStream(12)
+    draws(rng)
+    rng.spawn(2)
+    copy = pickle.loads(pickle.dumps(rng))
+    assert isinstance(copy, RandomStream) and copy.seed_value == 12
+    # Carries on from the same point, and spawns the children the original would spawn next.
+    assert draws(copy) == draws(rng)
+    assert [draws(child) for child in copy.spawn(2)] == [draws(child) for child in rng.spawn(2)]
+
+"""Simulation"""
+
+SIM_POLICIES = ['random', 'maniac', 'calling_station', 'random']
+
+def comparable(result):
+    # Everything but the timings.
+    return {key: value for key, value in vars(result).items() if key not in ('seconds', 'hands_per_second', 'sessions_per_second')}
+
+def test_simulate_is_seeded():
+    assert comparable(simulate.simulate(150, SIM_POLICIES, seed=5)) == comparable(simulate.simulate(150, SIM_POLICIES, seed=5))
+    assert comparable(simulate.simulate(150, SIM_POLICIES, seed=5)) != comparable(simulate.simulate(150, SIM_POLICIES, seed=6))
+
+def test_simulate_conserves_chips():
+    result = simulate.simulate(300, SIM_POLICIES, seed=7)
+    assert result.errors == []
+    # Every hand's winnings are someone's losses, rebuys or not.
+    assert sum(result.net_chips.values()) == 0
+    assert result.sessions > 1
+    assert 0 < result.showdowns < result.hands
+
+@pytest.fixture
+def session_args(monkeypatch):
+    # None of these policies reads the preflop table, so there's no need to build it.
+    monkeypatch.setattr(simulate, 'ensure_table', lambda **kwargs: None)
+    names = [personality.name for personality in simulate.load_personalities(simulate.CHARACTERS)]
+    policies = {name: SIM_POLICIES[i % len(SIM_POLICIES)] for i, name in enumerate(names)}
+    return dict(seed=3, count=4, policies=policies, max_hands=300, keep_trajectories=True, chunk_size=3)
+
+def test_sessions_conserve_chips(session_args):
+    summary = simulate.run_sessions(6, processes=1, **session_args)
+    assert summary.errors == []
+    assert len(summary.trajectories) == 6
+    for trajectories in summary.trajectories:
+        assert len(trajectories) == 4
+        # After every hand, the four stacks still add up to the four buy-ins.
+        for stacks in zip(*trajectories.values()):
+            assert sum(stacks) == 4 * HoldemRound.MAX_BUY_IN
+
+def test_sessions_independent_of_processes(session_args):
+    one = simulate.run_sessions(8, processes=1, **session_args)
+    two = simulate.run_sessions(8, processes=2, **session_args)
+    assert comparable(one) == comparable(two)
+    assert comparable(one) == comparable(simulate.run_sessions(8, processes=2, **(session_args | dict(chunk_size=5))))
+
+"""Vector sim"""
+
+def vector_fold(tables, rows, seat):
+    return np.full(len(rows), vector_sim.FOLD, dtype=np.int8), np.zeros(len(rows))
+
+# Each policy as game_logic and vector_sim take it.
+POLICY_PAIRS = {
+    'calling_station': (calling_station, vector_sim.calling_station),
+    'maniac': (maniac, vector_sim.maniac),
+    'fold': (fold, vector_fold),
+}
+STREETS = [Phases.PREFLOP, Phases.FLOP, Phases.TURN, Phases.RIVER]
+DECISIONS = (Actions.CHECK, Actions.CALL, Actions.BET, Actions.RAISE, Actions.FOLD)
+
+# One hand through the engine from a new table (the button on seat 0), as (final stacks,
+# (seat, street) of every decision, hole cards per seat, the board dealt).
+def engine_hand(stacks, names, seed):
+    players = make_players(stacks)
+    round = HoldemRound(phase=Phases.GAME_START, round_id=1, date='', time='', pot_queue=PotQueue({}, 0, []), actions=[],
+        players={player.player_id: player for player in players}, seats=list(range(len(stacks))), community_cards=[],
+        rng=RandomStream(seed))
+    round = play_round(round, policies={id: POLICY_PAIRS[name][0] for id, name in enumerate(names)})
+
+    decisions = [(action.snapshot.subject_id, STREETS.index(action.snapshot.phase)) for action in round.actions if action.action in DECISIONS]
+    hole = {action.snapshot.subject_id: action.snapshot.typed_object for action in round.actions if action.action == Actions.DEALT}
+    final = [round.players[id].chips if id in round.players else 0 for id in range(len(stacks))]
+    return final, decisions, [hole[id] for id in range(len(stacks))], list(round.community_cards)
+
+# The same hand at one vector_sim table, dealt the given cards.
+def vector_hand(stacks, names, hole, board):
+    decisions = []
+    def recorded(policy):
+        def decide(tables, rows, seat):
+            decisions.extend((seat, tables.street) for _ in rows)
+            return policy(tables, rows, seat)
+        return decide
+    policies = [recorded(POLICY_PAIRS[name][1]) for name in names]
+
+    tables = vector_sim.new_tables(1, len(stacks), seed=0)
+    tables.stacks[0] = stacks
+    vector_sim.start_hand(tables)
+    dealt = [card for cards in hole for card in cards] + board
+    # A hand folded out before the river never dealt the rest of the board; any other cards do.
+    board = board + [card for card in Card.TABLE if card not in dealt][:5 - len(board)]
+    tables.hole[0] = [[Card.TABLE.index(card) for card in cards] for cards in hole]
+    tables.board[0] = [Card.TABLE.index(card) for card in board]
+    for street in (vector_sim.PREFLOP, vector_sim.FLOP, vector_sim.TURN, vector_sim.RIVER):
+        vector_sim.play_street(tables, street, policies)
+    vector_sim.showdown(tables)
+    return tables.stacks[0].tolist(), decisions
+
+@pytest.mark.parametrize("stacks, names", [
+    # Both blinds all in posting: the button still answers the big blind.
+    ([20, 1, 2], ['calling_station'] * 3),
+    ([20, 1, 2], ['fold', 'calling_station', 'calling_station']),
+    ([200, 200, 200], ['calling_station'] * 3),
+    ([200, 200, 200, 200], ['fold', 'fold', 'fold', 'calling_station']),
+    # Side pots from different all-in amounts.
+    ([50, 120, 200, 30], ['maniac', 'calling_station', 'maniac', 'calling_station']),
+    ([100, 3], ['calling_station', 'maniac']),
+    ([40, 90, 15, 200, 60, 5], ['calling_station', 'maniac', 'fold', 'calling_station', 'maniac', 'calling_station']),
+])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_vector_sim_plays_like_engine(stacks, names, seed):
+    final, decisions, hole, board = engine_hand(stacks, names, seed)
+    vector_final, vector_decisions = vector_hand(stacks, names, hole, board)
+
+    assert vector_decisions == decisions
+    assert vector_final == final
+    assert sum(final) == sum(stacks)
+
+def test_vector_sim_conserves_chips():
+    result = vector_sim.simulate_tables(200, 50, ['random', 'maniac', 'calling_station', 'random', 'random'], seed=3)
+    assert result.errors == []
+    assert sum(result.net_chips.values()) == 0
+    assert result.hands == 200 * 50
+    assert 0 < result.showdowns <= result.hands
+
+def test_vector_sim_is_seeded():
+    def run(seed):
+        result = vector_sim.simulate_tables(50, 20, ['random', 'maniac', 'random'], seed=seed)
+        return result.net_chips, result.pots_won, result.busts, result.showdowns, result.sessions
+    assert run(4) == run(4)
+    assert run(4) != run(5)
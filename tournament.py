@@ -0,0 +1,189 @@
+import math
+from dataclasses import dataclass
+
+from game_structs import ChipViolation, HoldemRound, Player, PotQueue
+from game_logic import play_round
+from constants import Phases
+from utils import RandomStream, get_date, get_time, update
+
+# Multi-table tournaments: everyone starts with the same stack, spread over as few tables as
+# will hold them, and plays until one player has every chip.
+#
+# Play goes in rounds of one hand at every table. After each round busted players are out
+# (remove_empty_stacks has already emptied their seats), a table is broken whenever the others
+# have room for its players, and otherwise players move from the biggest table to the smallest
+# until no two differ by more than one. Blinds go up a level every hands_per_level rounds.
+
+# (small blind, big blind) per level; the last level holds once reached.
+BLIND_LEVELS = [(1, 2), (2, 4), (3, 6), (5, 10), (10, 20), (15, 30), (25, 50), (50, 100), (100, 200), (200, 400), (300, 600), (500, 1000)]
+HANDS_PER_LEVEL = 20
+STARTING_STACK = 100
+
+@dataclass(frozen=True)
+class TournamentResult:
+    # Player names, winner first; players busting in the same round are ordered by the chips they started the hand with.
+    finishing_order: list[str]
+    rounds: int
+    # Hands played, over every table.
+    hands: int
+    # The blinds when it ended.
+    blinds: tuple[int, int]
+    table_breaks: int
+    moves: int
+    # False if max_rounds ran out first; those still in are then ordered by chips.
+    finished: bool
+    # The engine's chip violations, from every table.
+    violations: list[ChipViolation]
+
+# Tables started together share a date and time, so table_id tells their saves apart.
+def new_table(players: list[Player], table_size: int, rng: RandomStream, table_id: int | None = None) -> HoldemRound:
+    seats = [-1] * table_size
+    for player, seat in zip(players, rng.sample(range(table_size), len(players))):
+        seats[seat] = player.player_id
+
+    return HoldemRound(
+        phase=Phases.GAME_START,
+        round_id=0,
+        date=get_date(),
+        time=get_time(),
+        pot_queue=PotQueue({}, 0, []),
+        actions=[],
+        players={player.player_id: player for player in players},
+        seats=seats,
+        community_cards=[],
+        rng=rng,
+        table_id=table_id
+    )
+
+# Random seats over as few tables as will hold everyone, the tables differing by at most one player.
+def seat_players(players: list[Player], table_size: int, starting_stack: int, rng: RandomStream) -> list[HoldemRound]:
+    players = [update(player, chips=starting_stack) for player in players]
+    rng.shuffle(players)
+    table_count = math.ceil(len(players) / table_size)
+    streams = rng.spawn(table_count)
+    return [new_table(players[i::table_count], table_size, streams[i], table_id=i) for i in range(table_count)]
+
+def unseat(table: HoldemRound, player_id: int) -> tuple[HoldemRound, Player]:
+    players = {id: player for id, player in table.players.items() if id != player_id}
+    seats = [seat if seat != player_id else -1 for seat in table.seats]
+    return update(table, players=players, seats=seats), table.players[player_id]
+
+# Into a random empty seat.
+def seat(table: HoldemRound, player: Player, rng: RandomStream) -> HoldemRound:
+    empty = [i for i, seat in enumerate(table.seats) if seat == -1]
+    seats = list(table.seats)
+    seats[rng.choice(empty)] = player.player_id
+    return update(table, players={**table.players, player.player_id: player}, seats=seats)
+
+# Who posts the big blind next hand, so moving them doesn't let anyone skip it at a full table.
+def next_big_blind(table: HoldemRound) -> int:
+    seated = [i for i, id in enumerate(table.seats) if id != -1]
+    after_btn = [i for i in seated if i > table.seat_index_of_btn] + [i for i in seated if i <= table.seat_index_of_btn]
+    # after_btn[0] is the next button; heads-up it posts the small blind.
+    return table.seats[after_btn[2 if len(after_btn) > 2 else 1]]
+
+def balance_tables(tables: list[HoldemRound], table_size: int, rng: RandomStream) -> tuple[list[HoldemRound], int, int]:
+    tables = [table for table in tables if table.players]
+    breaks = 0
+    moves = 0
+    while True:
+        counts = [len(table.players) for table in tables]
+        smallest = counts.index(min(counts))
+
+        # Break the smallest table when the rest can seat its players, each to the emptiest table.
+        if len(tables) > 1 and sum(counts) <= table_size * (len(tables) - 1):
+            broken = tables.pop(smallest)
+            for id in broken.seats:
+                if id == -1:
+                    continue
+                emptiest = min(range(len(tables)), key=lambda i: len(tables[i].players))
+                tables[emptiest] = seat(tables[emptiest], broken.players[id], rng)
+            breaks += 1
+            continue
+
+        biggest = counts.index(max(counts))
+        if counts[biggest] - counts[smallest] > 1:
+            tables[biggest], player = unseat(tables[biggest], next_big_blind(tables[biggest]))
+            tables[smallest] = seat(tables[smallest], player, rng)
+            moves += 1
+            continue
+
+        return tables, breaks, moves
+
+# Plays a tournament between players (unique player_ids; their chips are replaced by starting_stack)
+# at tables of table_size. With policies (player_id -> policy, see simulate.py) every table is
+# played headless; without, every decision goes to the LLM as in main.py.
+def run_tournament(players: list[Player], table_size=9, policies: dict | None = None, seed: int | None = None,
+        starting_stack=STARTING_STACK, blind_levels=BLIND_LEVELS, hands_per_level=HANDS_PER_LEVEL,
+        max_rounds=100000) -> TournamentResult:
+    if not 2 <= table_size <= HoldemRound.MAX_SEATS:
+        raise ValueError(f"Expected 2 to {HoldemRound.MAX_SEATS} seats per table, got {table_size}.")
+    if len(players) < 2:
+        raise ValueError(f"A tournament needs at least two players, got {len(players)}.")
+
+    rng = RandomStream(seed)
+    tables = seat_players(players, table_size, starting_stack, rng)
+    names = {player.player_id: player.name for player in players}
+
+    busted = []
+    violations = []
+    hands = 0
+    breaks = 0
+    moves = 0
+    rounds = 0
+    blinds = blind_levels[0]
+    while sum(len(table.players) for table in tables) > 1 and rounds < max_rounds:
+        blinds = blind_levels[min(rounds // hands_per_level, len(blind_levels) - 1)]
+
+        out = []
+        for i, table in enumerate(tables):
+            # Only possible with an odd player out at heads-up tables; they wait for someone to bust.
+            if len(table.players) < 2:
+                continue
+            before = {id: player.chips for id, player in table.players.items()}
+            # Headless, only this hand's actions are kept; the LLM's memory needs the rest.
+            actions = [] if policies is not None else table.actions
+            table = update(table, pot_queue=PotQueue({}, 0, []), community_cards=[], actions=actions,
+                round_id=table.round_id + 1, small_blind=blinds[0], big_blind=blinds[1])
+            tables[i] = play_round(table, policies=policies)
+            violations.extend(tables[i].violations)
+            out += [(chips, id) for id, chips in before.items() if id not in tables[i].players]
+            hands += 1
+        busted += [id for _, id in sorted(out)]
+
+        tables, broken, moved = balance_tables(tables, table_size, rng)
+        breaks += broken
+        moves += moved
+        rounds += 1
+
+    standing = sorted(((player.chips, id) for table in tables for id, player in table.players.items()), reverse=True)
+    return TournamentResult(
+        finishing_order=[names[id] for _, id in standing] + [names[id] for id in reversed(busted)],
+        rounds=rounds,
+        hands=hands,
+        blinds=blinds,
+        table_breaks=breaks,
+        moves=moves,
+        finished=len(standing) == 1,
+        violations=violations
+    )
+
+if __name__ == "__main__":
+    import os
+    from main import load_personalities, init_players
+    from preflop import ensure_table
+    from simulate import CHARACTERS, playstyle_policy
+
+    ensure_table(processes=os.cpu_count() or 1)
+
+    # Every character at once, each playing the scripted policy closest to their playstyle.
+    players = init_players(load_personalities(CHARACTERS))
+    policies = {player.player_id: playstyle_policy(player.personality.style) for player in players}
+    result = run_tournament(players, table_size=9, policies=policies, seed=0)
+
+    print(f"{len(players)} players, {result.rounds} rounds, {result.hands} hands, blinds {result.blinds[0]}/{result.blinds[1]} at the end")
+    print(f"{result.table_breaks} table breaks, {result.moves} moves to balance")
+    for violation in result.violations:
+        print(f"  ! {violation}")
+    for place, name in enumerate(result.finishing_order, start=1):
+        print(f"  {place:>2}. {name}")
@@ -1,14 +1,38 @@
+import os
 import random
 import math
+import tempfile
 import time
 from datetime import datetime
 from dataclasses import replace
 
-from constants import Phases, Actions
+import numpy as np
 
 def update(dataclass_, **kwargs):
     return replace(dataclass_, **kwargs)
 
+# Only readable by setting it, so it's set straight back.
+def current_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+# Written beside path under a temporary name, then renamed over it: anyone loading path at the same
+# time sees the old file or the whole new one, never an empty or half-written one.
+def write_atomic(path, chunks):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            # mkstemp makes it 0600; give it the mode open() would have.
+            os.fchmod(f.fileno(), 0o666 & ~current_umask())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
 def get_date():
     return datetime.now().strftime("%Y-%m-%d")
 
@@ -18,19 +42,28 @@ def get_nanoseconds():
 def get_time():
     return datetime.now().strftime("%H:%M:%S")
 
-def init_rand(round, seed=None):
-
-    if(seed == None):
-        seed = math.floor(time.time()*1000000)
+# A seedable stream of random numbers, owned by one table, hand or worker rather than shared
+# through the random module. seed_value is what to log to replay it; spawn() hands out child
+# streams that are independent of each other and of whatever the parent draws.
+class RandomStream(random.Random):
+    def __init__(self, seed: int | None = None):
+        self.seed_value = math.floor(time.time()*1000000) if seed is None else seed
+        self._sequence = np.random.SeedSequence(self.seed_value)
+        super().__init__(self.seed_value)
 
-    random.seed(seed)
+    def spawn(self, count: int) -> list['RandomStream']:
+        return [RandomStream(int.from_bytes(child.generate_state(4).tobytes(), 'little')) \
+            for child in self._sequence.spawn(count)]
 
-    round.log_action(phase=Phases.GAME_START, subject="Dealer", action=Actions.SHUFFLE, object=seed)
+    # With how many children it has spawned, so a copy doesn't hand out the same ones again.
+    def __reduce__(self):
+        return RandomStream, (self.seed_value,), (self.getstate(), self._sequence.n_children_spawned)
 
-    return round
+    def __setstate__(self, state):
+        random_state, spawned = state
+        self.setstate(random_state)
+        self._sequence = np.random.SeedSequence(self.seed_value, n_children_spawned=spawned)
 
-def shuffle(l):
-    random.shuffle(l)
+def shuffle(l, rng: random.Random):
+    rng.shuffle(l)
     return l
-
-
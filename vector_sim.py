@@ -0,0 +1,415 @@
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+import preflop
+from deck import Card, Hand
+from game_structs import HoldemRound
+
+# Bot-vs-bot play for thousands of tables at once. Every table's state lives in NumPy arrays,
+# one row per table and one column per seat, and all tables move through a hand in lockstep:
+# one shuffle for every deck, one betting step for every table still acting, one showdown
+# evaluation for every hand that gets there.
+#
+# The rules are game_logic's: the button moves to the next seated player, BTN posts the small
+# blind heads-up, preflop action starts after the BB and later streets after the BTN, and a
+# stack that can't cover a blind or call is all in for what it has. Pots are split into side
+# pots by each all-in player's contribution, as right_pot builds them, and settled as settle_pot
+# does, an uncalled top pot going back to its only player.
+#
+# Policies are vectorized too: policy(tables, rows, seat) decides for seat at each table in
+# rows, answering (actions, amounts) arrays. An action is FOLD, CALL (a check with nothing to
+# call) or RAISE, whose amount is what to raise by, np.inf for all in; like "raise N" in a
+# prompt reply, less than the minimum raise is raised to it.
+
+FOLD, CALL, RAISE = 0, 1, 2
+PREFLOP, FLOP, TURN, RIVER = 0, 1, 2, 3
+# Community cards showing on each street.
+BOARD_SIZES = (0, 3, 4, 5)
+
+# Cards are dealt as indices into Card.TABLE, and only turned into int cards for evaluation.
+CARDS = np.array(Card.TABLE, dtype=np.int64)
+# preflop.hand_index for every pair of card indices.
+HAND_INDEX = np.array([[preflop.hand_index((a, b)) if a != b else -1 for b in Card.TABLE] for a in Card.TABLE], dtype=np.int64)
+
+_preflop_shares = None
+
+@dataclass(slots=True)
+class Tables:
+    # Per table and seat. A seat stays seated until it busts; when only one is left the
+    # session is over and every seat buys back in.
+    stacks: np.ndarray
+    seated: np.ndarray
+    in_street: np.ndarray
+    in_round: np.ndarray
+    folded: np.ndarray
+    all_in: np.ndarray
+    # Seats counted from the button among those seated: 0 the BTN, 1 the SB (the BB heads-up), and so on.
+    order: np.ndarray
+    # (tables, seats, 2) and (tables, 5) card indices; the whole board is dealt up front and shown street by street.
+    hole: np.ndarray
+    board: np.ndarray
+
+    # Per table.
+    btn: np.ndarray
+    sb: np.ndarray
+    bb: np.ndarray
+    highest: np.ndarray
+    min_raise: np.ndarray
+    # The hand is over: everyone else folded.
+    done: np.ndarray
+
+    street: int
+    rng: np.random.Generator
+
+    # Totals per seat, over every table.
+    net_chips: np.ndarray
+    pots_won: np.ndarray
+    busts: np.ndarray
+    hands: int = 0
+    sessions: int = 0
+    showdowns: int = 0
+    # Hands where a table's chips weren't conserved: (hand number, table).
+    errors: list[tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.stacks.shape
+
+def new_tables(n_tables: int, seats: int, seed: int | None = None) -> Tables:
+    shape = (n_tables, seats)
+    return Tables(
+        stacks=np.full(shape, HoldemRound.MAX_BUY_IN, dtype=np.int64),
+        seated=np.ones(shape, dtype=bool),
+        in_street=np.zeros(shape, dtype=np.int64),
+        in_round=np.zeros(shape, dtype=np.int64),
+        folded=np.zeros(shape, dtype=bool),
+        all_in=np.zeros(shape, dtype=bool),
+        order=np.zeros(shape, dtype=np.int64),
+        hole=np.zeros(shape + (2,), dtype=np.int64),
+        board=np.zeros((n_tables, 5), dtype=np.int64),
+        btn=np.full(n_tables, -1, dtype=np.int64),
+        sb=np.zeros(n_tables, dtype=np.int64),
+        bb=np.zeros(n_tables, dtype=np.int64),
+        highest=np.zeros(n_tables, dtype=np.int64),
+        min_raise=np.zeros(n_tables, dtype=np.int64),
+        done=np.zeros(n_tables, dtype=bool),
+        street=PREFLOP,
+        rng=np.random.default_rng(seed),
+        net_chips=np.zeros(seats, dtype=np.int64),
+        pots_won=np.zeros(seats, dtype=np.int64),
+        busts=np.zeros(seats, dtype=np.int64),
+        sessions=n_tables
+    )
+
+# Per row, the first seat after start (going round the table) where mask is set, or -1.
+def seat_after(start: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    seat_count = mask.shape[1]
+    seats = (start[:, None] + np.arange(1, seat_count + 1)) % seat_count
+    hits = np.take_along_axis(mask, seats, axis=1)
+    first = seats[np.arange(len(start)), hits.argmax(axis=1)]
+    return np.where(hits.any(axis=1), first, -1)
+
+# Amounts can be np.inf for all in; what's actually bet is always whole chips.
+def bet(tables: Tables, rows: np.ndarray, seats: np.ndarray, amounts: np.ndarray):
+    actual = np.minimum(amounts, tables.stacks[rows, seats]).astype(np.int64)
+    tables.stacks[rows, seats] -= actual
+    tables.in_street[rows, seats] += actual
+    tables.in_round[rows, seats] += actual
+    tables.all_in[rows, seats] = tables.stacks[rows, seats] == 0
+
+def set_positions(tables: Tables):
+    n_tables, seat_count = tables.size
+    tables.btn = seat_after(tables.btn, tables.seated)
+
+    distance = (np.arange(seat_count) - tables.btn[:, None]) % seat_count
+    closer = tables.seated[:, None, :] & (distance[:, None, :] < distance[:, :, None])
+    tables.order = np.where(tables.seated, closer.sum(axis=2), -1)
+
+    heads_up = tables.seated.sum(axis=1) == 2
+    tables.sb = np.where(heads_up, tables.btn, (tables.order == 1).argmax(axis=1))
+    tables.bb = (tables.order == np.where(heads_up, 1, 2)[:, None]).argmax(axis=1)
+
+def post_blinds(tables: Tables):
+    rows = np.arange(tables.size[0])
+    bet(tables, rows, tables.sb, np.full(len(rows), HoldemRound.SMALL_BLIND))
+    bet(tables, rows, tables.bb, np.full(len(rows), HoldemRound.BIG_BLIND))
+
+# One shuffle for every table: hole cards for each seat, then the board.
+def deal(tables: Tables):
+    n_tables, seat_count = tables.size
+    picks = np.argsort(tables.rng.random((n_tables, 52)), axis=1)[:, :2 * seat_count + 5]
+    tables.hole = picks[:, :2 * seat_count].reshape(n_tables, seat_count, 2)
+    tables.board = picks[:, 2 * seat_count:]
+
+def start_hand(tables: Tables):
+    tables.in_street[:] = 0
+    tables.in_round[:] = 0
+    tables.folded = ~tables.seated
+    tables.all_in[:] = False
+    tables.done[:] = False
+    set_positions(tables)
+    post_blinds(tables)
+    deal(tables)
+
+# Who still has to act at each of rows: anyone who can bet and either hasn't acted this street
+# or is short of the highest bet. A lone player who can still bet only acts facing a bet, as in prompt_stuff.
+def needs_action(tables: Tables, rows: np.ndarray, acted: np.ndarray) -> np.ndarray:
+    folded = tables.folded[rows]
+    in_street = tables.in_street[rows]
+    highest = tables.highest[rows][:, None]
+
+    active = ~folded & ~tables.all_in[rows]
+    need = active & (~acted[rows] | (in_street < highest))
+    lone = active.sum(axis=1) <= 1
+    need &= ~(lone[:, None] & (in_street >= highest))
+    need[((~folded).sum(axis=1) <= 1) | tables.done[rows]] = False
+    return need
+
+def apply_actions(tables: Tables, rows: np.ndarray, seats: np.ndarray, actions: np.ndarray, amounts: np.ndarray):
+    highest = tables.highest[rows]
+    in_street = tables.in_street[rows, seats]
+
+    fold = actions == FOLD
+    tables.folded[rows[fold], seats[fold]] = True
+
+    raise_to = highest + np.maximum(amounts, tables.min_raise[rows])
+    put = np.where(actions == RAISE, raise_to - in_street, highest - in_street)
+    bet(tables, rows, seats, np.where(fold, 0, np.maximum(put, 0)))
+
+    # By what was actually put in, so a short all-in doesn't raise the minimum.
+    now_in = tables.in_street[rows, seats]
+    raised = (actions == RAISE) & (now_in > highest)
+    tables.min_raise[rows] = np.where(raised, np.maximum(tables.min_raise[rows], now_in - highest), tables.min_raise[rows])
+    tables.highest[rows] = np.maximum(highest, now_in)
+
+def play_street(tables: Tables, street: int, policies: list):
+    n_tables, seat_count = tables.size
+    rows = np.arange(n_tables)
+    tables.street = street
+    tables.highest = np.full(n_tables, HoldemRound.BIG_BLIND if street == PREFLOP else 0, dtype=np.int64)
+    tables.min_raise = np.full(n_tables, HoldemRound.BIG_BLIND, dtype=np.int64)
+    acted = np.zeros((n_tables, seat_count), dtype=bool)
+
+    # BB ends action preflop, BTN after; whoever can act next after them starts.
+    last = tables.bb if street == PREFLOP else tables.btn
+    to_act = seat_after(last, needs_action(tables, rows, acted))
+
+    while True:
+        rows = np.nonzero(to_act >= 0)[0]
+        if len(rows) == 0:
+            break
+        seats = to_act[rows]
+
+        actions = np.empty(len(rows), dtype=np.int8)
+        amounts = np.empty(len(rows))
+        for seat in range(seat_count):
+            at_seat = seats == seat
+            if at_seat.any():
+                actions[at_seat], amounts[at_seat] = policies[seat](tables, rows[at_seat], seat)
+
+        apply_actions(tables, rows, seats, actions, amounts)
+        acted[rows, seats] = True
+        to_act[rows] = seat_after(seats, needs_action(tables, rows, acted))
+
+    tables.in_street[:] = 0
+
+    # Everyone else folded: the one left takes everything in, uncalled chips included.
+    folded_out = ~tables.done & ((~tables.folded).sum(axis=1) == 1)
+    rows = np.nonzero(folded_out)[0]
+    winners = (~tables.folded[rows]).argmax(axis=1)
+    tables.stacks[rows, winners] += tables.in_round[rows].sum(axis=1)
+    np.add.at(tables.pots_won, winners, 1)
+    tables.done |= folded_out
+
+# Each row's amount split in whole chips between the strongest of its eligible seats, odd chips
+# one each to the winners nearest the button's left, as settle_pot does; also who won it.
+def split(amounts: np.ndarray, eligible: np.ndarray, strengths: np.ndarray, btn: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    seat_count = eligible.shape[1]
+    best = np.where(eligible, strengths, -1).max(axis=1)
+    winners = eligible & (strengths == best[:, None]) & (amounts > 0)[:, None]
+    share, odd_chips = np.divmod(amounts, np.maximum(winners.sum(axis=1), 1))
+
+    distance = (np.arange(seat_count) - btn[:, None] - 1) % seat_count
+    rank = (winners[:, None, :] & (distance[:, None, :] < distance[:, :, None])).sum(axis=2)
+    return winners * (share[:, None] + (rank < odd_chips[:, None])), winners
+
+def showdown(tables: Tables):
+    rows = np.nonzero(~tables.done)[0]
+    if len(rows) == 0:
+        return
+    seat_count = tables.size[1]
+    live = ~tables.folded[rows]
+    contributed = tables.in_round[rows]
+
+    boards = np.broadcast_to(tables.board[rows, None, :], (len(rows), seat_count, 5))
+    cards = CARDS[np.concatenate([tables.hole[rows], boards], axis=2)].reshape(-1, 7)
+    strengths, _ = Hand.evaluate_batch(cards)
+    strengths = np.where(live, strengths.reshape(len(rows), seat_count), -1)
+
+    # One pot per distinct live contribution, smallest first: everyone's chips between the
+    # previous level and this one, for the live players who put in at least this much.
+    levels = np.sort(np.where(live, contributed, np.inf), axis=1)
+    previous = np.zeros(len(rows))
+    won = np.zeros((len(rows), seat_count), dtype=np.int64)
+    collected = np.zeros(seat_count, dtype=np.int64)
+    for k in range(seat_count + 1):
+        if k < seat_count:
+            level = levels[:, k]
+            level = np.where(np.isfinite(level) & (level > previous), level, previous)
+            amounts = (np.clip(contributed, previous[:, None], level[:, None]) - previous[:, None]).sum(axis=1)
+        else:
+            # Folded chips above the biggest live contribution are dead money for the top pot.
+            level = previous
+            amounts = np.clip(contributed - previous[:, None], 0, None).sum(axis=1)
+        eligible = live & (contributed >= level[:, None])
+        pot, winners = split(amounts.astype(np.int64), eligible, strengths, tables.btn[rows])
+        won += pot
+        # A pot only one player is in is uncalled and goes back, which isn't winning it.
+        collected += (winners & (eligible.sum(axis=1) > 1)[:, None]).sum(axis=0)
+        previous = level
+
+    tables.stacks[rows] += won
+    tables.pots_won += collected
+    tables.showdowns += len(rows)
+
+# Busted seats leave; a table down to one player starts a new session with everyone rebought.
+def remove_empty_stacks(tables: Tables):
+    busted = tables.seated & (tables.stacks == 0)
+    tables.busts += busted.sum(axis=0)
+    tables.seated &= ~busted
+
+    over = tables.seated.sum(axis=1) < 2
+    tables.stacks[over] = HoldemRound.MAX_BUY_IN
+    tables.seated[over] = True
+    tables.btn[over] = -1
+    tables.sessions += int(over.sum())
+
+def play_hand(tables: Tables, policies: list):
+    before = tables.stacks.copy()
+    start_hand(tables)
+    for street in (PREFLOP, FLOP, TURN, RIVER):
+        play_street(tables, street, policies)
+    showdown(tables)
+
+    expected = before.sum(axis=1)
+    for table in np.nonzero(tables.stacks.sum(axis=1) != expected)[0]:
+        tables.errors.append((tables.hands, int(table)))
+    tables.net_chips += (tables.stacks - before).sum(axis=0)
+    tables.hands += 1
+    remove_empty_stacks(tables)
+
+
+"""Policies"""
+
+# Vectorized counterparts of simulate.py's policies.
+
+def to_call(tables: Tables, rows: np.ndarray, seat: int) -> np.ndarray:
+    return tables.highest[rows] - tables.in_street[rows, seat]
+
+def calling_station(tables: Tables, rows: np.ndarray, seat: int) -> tuple[np.ndarray, np.ndarray]:
+    return np.full(len(rows), CALL, dtype=np.int8), np.zeros(len(rows))
+
+def maniac(tables: Tables, rows: np.ndarray, seat: int) -> tuple[np.ndarray, np.ndarray]:
+    return np.full(len(rows), RAISE, dtype=np.int8), np.full(len(rows), np.inf)
+
+def random_policy(tables: Tables, rows: np.ndarray, seat: int) -> tuple[np.ndarray, np.ndarray]:
+    roll = tables.rng.random(len(rows))
+    actions = np.where(roll < 0.65, CALL, RAISE).astype(np.int8)
+    actions[(roll < 0.15) & (to_call(tables, rows, seat) > 0)] = FOLD
+    amounts = (tables.min_raise[rows] * tables.rng.integers(1, 4, len(rows))).astype(float)
+    amounts[roll >= 0.95] = np.inf
+    return actions, amounts
+
+# Share of the pot each preflop grid cell is worth, by player count, from preflop.py's table.
+def preflop_shares() -> np.ndarray:
+    global _preflop_shares
+    if _preflop_shares is None:
+        table = preflop._table if preflop._table is not None else preflop.load_table()
+        cells = np.frombuffer(table.buffer, dtype=np.uint16, offset=preflop.HEADER.size,
+            count=len(preflop.PLAYER_COUNTS) * preflop.HAND_COUNT * preflop.FIELDS)
+        _preflop_shares = cells.reshape(len(preflop.PLAYER_COUNTS), preflop.HAND_COUNT, preflop.FIELDS)[..., 2] / preflop.SCALE
+    return _preflop_shares
+
+# As simulate.tight_aggressive, less the bonus for draws, which HandState only finds one hand at a time.
+def tight_aggressive(tables: Tables, rows: np.ndarray, seat: int) -> tuple[np.ndarray, np.ndarray]:
+    live = (~tables.folded[rows]).sum(axis=1)
+    if tables.street == PREFLOP:
+        hole = tables.hole[rows, seat]
+        players = np.clip(live, preflop.PLAYER_COUNTS[0], preflop.PLAYER_COUNTS[-1]) - preflop.PLAYER_COUNTS[0]
+        strength = preflop_shares()[players, HAND_INDEX[hole[:, 0], hole[:, 1]]] * live
+    else:
+        cards = np.concatenate([tables.hole[rows, seat], tables.board[rows, :BOARD_SIZES[tables.street]]], axis=1)
+        _, categories = Hand.evaluate_batch(CARDS[cards])
+        strength = 0.5 + categories / 2
+
+    actions = np.where((strength > 1) | (to_call(tables, rows, seat) == 0), CALL, FOLD).astype(np.int8)
+    actions[strength > 1.5] = RAISE
+    return actions, tables.min_raise[rows] * 2
+
+POLICIES = {
+    'calling_station': calling_station,
+    'maniac': maniac,
+    'random': random_policy,
+    'tight_aggressive': tight_aggressive
+}
+
+@dataclass(frozen=True)
+class BatchResult:
+    tables: int
+    hands: int
+    sessions: int
+    seconds: float
+    hands_per_second: float
+    # Per seat, keyed "<seat> <policy name>".
+    net_chips: dict[str, int]
+    pots_won: dict[str, int]
+    busts: dict[str, int]
+    showdowns: int
+    # Hands where a table's chips weren't conserved: (hand number, table).
+    errors: list[tuple[int, int]] = field(default_factory=list)
+
+def policy_name(policy) -> str:
+    for name, known in POLICIES.items():
+        if known is policy:
+            return name
+    return getattr(policy, '__name__', str(policy))
+
+# Plays hands_per_table hands at each of n_tables tables, one policy per seat (2 to 10 seats;
+# names from POLICIES or vectorized callables), e.g. simulate_tables(10000, 100, ['maniac', 'random']).
+def simulate_tables(n_tables: int, hands_per_table: int, policies: list, seed: int | None = None) -> BatchResult:
+    policies = [POLICIES[policy] if isinstance(policy, str) else policy for policy in policies]
+    if not 2 <= len(policies) <= HoldemRound.MAX_SEATS:
+        raise ValueError(f"Expected 2 to {HoldemRound.MAX_SEATS} policies, got {len(policies)}.")
+
+    names = [f"{seat} {policy_name(policy)}" for seat, policy in enumerate(policies)]
+    tables = new_tables(n_tables, len(policies), seed)
+
+    start = time.perf_counter()
+    for _ in range(hands_per_table):
+        play_hand(tables, policies)
+    seconds = time.perf_counter() - start
+
+    hands = n_tables * hands_per_table
+    return BatchResult(
+        tables=n_tables,
+        hands=hands,
+        sessions=tables.sessions,
+        seconds=seconds,
+        hands_per_second=hands / seconds if seconds else 0.0,
+        net_chips={name: int(chips) for name, chips in zip(names, tables.net_chips)},
+        pots_won={name: int(pots) for name, pots in zip(names, tables.pots_won)},
+        busts={name: int(busts) for name, busts in zip(names, tables.busts)},
+        showdowns=tables.showdowns,
+        errors=tables.errors
+    )
+
+if __name__ == "__main__":
+    preflop.ensure_table(processes=os.cpu_count() or 1)
+    result = simulate_tables(10000, 100, ['tight_aggressive', 'calling_station', 'random', 'random', 'maniac', 'tight_aggressive'], seed=0)
+    print(f"{result.hands:,} hands at {result.tables:,} tables in {result.seconds:.1f}s ({result.hands_per_second * 60:,.0f} hands/min), {result.sessions} sessions")
+    for name in result.net_chips:
+        print(f"  {name:<20} net {result.net_chips[name]:>+9}  pots {result.pots_won[name]:>8}  busts {result.busts[name]:>6}")
+    print(f"{len(result.errors)} errors")